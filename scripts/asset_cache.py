@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+生成资源的内容寻址增量缓存
+每个产物按「源文件字节哈希 + 目标尺寸 + 编码参数」记一条清单，
+源图标没变、参数没变、产物文件也没被改动时直接跳过重新生成
+
+清单默认位于 <项目根>/.asset_cache/manifest.json（已在 .gitignore 中忽略），
+CI 上保留这个目录即可在打包任务之间复用
+"""
+
+import hashlib
+import json
+import os
+
+# 缓存目录（相对项目根目录）
+CACHE_DIR_NAME = '.asset_cache'
+MANIFEST_NAME = 'manifest.json'
+
+# 清单格式版本，结构变化时递增，旧清单整体作废
+MANIFEST_VERSION = 1
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """按块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_manifest_path(project_root):
+    return os.path.join(project_root, CACHE_DIR_NAME, MANIFEST_NAME)
+
+
+class AssetCache:
+    """
+    产物清单
+
+    用法：
+        cache = AssetCache(project_root, source_path, force=args.force)
+        if not cache.is_fresh(output_path, params):
+            ... 生成 output_path ...
+            cache.record(output_path, params)
+        cache.save()
+
+    params 是描述编码方式的 dict（目标尺寸、格式、optimize 等），
+    必须可 JSON 序列化；任何一项变化都会让对应产物失效
+    """
+
+    def __init__(self, project_root, source_path, force=False, manifest_path=None):
+        self.project_root = project_root
+        self.source_path = source_path
+        self.force = force
+        self.manifest_path = manifest_path or default_manifest_path(project_root)
+        self._source_digest = None
+        self._entries = self._load()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != MANIFEST_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    @property
+    def source_digest(self):
+        if self._source_digest is None:
+            self._source_digest = file_digest(self.source_path)
+        return self._source_digest
+
+    def _rel(self, output_path):
+        return os.path.relpath(os.path.abspath(output_path), self.project_root).replace(os.sep, '/')
+
+    def key(self, params):
+        """源文件哈希与编码参数共同决定的缓存键"""
+        payload = json.dumps({'source': self.source_digest, 'params': params},
+                             sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def is_fresh(self, output_path, params):
+        """产物存在、键一致且文件内容与记录相符时返回 True"""
+        if self.force:
+            self.misses += 1
+            return False
+        entry = self._entries.get(self._rel(output_path))
+        fresh = (
+            entry is not None
+            and entry.get('key') == self.key(params)
+            and os.path.exists(output_path)
+            and os.path.getsize(output_path) == entry.get('size')
+            and file_digest(output_path) == entry.get('output')
+        )
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return fresh
+
+    def record(self, output_path, params):
+        """登记刚生成的产物"""
+        self._entries[self._rel(output_path)] = {
+            'key': self.key(params),
+            'size': os.path.getsize(output_path),
+            'output': file_digest(output_path),
+        }
+        self._dirty = True
+
+    def save(self):
+        """原子写回清单（先写临时文件再替换）"""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self._entries},
+                      f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
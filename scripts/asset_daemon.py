@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+资源构建常驻进程（watch 模式）
+PIL / fontTools 只导入一次，解码后的源图标金字塔常驻内存；监听输入文件，
+只重新生成依赖变化输入的那一组产物：
+
+    icons  源图标（icon.png / res/icon.png / assets/icon.png）
+           → Windows ICO、MSIX 磁贴、iOS 大图标（icon_pipeline.render_all，带增量缓存）
+    l10n   lib/l10n/*.arb、l10n.yaml
+           → flutter gen-l10n（PATH 上没有 flutter 时只校验 ARB 是合法 JSON）
+    fonts  下载目录里的 NotoSerifSC-VF.ttf、build_serif_subset.py 本身
+           → assets/fonts/NotoSerifSC-Subset.ttf（脚本改动后先重新加载模块）
+
+Linux 上用 inotify 监听所在目录（编辑器的「写临时文件再改名」也能收到），
+其他平台退回到按 mtime 轮询。连续的保存事件会合并（DEBOUNCE 秒内只构建一次）
+
+用法：
+    python3 scripts/asset_daemon.py [--targets icons,l10n,fonts] [--once] [--poll]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import glob
+import importlib
+import json
+import os
+import select
+import shutil
+import struct
+import subprocess
+import sys
+import time
+import traceback
+
+from icon_pipeline import (DEFAULT_RESAMPLE, RESAMPLE_MODES, ResizePyramid, find_source_icon,
+                           get_project_root, render_all, source_candidates)
+
+# 默认启用的目标；fonts 首次构建要下载约 20MB 的源字体，需要显式开启
+DEFAULT_TARGETS = ('icons', 'l10n')
+ALL_TARGETS = ('icons', 'l10n', 'fonts')
+
+# 合并连续事件的等待时间（秒）
+DEBOUNCE = 0.3
+
+# 轮询模式下的扫描间隔（秒）
+POLL_INTERVAL = 1.0
+
+# inotify 事件掩码（<sys/inotify.h>）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """监听若干目录，wait() 返回期间发生变化的文件绝对路径集合"""
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 失败')
+        self._dirs = {}
+        for directory in directories:
+            wd = self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f'无法监听目录: {directory}')
+            self._dirs[wd] = directory
+
+    def _read_events(self):
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, _, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                directory = self._dirs.get(wd)
+                if directory and name:
+                    changed.add(os.path.join(directory, os.fsdecode(name)))
+
+    def wait(self, timeout=None):
+        """阻塞到有事件为止，然后在 DEBOUNCE 内继续收集，合并成一批"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = self._read_events()
+        while select.select([self.fd], [], [], DEBOUNCE)[0]:
+            changed |= self._read_events()
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """没有 inotify 时的退路：定期比较目录里各文件的 (mtime, size)"""
+
+    def __init__(self, directories, interval=POLL_INTERVAL):
+        self.directories = list(directories)
+        self.interval = interval
+        self._state = self._scan()
+
+    def _scan(self):
+        state = {}
+        for directory in self.directories:
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                state[path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval)
+            current = self._scan()
+            changed = {path for path in current.keys() | self._state.keys()
+                       if current.get(path) != self._state.get(path)}
+            if changed:
+                # 再等一个 DEBOUNCE，让还在写的文件落盘
+                time.sleep(DEBOUNCE)
+                self._state = self._scan()
+                return changed
+            self._state = current
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self):
+        pass
+
+
+class IconTarget:
+    """源图标 → ICO / 磁贴 / iOS 大图标；金字塔在两次构建之间常驻内存"""
+
+    name = 'icons'
+
+    def __init__(self, root, jobs=1, optimize_budget=None, resample=DEFAULT_RESAMPLE):
+        self.root = root
+        self.jobs = jobs
+        self.optimize_budget = optimize_budget
+        self.resample = resample
+        self._pyramid = None
+
+    def inputs(self):
+        return set(source_candidates(self.root))
+
+    def build(self, changed):
+        if changed:
+            # 源文件内容变了（或换了一个候选位置），内存里的金字塔作废
+            self._pyramid = None
+        source = find_source_icon(self.root)
+        if source and self._pyramid is None:
+            self._pyramid = ResizePyramid.from_file(source, mode=self.resample)
+        return render_all(self.root, jobs=self.jobs, optimize_budget=self.optimize_budget,
+                          resample=self.resample, pyramid=self._pyramid)
+
+
+class L10nTarget:
+    """ARB → gen_l10n；没有 flutter 时退化为 JSON 校验"""
+
+    name = 'l10n'
+
+    def __init__(self, root):
+        self.root = root
+        self.arb_dir = os.path.join(root, 'lib', 'l10n')
+        self.flutter = shutil.which('flutter')
+
+    def inputs(self):
+        paths = set(glob.glob(os.path.join(self.arb_dir, '*.arb')))
+        paths.add(os.path.join(self.root, 'l10n.yaml'))
+        return paths
+
+    def watches(self, path):
+        return path.endswith('.arb') and os.path.dirname(path) == self.arb_dir
+
+    def validate(self, paths):
+        ok = True
+        for path in sorted(paths):
+            if not path.endswith('.arb') or not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    json.load(f)
+            except ValueError as e:
+                print(f"✗ {os.path.relpath(path, self.root)}: {e}")
+                ok = False
+        return ok
+
+    def build(self, changed):
+        if not self.validate(changed or self.inputs()):
+            return False
+        if not self.flutter:
+            print("⚠ PATH 上没有 flutter，只做了 ARB 格式校验")
+            return True
+        result = subprocess.run([self.flutter, 'gen-l10n'], cwd=self.root)
+        return result.returncode == 0
+
+
+class FontTarget:
+    """源字体 / 构建脚本 → 衬线字体子集"""
+
+    name = 'fonts'
+
+    def __init__(self, include_traditional=False, work_dir=None):
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts'))
+        import build_serif_subset
+        self.module = build_serif_subset
+        self.include_traditional = include_traditional
+        self.work_dir = work_dir or build_serif_subset.default_work_dir()
+
+    def inputs(self):
+        return {
+            str(self.work_dir / self.module.SOURCE_FONT_FILE),
+            os.path.abspath(self.module.__file__),
+        }
+
+    def build(self, changed):
+        if os.path.abspath(self.module.__file__) in changed:
+            print("↻ build_serif_subset.py 有改动，重新加载")
+            self.module = importlib.reload(self.module)
+        self.module.build(self.include_traditional, self.work_dir)
+        return True
+
+
+def _matches(target, path):
+    if path in target.inputs():
+        return True
+    watches = getattr(target, 'watches', None)
+    return bool(watches and watches(path))
+
+
+def run_target(target, changed):
+    print(f"\n▶ [{target.name}] 开始构建")
+    start = time.perf_counter()
+    try:
+        ok = target.build(changed)
+    except Exception:
+        # 常驻进程不能因为一次构建失败就退出，打印完整堆栈后继续监听
+        traceback.print_exc()
+        ok = False
+    elapsed = time.perf_counter() - start
+    mark = '✓' if ok else '✗'
+    print(f"{mark} [{target.name}] 用时 {elapsed:.2f}s")
+    return ok
+
+
+def make_watcher(directories, poll=False):
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            print(f"⚠ inotify 不可用（{e}），改用轮询")
+    return PollingWatcher(directories)
+
+
+def serve(targets, poll=False):
+    """初次全量构建后进入监听循环，Ctrl+C 退出"""
+    for target in targets:
+        run_target(target, set())
+
+    directories = sorted({os.path.dirname(path) for target in targets for path in target.inputs()
+                          if os.path.isdir(os.path.dirname(path))})
+    watcher = make_watcher(directories, poll)
+    print(f"\n👀 正在监听 {len(directories)} 个目录（{type(watcher).__name__}），Ctrl+C 退出")
+    try:
+        while True:
+            changed = watcher.wait()
+            for target in targets:
+                hits = {path for path in changed if _matches(target, path)}
+                if hits:
+                    names = ', '.join(sorted(os.path.basename(path) for path in hits))
+                    print(f"\n• 变化: {names}")
+                    run_target(target, hits)
+    except KeyboardInterrupt:
+        print("\n已停止监听")
+    finally:
+        watcher.close()
+
+
+def main():
+    from png_optimizer import DEFAULT_BUDGET
+
+    parser = argparse.ArgumentParser(description='资源构建常驻进程：监听输入并增量重建')
+    parser.add_argument('--targets', default=','.join(DEFAULT_TARGETS),
+                        help=f'逗号分隔的构建目标，可选 {",".join(ALL_TARGETS)}'
+                             f'（默认 {",".join(DEFAULT_TARGETS)}）')
+    parser.add_argument('--once', action='store_true', help='只构建一次，不进入监听')
+    parser.add_argument('--poll', action='store_true', help='强制使用 mtime 轮询代替 inotify')
+    parser.add_argument('--jobs', type=int, default=1, help='磁贴并行进程数')
+    parser.add_argument('--optimize', action='store_true', help='磁贴走多策略 PNG 优化器')
+    parser.add_argument('--optimize-budget', type=float, default=DEFAULT_BUDGET,
+                        help=f'每个磁贴的优化时间预算（秒，默认 {DEFAULT_BUDGET}）')
+    parser.add_argument('--resample', choices=RESAMPLE_MODES, default=DEFAULT_RESAMPLE,
+                        help=f'重采样模式（默认 {DEFAULT_RESAMPLE}）')
+    parser.add_argument('--traditional', action='store_true', help='字体子集额外收录繁体常用字')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.targets.split(',') if name.strip()]
+    unknown = [name for name in names if name not in ALL_TARGETS]
+    if unknown:
+        parser.error(f"未知目标: {', '.join(unknown)}")
+
+    root = get_project_root()
+    targets = []
+    for name in names:
+        if name == 'icons':
+            targets.append(IconTarget(root, jobs=args.jobs, resample=args.resample,
+                                      optimize_budget=args.optimize_budget if args.optimize else None))
+        elif name == 'l10n':
+            targets.append(L10nTarget(root))
+        elif name == 'fonts':
+            targets.append(FontTarget(include_traditional=args.traditional))
+
+    if args.once:
+        ok = all([run_target(target, set()) for target in targets])
+        return 0 if ok else 1
+    serve(targets, poll=args.poll)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
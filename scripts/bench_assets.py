@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+资源生成脚本的性能基准
+对合成源图（512–8192px，有/无透明通道）分别跑 Windows ICO、MSIX 磁贴、
+iOS 大图标三个阶段，以及 build_serif_subset 的字符集与子集化阶段，
+记录每个阶段的墙钟时间、CPU 时间和峰值 RSS，写成 JSON 供不同提交之间对比
+
+每个阶段在独立的子进程里运行，峰值 RSS 含解释器与库导入的基线（单独记录在
+baseline_rss_mb 里）。Linux 读 /proc 的 VmHWM，其它平台用 getrusage；
+Windows 上两者都没有，RSS 记为 null
+
+用法：
+    python3 scripts/bench_assets.py [--sizes 512,1024,...] [--repeat N] [--font 源字体.ttf] [-o 结果.json]
+    python3 scripts/bench_assets.py --compare 旧结果.json 新结果.json
+
+不传 --font 时子集化阶段用合成字体（每个字符一个方框字形），只能衡量流程本身的
+开销；要衡量真实 CJK 字体请传入 NotoSerifSC 可变字体
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+from queue import Empty
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, os.path.join(SCRIPT_DIR, 'fonts'))
+
+from icon_pipeline import DEFAULT_RESAMPLE, RESAMPLE_MODES  # noqa: E402
+
+DEFAULT_SIZES = [512, 1024, 2048, 4096, 8192]
+ICON_STAGES = ['windows_icon', 'msix_tiles', 'ios_icon']
+FONT_STAGES = ['charset', 'charset_traditional', 'subset']
+
+
+def _proc_status_mb(field):
+    """读取 /proc/self/status 里的内存字段（仅 Linux），单位 MB"""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """Linux 上把 VmHWM 重置为当前 RSS，让峰值只统计阶段本身"""
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='ascii') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    # Linux 的 ru_maxrss 会跨 exec 继承父进程的峰值，优先用 VmHWM
+    peak = _proc_status_mb('VmHWM')
+    if peak is not None or resource is None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节计，其余以 KB 计
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_source(path, size, alpha):
+    """生成确定性的合成源图：渐变底 + 抗锯齿圆形内容，带透明时四周全透明"""
+    import numpy as np
+    from PIL import Image
+
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    radius = np.hypot(x - 0.5, y - 0.5)
+    coverage = np.clip((0.4 - radius) * size, 0.0, 1.0)
+    rgba = np.empty((size, size, 4), dtype=np.uint8)
+    rgba[..., 0] = (x * 255).astype(np.uint8)
+    rgba[..., 1] = (y * 255).astype(np.uint8)
+    rgba[..., 2] = ((1 - x) * 200 + 40).astype(np.uint8)
+    if alpha:
+        rgba[..., 3] = (coverage * 255).astype(np.uint8)
+    else:
+        background = np.array([30, 60, 200], dtype=np.float32)
+        rgba[..., :3] = (rgba[..., :3] * coverage[..., None]
+                         + background * (1 - coverage[..., None])).astype(np.uint8)
+        rgba[..., 3] = 255
+    Image.fromarray(rgba, 'RGBA').save(path, compress_level=1)
+
+
+def make_font(path, charset):
+    """合成字体：charset 里每个字符一个方框字形"""
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    pen = TTGlyphPen(None)
+    pen.moveTo((100, 0))
+    pen.lineTo((100, 800))
+    pen.lineTo((900, 800))
+    pen.lineTo((900, 0))
+    pen.closePath()
+    box = pen.glyph()
+
+    names = ['.notdef'] + [f'uni{ord(ch):04X}' for ch in charset]
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder(names)
+    builder.setupCharacterMap({ord(ch): f'uni{ord(ch):04X}' for ch in charset})
+    builder.setupGlyf({name: box for name in names})
+    builder.setupHorizontalMetrics({name: (1000, 100) for name in names})
+    builder.setupHorizontalHeader(ascent=880, descent=-120)
+    builder.setupNameTable({'familyName': 'BenchSerif', 'styleName': 'Regular'})
+    builder.setupOS2()
+    builder.setupPost()
+    builder.save(path)
+
+
+def _stage(name, work_dir, source, font, resample):
+    """在子进程里执行单个阶段（输出重定向掉，只留计时）"""
+    if name == 'windows_icon':
+        from generate_windows_icon import generate_windows_icon
+        return generate_windows_icon(project_root=work_dir, force=True, resample=resample)
+    if name == 'msix_tiles':
+        from generate_msix_tiles import generate_all_msix_tiles
+        return generate_all_msix_tiles(project_root=work_dir, force=True, resample=resample)
+    if name == 'ios_icon':
+        from optimize_ios_icon import create_large_ios_icon
+        return create_large_ios_icon(source, os.path.join(work_dir, 'icon_ios_large.png'), 0.15)
+    if name in ('charset', 'charset_traditional'):
+        from build_serif_subset import build_charset
+        return bool(build_charset(name == 'charset_traditional'))
+    if name == 'subset':
+        from pathlib import Path
+        from build_serif_subset import build_charset, subset_font
+        charset_file = Path(work_dir) / 'charset.txt'
+        charset_file.write_text(build_charset(False), encoding='utf-8')
+        subset_font(Path(font), charset_file, Path(work_dir) / 'subset.ttf')
+        return True
+    raise ValueError(f'未知阶段: {name}')
+
+
+def _child(name, work_dir, source, font, resample, queue):
+    # 先导入阶段用到的库，基线 RSS 才包含解释器与 PIL/NumPy/fontTools
+    import numpy, PIL.Image, fontTools.ttLib  # noqa: F401
+    _reset_peak_rss()
+    baseline = _proc_status_mb('VmRSS') or _peak_rss_mb()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        ok = _stage(name, work_dir, source, font, resample)
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+    queue.put({
+        'ok': bool(ok),
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'peak_rss_mb': _peak_rss_mb(),
+        'baseline_rss_mb': baseline,
+    })
+
+
+def run_stage(name, work_dir, source=None, font=None, resample=DEFAULT_RESAMPLE):
+    """在全新的 spawn 子进程里跑一个阶段，返回计时与内存指标"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(name, work_dir, source, font, resample, queue))
+    process.start()
+    result = None
+    try:
+        # 子进程异常退出时不会往队列里放结果，不能无限期阻塞
+        while result is None and (process.is_alive() or not queue.empty()):
+            try:
+                result = queue.get(timeout=0.5)
+            except Empty:
+                pass
+    finally:
+        process.join()
+    if result is None or process.exitcode != 0:
+        raise RuntimeError(f'阶段 {name} 的子进程异常退出: {process.exitcode}')
+    return result
+
+
+def _best(runs):
+    """多次重复取最小时间、最大 RSS"""
+    best = dict(runs[0])
+    for run in runs[1:]:
+        best['wall_s'] = min(best['wall_s'], run['wall_s'])
+        best['cpu_s'] = min(best['cpu_s'], run['cpu_s'])
+        if run['peak_rss_mb'] is not None:
+            # 某次没取到 RSS 记为 None，只在全部都是 None 时保留 None
+            best['peak_rss_mb'] = max(best['peak_rss_mb'] or 0.0, run['peak_rss_mb'])
+        best['ok'] = best['ok'] and run['ok']
+    return best
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata():
+    import numpy
+    import PIL
+    import fontTools
+    return {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pillow': PIL.__version__,
+        'numpy': numpy.__version__,
+        'fonttools': fontTools.version,
+    }
+
+
+def run_benchmarks(sizes, repeat=1, font=None, stages=None, resample=DEFAULT_RESAMPLE):
+    stages = stages or ICON_STAGES + FONT_STAGES
+    results = []
+
+    def record(stage, size, alpha, runs):
+        entry = {'stage': stage, 'size': size, 'alpha': alpha, 'repeat': len(runs)}
+        entry.update(_best(runs))
+        results.append(entry)
+        rss = entry['peak_rss_mb']
+        rss_text = f"{rss:8.1f}MB" if rss is not None else '     N/A'
+        label = f"{stage}" + (f" {size}px {'RGBA' if alpha else 'RGB'}" if size else '')
+        print(f"  {label:36s} wall {entry['wall_s']:7.3f}s  cpu {entry['cpu_s']:7.3f}s  peak {rss_text}"
+              + ('' if entry['ok'] else '  ✗ 失败'))
+
+    with tempfile.TemporaryDirectory(prefix='thoughtecho-bench-') as tmp:
+        for size in sizes:
+            for alpha in (True, False):
+                work_dir = os.path.join(tmp, f'{size}-{"rgba" if alpha else "rgb"}')
+                os.makedirs(os.path.join(work_dir, 'res'))
+                source = os.path.join(work_dir, 'res', 'icon.png')
+                make_source(source, size, alpha)
+                for stage in ICON_STAGES:
+                    if stage in stages:
+                        runs = [run_stage(stage, work_dir, source, resample=resample) for _ in range(repeat)]
+                        record(stage, size, alpha, runs)
+
+        font_stages = [stage for stage in FONT_STAGES if stage in stages]
+        if font_stages:
+            work_dir = os.path.join(tmp, 'font')
+            os.makedirs(work_dir)
+            if 'subset' in font_stages and font is None:
+                from build_serif_subset import build_charset
+                font = os.path.join(work_dir, 'synthetic.ttf')
+                make_font(font, build_charset(True))
+            for stage in font_stages:
+                runs = [run_stage(stage, work_dir, font=font) for _ in range(repeat)]
+                record(stage, None, None, runs)
+
+    return results
+
+
+def compare(old_path, new_path):
+    """按 (阶段, 尺寸, 透明) 对齐两份结果，打印新/旧比值"""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    def index(report):
+        return {(r['stage'], r['size'], r['alpha']): r for r in report['results']}
+
+    old_index = index(old)
+    print(f"旧: {old['meta'].get('commit')}  新: {new['meta'].get('commit')}")
+    print(f"  {'阶段':36s} {'wall 新/旧':>12s} {'cpu 新/旧':>12s} {'RSS 新/旧':>12s}")
+    for key, entry in index(new).items():
+        base = old_index.get(key)
+        if base is None:
+            continue
+
+        def ratio(field):
+            if not base.get(field) or entry.get(field) is None:
+                return '         N/A'
+            return f"{entry[field] / base[field]:11.2f}x"
+
+        stage, size, alpha = key
+        label = stage + (f" {size}px {'RGBA' if alpha else 'RGB'}" if size else '')
+        print(f"  {label:36s} {ratio('wall_s')} {ratio('cpu_s')} {ratio('peak_rss_mb')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='资源生成脚本性能基准')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='合成源图边长，逗号分隔')
+    parser.add_argument('--repeat', type=int, default=1, help='每个阶段重复次数（取最小时间）')
+    parser.add_argument('--stages', default=None,
+                        help=f"只跑指定阶段，逗号分隔（{','.join(ICON_STAGES + FONT_STAGES)}）")
+    parser.add_argument('--font', default=None, help='子集化阶段使用的源字体，默认用合成字体')
+    parser.add_argument('--resample', choices=RESAMPLE_MODES, default=DEFAULT_RESAMPLE,
+                        help='ICO 与磁贴阶段的重采样模式')
+    parser.add_argument('-o', '--output', default=None,
+                        help='结果 JSON 路径，默认 .asset_cache/bench/<提交>.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='对比两份结果')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    stages = [s for s in args.stages.split(',') if s] if args.stages else None
+    unknown = [s for s in stages or [] if s not in ICON_STAGES + FONT_STAGES]
+    if unknown:
+        parser.error(f"不认识的阶段：{','.join(unknown)}（可选 {','.join(ICON_STAGES + FONT_STAGES)}）")
+    print("资源生成脚本性能基准")
+    print("-" * 70)
+    meta = _metadata()
+    meta['resample'] = args.resample
+    results = run_benchmarks(sizes, args.repeat, args.font, stages, args.resample)
+
+    output = args.output or os.path.join(
+        PROJECT_ROOT, '.asset_cache', 'bench', f"{(meta['commit'] or 'worktree')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ 结果已写入: {output}")
+    return 0 if all(r['ok'] for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+ARB 跨语言一致性检查
+以模板语言（l10n.yaml 的 template-arb-file）为准，逐个语言报告：
+
+    缺失      模板有、该语言没有的键——运行时回退到别的语言显示
+    多余      该语言有、模板没有的键——gen-l10n 不会生成，改了也不生效
+    参数不符  译文用了模板里没有的 {参数}——名字写错了，运行时不会被替换
+    漏用参数  模板的参数译文没用到——有时是有意省略，只提示不算失败
+    声明不符  模板消息用到的参数与 @键 里 placeholders 声明的不一致——生成的方法签名
+              按声明来，漏声明的参数类型不对、多声明的参数调用处白传（只检查模板，
+              gen-l10n 只读模板的元数据；没写 placeholders 的键由 gen-l10n 推断，不算）
+    语法错误  花括号不配对、参数名不合法等，gen-l10n 会直接失败
+
+解析结果按文件缓存（见 l10n_index），没改动的 ARB 不重新解析，
+适合挂在 pre-commit 上：多余、参数不符、声明不符、语法错误或 ARB 读不出来时退出码为 1；
+缺失是常态（de / es 只翻了一小部分），加 --strict 才算失败
+
+用法：
+    python3 scripts/check_l10n.py [--locale de] [--list-missing] [--strict]
+"""
+
+import argparse
+import sys
+import time
+
+from l10n_index import ArbFormatError, ArbIndex, default_arb_dir, template_locale
+
+# 每类问题默认最多列出的键数
+DEFAULT_LIMIT = 20
+
+
+def compare(template, target):
+    """返回 (缺失, 多余, 参数不符, 漏用参数)；后两项是 [(键, 参数列表)]"""
+    template_keys = template['keys']
+    target_keys = target['keys']
+    missing = [key for key in template_keys if key not in target_keys]
+    extra = [key for key in target_keys if key not in template_keys]
+    unknown_args = []
+    dropped_args = []
+    for key, args in target_keys.items():
+        want = template_keys.get(key)
+        if want is None or args == want:
+            continue
+        unknown = [arg for arg in args if arg not in want]
+        dropped = [arg for arg in want if arg not in args]
+        if unknown:
+            unknown_args.append((key, unknown))
+        if dropped:
+            dropped_args.append((key, dropped))
+    return missing, extra, unknown_args, dropped_args
+
+
+def check_declared(template):
+    """模板里写了 placeholders 的键，返回 [(键, 用到但没声明的, 声明了但没用到的)]"""
+    mismatched = []
+    for key, declared in template['declared'].items():
+        used = template['keys'].get(key)
+        if used is None or used == declared:
+            continue
+        undeclared = [arg for arg in used if arg not in declared]
+        unused = [arg for arg in declared if arg not in used]
+        if undeclared or unused:
+            mismatched.append((key, undeclared, unused))
+    return sorted(mismatched)
+
+
+def _describe_declared(key, undeclared, unused):
+    parts = []
+    if undeclared:
+        parts.append(f'用到了没声明的 {", ".join(undeclared)}')
+    if unused:
+        parts.append(f'声明了没用到的 {", ".join(unused)}')
+    return f'{key}：' + '；'.join(parts)
+
+
+def _print_keys(title, keys, limit):
+    if not keys:
+        return
+    print(f'  {title}（{len(keys)}）：')
+    for key in keys[:limit]:
+        print(f'    {key}')
+    if len(keys) > limit:
+        print(f'    ……另有 {len(keys) - limit} 个（--limit 0 列出全部）')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查各语言 ARB 与模板的缺失、多余与参数不符')
+    parser.add_argument('--arb-dir', default=None, help='ARB 目录（默认 lib/l10n）')
+    parser.add_argument('--template', default=None, help='模板语言（默认读 l10n.yaml）')
+    parser.add_argument('--locale', action='append', default=[], help='只检查这些语言，可重复')
+    parser.add_argument('--list-missing', action='store_true', help='同时列出缺失的键')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                        help=f'每类最多列出几个键，0 为不限（默认 {DEFAULT_LIMIT}）')
+    parser.add_argument('--strict', action='store_true', help='有缺失的键也返回失败')
+    parser.add_argument('--no-cache', action='store_true', help='忽略索引缓存，全部重新解析')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        index = ArbIndex.load(args.arb_dir or default_arb_dir(), use_cache=not args.no_cache)
+    except ArbFormatError as e:
+        print(f'✗ {e.path}: {e.message}')
+        sys.exit(1)
+    index.save()
+
+    base = args.template or template_locale()
+    if base not in index.locales:
+        print(f'✗ 找不到模板语言 {base} 的 ARB')
+        sys.exit(1)
+    template = index.locales[base]
+    limit = args.limit or sys.maxsize
+    locales = args.locale or sorted(index.locales)
+    unknown = [locale for locale in locales if locale not in index.locales]
+    if unknown:
+        print(f'✗ 没有这些语言的 ARB：{", ".join(unknown)}')
+        sys.exit(1)
+
+    print(f'{"语言":<8s}{"词条":>6s}{"缺失":>6s}{"多余":>6s}{"参数不符":>8s}{"漏用参数":>8s}'
+          f'{"声明不符":>8s}{"语法错误":>8s}{"覆盖率":>9s}')
+    failed = False
+    details = []
+    for locale in locales:
+        entry = index.locales[locale]
+        errors = sorted(entry['errors'].items())
+        if locale == base:
+            missing, extra, unknown_args, dropped_args = [], [], [], []
+            mismatched = check_declared(entry)
+        else:
+            missing, extra, unknown_args, dropped_args = compare(template, entry)
+            mismatched = []
+        covered = len(template['keys']) - len(missing)
+        ratio = covered / len(template['keys']) * 100 if template['keys'] else 100.0
+        mark = '*' if locale == base else ''
+        print(f'{locale + mark:<8s}{len(entry["keys"]):>6d}{len(missing):>6d}{len(extra):>6d}'
+              f'{len(unknown_args):>8d}{len(dropped_args):>8d}{len(mismatched):>8d}{len(errors):>8d}'
+              f'{ratio:>8.1f}%')
+
+        failed = (failed or bool(extra or unknown_args or mismatched or errors)
+                  or (args.strict and bool(missing)))
+        lines = []
+        if errors:
+            lines.append(('语法错误', [f'{key}：{message}' for key, message in errors]))
+        if unknown_args:
+            lines.append(('参数不符', [f'{key}：模板里没有 {", ".join(names)}'
+                                       for key, names in unknown_args]))
+        if mismatched:
+            lines.append(('声明不符', [_describe_declared(key, undeclared, unused)
+                                       for key, undeclared, unused in mismatched]))
+        if dropped_args:
+            lines.append(('漏用参数', [f'{key}：没有用到 {", ".join(names)}'
+                                       for key, names in dropped_args]))
+        if extra:
+            lines.append(('多余', extra))
+        if missing and (args.list_missing or args.locale):
+            lines.append(('缺失', missing))
+        if lines:
+            details.append((locale, lines))
+
+    for locale, lines in details:
+        print(f'\n{locale}:')
+        for title, keys in lines:
+            _print_keys(title, keys, limit)
+
+    elapsed = time.perf_counter() - start
+    print(f'\n* 模板语言；解析 {index.misses} 个文件，缓存命中 {index.hits} 个，用时 {elapsed * 1000:.0f}ms')
+    if failed:
+        print('✗ ARB 存在需要修正的问题')
+        sys.exit(1)
+    print('✓ ARB 一致性检查通过')
+
+
+if __name__ == '__main__':
+    main()
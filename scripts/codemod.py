@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+按规则文件批量改写 Dart 源码
+一份规则文件里可以有任意多条字面量 / 正则替换，对 lib/ 下的每个文件只扫描一遍：
+全部字面量（以及正则规则的 requires 预筛串）建成一个 Aho-Corasick 自动机，
+一次遍历找出所有匹配，按「最左、最长、不重叠」选出要替换的位置，一次拼出新内容；
+正则规则随后依次作用在结果上，requires 没出现的文件直接跳过这条正则
+
+文件分块交给进程池处理；内容真的变了才写回，先写临时文件再原子替换，
+换行符（CRLF / LF）和文件权限保持原样
+
+规则文件（JSON）：
+
+    {
+      "paths": ["lib"],
+      "exclude": ["lib/gen_l10n"],
+      "rules": [
+        {
+          "name": "copy-code-tooltip",
+          "find": "tooltip: _isCopied ? '已复制' : '复制代码',",
+          "replace": "tooltip: _isCopied ? l10n.copiedCode : l10n.copyCode,"
+        },
+        {
+          "name": "show-snackbar-text",
+          "regex": "SnackBar\\\\(content: Text\\\\('([^']*)'\\\\)\\\\)",
+          "replace": "SnackBar(content: Text(l10n.\\\\1))",
+          "requires": "SnackBar(",
+          "files": "lib/pages/*.dart"
+        }
+      ]
+    }
+
+  - "find"：字面量，原样替换；"regex"：Python 正则，replace 里可以用 \\1、\\g<name>；
+  - "files"：只作用于匹配这个 glob（或 glob 数组里任意一个）的文件（相对项目根目录，/ 分隔）；
+  - "lines"：{"文件": [[首行, 末行], ...]}，字面量规则在列出的文件里只替换起点落在这些行里的
+    匹配（行号从 1 开始，对应改写前的内容）；
+  - "requires"：正则规则的预筛字面量，文件原内容里没有它就不跑这条正则；
+  - "paths" / "exclude" 可省略，默认扫描 lib/、跳过生成的 lib/gen_l10n/；
+  - 规则文件也可以直接是规则数组。
+
+用法：
+    python3 scripts/codemod.py rules.json --dry-run      # 输出 unified diff 与每条规则的命中数
+    python3 scripts/codemod.py rules.json [--jobs N] [--path lib/pages]
+"""
+
+import argparse
+import bisect
+import difflib
+import fnmatch
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from l10n_index import get_project_root
+
+DEFAULT_PATHS = ('lib',)
+DEFAULT_EXCLUDE = ('lib/gen_l10n',)
+EXTENSIONS = ('.dart',)
+
+# 每个进程一次处理的文件数，太小时进程间通信的开销比扫描还大
+CHUNK_SIZE = 32
+
+_REGEX_FLAGS = {'i': re.IGNORECASE, 'm': re.MULTILINE, 's': re.DOTALL, 'x': re.VERBOSE}
+
+
+class CodemodError(ValueError):
+    """规则文件不合法。"""
+
+
+class AhoCorasick:
+    """
+    多模式字面量匹配自动机
+
+    用法：
+        automaton = AhoCorasick(['foo', 'oba'])
+        automaton.find_all('foobar')  → [(起点, 终点, 模式编号)]（按终点排序，可能重叠）
+    """
+
+    def __init__(self, patterns):
+        self.lengths = [len(p) for p in patterns]
+        goto = [{}]
+        output = [[]]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    output.append([])
+                state = nxt
+            output[state].append(index)
+
+        # 广度优先求失配指针，并把失配状态的输出并进来（后缀也是匹配）
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                output[nxt] = output[nxt] + output[fail[nxt]]
+        self.goto = goto
+        self.fail = fail
+        self.output = [tuple(o) for o in output]
+
+    def find_all(self, text):
+        goto, fail, output, lengths = self.goto, self.fail, self.output, self.lengths
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                end = i + 1
+                matches.extend((end - lengths[index], end, index) for index in output[state])
+        return matches
+
+
+class Rule:
+    def __init__(self, spec, position):
+        if not isinstance(spec, dict):
+            raise CodemodError(f'第 {position} 条规则应该是对象')
+        self.name = spec.get('name') or f'rule-{position}'
+        self.files = spec.get('files')
+        if isinstance(self.files, str):
+            self.files = [self.files]
+        if self.files is not None and (not isinstance(self.files, list)
+                                       or not all(isinstance(f, str) for f in self.files)):
+            raise CodemodError(f'{self.name}：files 应该是 glob 字符串或字符串数组')
+        self.lines = spec.get('lines')
+        if self.lines is not None and not (
+                isinstance(self.lines, dict)
+                and all(isinstance(ranges, list) and all(_is_range(r) for r in ranges)
+                        for ranges in self.lines.values())):
+            raise CodemodError(f'{self.name}：lines 应该是 {{文件: [[首行, 末行], ...]}}')
+        self.replace = spec.get('replace')
+        if not isinstance(self.replace, str):
+            raise CodemodError(f'{self.name}：缺少 replace')
+        self.find = spec.get('find')
+        self.requires = spec.get('requires')
+        regex = spec.get('regex')
+        if (self.find is None) == (regex is None):
+            raise CodemodError(f'{self.name}：find 与 regex 必须且只能写一个')
+        if self.find is not None and (not isinstance(self.find, str) or not self.find):
+            raise CodemodError(f'{self.name}：find 不能为空')
+        if self.lines is not None and regex is not None:
+            raise CodemodError(f'{self.name}：lines 只用于字面量规则')
+        if self.requires is not None and (regex is None or not isinstance(self.requires, str)
+                                          or not self.requires):
+            raise CodemodError(f'{self.name}：requires 只用于正则规则，且必须是非空字符串')
+        self.pattern = None
+        if regex is not None:
+            flags = 0
+            for flag in spec.get('flags', ''):
+                if flag not in _REGEX_FLAGS:
+                    raise CodemodError(f'{self.name}：不认识的正则标志 {flag!r}')
+                flags |= _REGEX_FLAGS[flag]
+            try:
+                self.pattern = re.compile(regex, flags)
+            except re.error as e:
+                raise CodemodError(f'{self.name}：正则有误：{e}') from None
+
+    def applies_to(self, rel):
+        return self.files is None or any(fnmatch.fnmatchcase(rel, pattern) for pattern in self.files)
+
+    def covers_line(self, rel, line):
+        if self.lines is None or rel not in self.lines:
+            return True
+        return any(first <= line <= last for first, last in self.lines[rel])
+
+
+def _is_range(value):
+    return (isinstance(value, list) and len(value) == 2
+            and all(isinstance(n, int) and not isinstance(n, bool) for n in value))
+
+
+class Codemod:
+    """
+    一份规则文件编译后的结果
+
+    用法：
+        codemod = Codemod.from_spec(json.load(f))
+        new_text, hits = codemod.apply(text, 'lib/main.dart')   → hits: {规则名: 次数}
+    """
+
+    def __init__(self, rules, paths=DEFAULT_PATHS, exclude=DEFAULT_EXCLUDE):
+        self.rules = rules
+        self.paths = tuple(paths)
+        self.exclude = tuple(exclude)
+        names = [rule.name for rule in rules]
+        duplicated = sorted({name for name in names if names.count(name) > 1})
+        if duplicated:
+            raise CodemodError(f'规则名重复：{", ".join(duplicated)}')
+
+        # 自动机里的模式：先是全部替换字面量，再是正则规则的预筛串
+        self.literals = [rule for rule in rules if rule.find is not None]
+        seen = {}
+        for rule in self.literals:
+            if rule.find in seen:
+                raise CodemodError(f'{seen[rule.find]} 与 {rule.name} 的 find 相同')
+            seen[rule.find] = rule.name
+        self.regexes = [rule for rule in rules if rule.pattern is not None]
+        probes = sorted({rule.requires for rule in self.regexes if rule.requires})
+        self.probe_index = {probe: len(self.literals) + i for i, probe in enumerate(probes)}
+        patterns = [rule.find for rule in self.literals] + probes
+        self.automaton = AhoCorasick(patterns) if patterns else None
+
+    @classmethod
+    def from_spec(cls, spec):
+        if isinstance(spec, list):
+            spec = {'rules': spec}
+        if not isinstance(spec, dict) or not isinstance(spec.get('rules'), list) or not spec['rules']:
+            raise CodemodError('规则文件应该是规则数组，或带 "rules" 数组的对象')
+        rules = [Rule(item, i + 1) for i, item in enumerate(spec['rules'])]
+        return cls(rules, spec.get('paths', DEFAULT_PATHS), spec.get('exclude', DEFAULT_EXCLUDE))
+
+    def apply(self, text, rel):
+        hits = {}
+        found_probes = set()
+        if self.automaton is not None:
+            chosen = []
+            last_end = 0
+            n_literals = len(self.literals)
+            newlines = None
+            # 同一起点取最长的；选中一个之后，与它重叠的都作废
+            for start, end, index in sorted(self.automaton.find_all(text), key=lambda m: (m[0], -m[1])):
+                if index >= n_literals:
+                    found_probes.add(index)
+                    continue
+                rule = self.literals[index]
+                if start < last_end or not rule.applies_to(rel):
+                    continue
+                if rule.lines is not None and rel in rule.lines:
+                    if newlines is None:
+                        newlines = [m.end() - 1 for m in re.finditer('\n', text)]
+                    if not rule.covers_line(rel, bisect.bisect_left(newlines, start) + 1):
+                        continue
+                chosen.append((start, end, rule))
+                last_end = end
+            if chosen:
+                parts = []
+                pos = 0
+                for start, end, rule in chosen:
+                    parts.append(text[pos:start])
+                    parts.append(rule.replace)
+                    pos = end
+                    hits[rule.name] = hits.get(rule.name, 0) + 1
+                parts.append(text[pos:])
+                text = ''.join(parts)
+
+        for rule in self.regexes:
+            if rule.requires and self.probe_index[rule.requires] not in found_probes:
+                continue
+            if not rule.applies_to(rel):
+                continue
+            try:
+                text, count = rule.pattern.subn(rule.replace, text)
+            except (re.error, IndexError) as e:
+                raise CodemodError(f'{rule.name}：replace 有误：{e}') from None
+            if count:
+                hits[rule.name] = hits.get(rule.name, 0) + count
+        return text, hits
+
+    def source_files(self, project_root, paths=None):
+        excluded = tuple(os.path.join(project_root, d) for d in self.exclude)
+        for base in paths or self.paths:
+            root = os.path.join(project_root, base)
+            if os.path.isfile(root):
+                yield root
+                continue
+            for dirpath, dirnames, filenames in os.walk(root):
+                if dirpath.startswith(excluded):
+                    dirnames[:] = []
+                    continue
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if name.endswith(EXTENSIONS):
+                        yield os.path.join(dirpath, name)
+
+
+# 进程池里每个工作进程各自编译一份规则，只在初始化时传一次
+_worker = None
+
+
+def _init_worker(spec, project_root, dry_run):
+    global _worker
+    _worker = (Codemod.from_spec(spec), project_root, dry_run)
+
+
+def _process_chunk(paths):
+    codemod, project_root, dry_run = _worker
+    results = []
+    for path in paths:
+        rel = os.path.relpath(path, project_root).replace(os.sep, '/')
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            original = f.read()
+        text, hits = codemod.apply(original, rel)
+        if text == original:
+            continue
+        diff = None
+        if dry_run:
+            diff = ''.join(difflib.unified_diff(
+                original.splitlines(keepends=True), text.splitlines(keepends=True),
+                fromfile=f'a/{rel}', tofile=f'b/{rel}'))
+        else:
+            _write_atomic(path, text)
+        results.append((rel, hits, diff))
+    return results
+
+
+def _write_atomic(path, content):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    shutil.copymode(path, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def run(spec, project_root=None, paths=None, jobs=None, dry_run=False):
+    """对规则文件内容 [spec] 跑一遍，返回 (Codemod, 扫描文件数, [(相对路径, 命中数, diff)])"""
+    project_root = project_root or get_project_root()
+    codemod = Codemod.from_spec(spec)
+    files = list(codemod.source_files(project_root, paths))
+    chunks = [files[i:i + CHUNK_SIZE] for i in range(0, len(files), CHUNK_SIZE)]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(chunks) <= 1:
+        _init_worker(spec, project_root, dry_run)
+        results = [item for chunk in chunks for item in _process_chunk(chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(chunks)), initializer=_init_worker,
+                                 initargs=(spec, project_root, dry_run)) as executor:
+            results = [item for result in executor.map(_process_chunk, chunks) for item in result]
+    return codemod, len(files), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按规则文件批量改写 Dart 源码')
+    parser.add_argument('rules', help='规则文件（JSON），- 表示从标准输入读')
+    parser.add_argument('--path', action='append', default=[],
+                        help='只处理这些目录或文件（相对项目根目录），可重复；默认用规则文件的 paths')
+    parser.add_argument('--jobs', type=int, default=None, help='进程数（默认 CPU 核数）')
+    parser.add_argument('--dry-run', action='store_true', help='不写文件，输出 unified diff')
+    args = parser.parse_args()
+
+    try:
+        if args.rules == '-':
+            spec = json.load(sys.stdin)
+        else:
+            with open(args.rules, 'r', encoding='utf-8') as f:
+                spec = json.load(f)
+        start = time.perf_counter()
+        codemod, scanned, results = run(spec, paths=args.path or None, jobs=args.jobs,
+                                        dry_run=args.dry_run)
+    except (OSError, ValueError) as e:
+        print(f'✗ {e}')
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    totals = {rule.name: 0 for rule in codemod.rules}
+    for rel, hits, diff in results:
+        for name, count in hits.items():
+            totals[name] += count
+        if diff:
+            sys.stdout.write(diff)
+
+    verb = '将修改' if args.dry_run else '已修改'
+    print(f'\n扫描 {scanned} 个文件，{verb} {len(results)} 个，用时 {elapsed:.2f}s')
+    width = max(len(name) for name in totals)
+    for name, count in totals.items():
+        mark = '✓' if count else '⚠'
+        print(f'  {mark} {name:<{width}s}  {count}')
+
+
+if __name__ == '__main__':
+    main()
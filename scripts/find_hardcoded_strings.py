@@ -0,0 +1,864 @@
+#!/usr/bin/env python3
+"""
+查找 Dart 代码里硬编码的界面文案
+逐个文件切分 Dart 字符串字面量（跳过 // 与可嵌套的 /* */ 注释，识别 r'' 原始串、
+''' 多行串、相邻字面量拼接以及 $name / ${表达式} 插值），把含中日韩文字的字面量
+按所在位置分类：
+
+    ui      界面文案——默认只报告这一类
+    error   throw / XxxException(...) / XxxError(...) 的消息
+    log     logDebug、AppLogger.e、debugPrint 等日志调用的参数
+    code    RegExp、Key、DateFormat、contains / split 等的参数，== / case 比较的值，map 的键，
+            static const / 顶层 const 声明里的值，文件名——是数据不是文案
+    long    多行的长文本（AI 提示词、内置说明等），一般不放进 ARB
+
+加 --latin 时，Text(...) 以及 tooltip: / title: / hintText: 等参数里的英文短语也算
+
+每个文件的结果按 mtime 与大小缓存在 <项目根>/.asset_cache/l10n_literals.json，
+变了再比内容哈希，内容没变（touch、切分支再切回来）也不重新切分
+
+结果可以直接喂给后面两步：
+    --out   update_l10n.py 的改动清单：每条文案一个建议的键（模板语言的原文、
+            插值换成 {占位符}，类型为 Object，与原来的字符串插值一致）；
+            模板里已有同样文案的直接复用已有的键，不进清单
+    --rules codemod.py 的规则文件：把字面量换成 AppLocalizations.of(context).键
+            （带参数时为 .键(表达式, ...)）。每条规则都用 files / lines 限定到具体的
+            函数或成员上：所在函数（或外层函数）有 BuildContext context 参数，不在 const
+            表达式里，同一个成员里这个字面量也没有日志、比较等非文案用途；
+            字段与顶层变量的初始化表达式、const 里的以及其余出现处列为需要手工改写
+
+函数与成员的范围由花括号、括号与 => 粗略还原，不是完整的 Dart 语法分析；规则里的行号
+对应生成时的源码，改过代码要重新生成。建议的键名由文件名和参数名 / 调用名拼成，
+应用前值得改成更有意义的名字
+
+用法：
+    python3 scripts/find_hardcoded_strings.py [--kinds ui,error] [--latin] [--path lib/pages]
+    python3 scripts/find_hardcoded_strings.py --out changes.json --rules rules.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from asset_cache import CACHE_DIR_NAME
+from l10n_index import default_arb_dir, get_project_root, template_locale
+
+LITERALS_NAME = 'l10n_literals.json'
+
+# 索引格式版本，切分或分类规则变化时递增，旧缓存整体作废
+LITERALS_VERSION = 3
+
+SCAN_DIRS = ('lib',)
+EXCLUDE_DIRS = ('lib/gen_l10n',)
+
+KINDS = ('ui', 'error', 'log', 'code', 'long')
+DEFAULT_KINDS = ('ui',)
+DEFAULT_ACCESSOR = 'AppLocalizations.of(context)'
+
+# 每个文件默认最多列出的字面量数
+DEFAULT_LIMIT = 20
+
+# 平假名、片假名、CJK 扩展 A、CJK 统一汉字、谚文音节、兼容汉字、全角标点与字母
+_CJK = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+_LATIN_PHRASE = re.compile(r'[A-Za-z]{2,}[,.!?]?\s+[A-Za-z]{2,}')
+
+# 代码里要关注的记号：注释、花括号（插值嵌套）、字符串开头
+_CODE = re.compile(r"""//[^\n]*|/\*|[{}]|((?<![\w$])r)?('''|\"\"\"|'|")""")
+_COMMENT = re.compile(r'/\*|\*/')
+_NEXT_STRING = re.compile(r"""\s*((?<![\w$])r)?('''|\"\"\"|'|")""")
+_STRING_SPECIAL = {
+    quote: re.compile(r'\\(?:u\{[0-9A-Fa-f]+\}|u[0-9A-Fa-f]{4}|x[0-9A-Fa-f]{2}|.)|\$\{|\$[A-Za-z_]\w*|'
+                      + re.escape(quote) + ('' if len(quote) == 3 else r'|\n'), re.S)
+    for quote in ("'", '"', "'''", '"""')
+}
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v'}
+
+# 命名参数或 map 的键：title: '...'、'message': '...'
+_NAMED_ARG = re.compile(r'''(?<![\w'"])['"]?([A-Za-z_]\w*)['"]?\s*:\s*$''', re.A)
+_ARG_NAME = re.compile(r'''\s*['"]?([A-Za-z_]\w*)['"]?\s*:(?!:)''', re.A)
+_CALLEE = re.compile(r'([A-Za-z_][\w$]*(?:\s*\.\s*[A-Za-z_][\w$]*)*)\s*(?:<[^()]*>)?\s*$')
+_COMPARISON = re.compile(r'(?:[=!]=|\bcase)\s*$')
+_MAP_KEY = re.compile(r'\s*:')
+_THROW = re.compile(r'\bthrow\s*$')
+_LOG_CALL = re.compile(r'^(?:log[A-Z]\w*|log|debugPrint|print)$')
+_LOG_RECEIVERS = ('AppLogger.', 'logger.', 'developer.', 'UnifiedLogService.')
+# LogEntry(...)、AICardProcessingLog(...)：名字里带 Log 的构造也是日志（Login 不算）
+_LOG_TYPE = re.compile(r'Log(?![a-z])')
+_CODE_CALLS = {'RegExp', 'Key', 'ValueKey', 'ObjectKey', 'PageStorageKey', 'GlobalObjectKey',
+               'DateFormat', 'assert', 'pragma', 'Uri.parse', 'Uri.tryParse', 'File', 'Directory',
+               'contains', 'startsWith', 'endsWith', 'indexOf', 'lastIndexOf', 'replaceAll',
+               'replaceFirst', 'split'}
+# 以扩展名结尾的，或是带插值、传给 fileName: / path: / customName: 这类参数的，是文件名或路径：
+# '心迹_Card_${...}.png'
+_FILE_NAME = re.compile(r'\.(?:png|jpe?g|gif|webp|bmp|svg|ico|json|txt|md|csv|pdf|zip|db|log|html?'
+                        r'|mp[34]|m4a|wav|ttf|otf)$', re.I)
+_FILE_ARG = re.compile(r'(?:[Ff]ile|[Pp]ath|[Dd]ir|[Dd]irectory|[Nn]ame)$')
+# 这些根组件在 Localizations 之上，参数里拿不到本地化文案（title 要改用 onGenerateTitle）
+_APP_CALLS = {'MaterialApp', 'MaterialApp.router', 'CupertinoApp', 'CupertinoApp.router', 'WidgetsApp'}
+_UI_CALLS = {'Text', 'SelectableText', 'Tooltip', 'TextSpan', 'Tab'}
+_UI_ARGS = {'tooltip', 'label', 'labelText', 'hintText', 'helperText', 'errorText', 'title',
+            'subtitle', 'semanticLabel', 'semanticsLabel', 'message', 'content', 'text',
+            'confirmText', 'cancelText', 'placeholder'}
+_DOTTED = re.compile(r'[A-Za-z_]\w*(?:\s*[?!]?\.\s*[A-Za-z_]\w*)*')
+
+# 向前找所在调用时最多回看的字符数
+_CONTEXT_WINDOW = 2000
+
+# 还原代码结构用到的记号（注释和字面量已经换成空格）
+_STRUCTURE = re.compile(r'=>|[()\[\]{};,]')
+_FUNCTION_TAIL = re.compile(r'\)\s*(?:async\*?|sync\*)?\s*$')
+_CONTROL = re.compile(r'\b(?:if|for|while|switch|catch|on)\s*$')
+_BLOCK_KEYWORD = re.compile(r'(?:^|[\s;{}:])(?:else|try|finally|do)\s*$|[;{}:]\s*$|^\s*$')
+_GETTER = re.compile(r'\bget\s+[A-Za-z_$][\w$]*\s*(?:async\*?|sync\*)?\s*$')
+_TYPE_HEADER = re.compile(r'(?:^|\s)(?:class|mixin|extension|enum)\b')
+_CONST_OPEN = re.compile(r'\bconst\s*(?:[A-Za-z_$][\w$]*(?:\s*\.\s*[A-Za-z_$][\w$]*)*)?\s*'
+                         r'(?:<[^;{}()]*>)?\s*$')
+_CONST_DECL = re.compile(r'\s*(?:@[\w$.]+\s*(?:\([^;{}]*\))?\s*)*(?:(?:static|late|external)\s+)*const\b')
+_CONTEXT_PARAM = re.compile(r'[,({\[]\s*(?:required\s+)?(?:BuildContext\??\s+)?context\s*[,)}\]]')
+_NON_SPACE = re.compile(r'\S')
+
+# 只回看这么多字符来判断括号前面是什么
+_HEADER_WINDOW = 200
+
+# 语句容器：里面按 ; 分语句；其中 top / type 里的语句就是成员
+_STATEMENTS = ('top', 'type', 'function', 'block')
+
+# 超过这么多行或这么长的字面量归为 long
+LONG_LINES = 4
+LONG_CHARS = 400
+
+# 列表里每条字面量最多显示的字符数
+PREVIEW_CHARS = 60
+
+
+class _Literal:
+    __slots__ = ('start', 'end', 'parts')
+
+    def __init__(self, start):
+        self.start = start
+        self.end = start
+        self.parts = []   # [(是否插值, 文本或表达式)]
+
+
+def _skip_block_comment(text, pos):
+    """Dart 的块注释可以嵌套；pos 指向 /* 之后，返回 */ 之后的位置"""
+    depth = 1
+    while depth:
+        m = _COMMENT.search(text, pos)
+        if not m:
+            return len(text)
+        depth += 1 if m.group(0) == '/*' else -1
+        pos = m.end()
+    return pos
+
+
+def _scan_code(text, pos, literals, nested, comments=None):
+    """
+    从 pos 开始扫描代码；nested 时是 ${...} 插值里的表达式，遇到配对的 } 返回它之后的位置
+    只有最外层代码里的字面量记进 literals，插值表达式里的字符串算作表达式的一部分；
+    给了 comments 时把注释的 (起点, 终点) 也记下来
+    """
+    depth = 0
+    n = len(text)
+    while pos < n:
+        m = _CODE.search(text, pos)
+        if not m:
+            return n
+        token = m.group(0)
+        if token.startswith('//'):
+            pos = m.end()
+            if comments is not None:
+                comments.append((m.start(), pos))
+        elif token == '/*':
+            pos = _skip_block_comment(text, m.end())
+            if comments is not None:
+                comments.append((m.start(), pos))
+        elif token == '{':
+            depth += 1
+            pos = m.end()
+        elif token == '}':
+            pos = m.end()
+            if depth == 0 and nested:
+                return pos
+            depth = max(0, depth - 1)
+        else:
+            literal = _Literal(m.start())
+            pos = _scan_string(text, m.end(), m.group(2), bool(m.group(1)), literal)
+            # 相邻的字面量（'a' 'b'）在 Dart 里是一个字符串
+            while True:
+                m = _NEXT_STRING.match(text, pos)
+                if not m:
+                    break
+                pos = _scan_string(text, m.end(), m.group(2), bool(m.group(1)), literal)
+            literal.end = pos
+            if not nested:
+                literals.append(literal)
+    return pos
+
+
+def _scan_string(text, pos, quote, raw, literal):
+    """pos 指向开引号之后，把内容追加到 literal.parts，返回闭引号之后的位置"""
+    parts = literal.parts
+    if raw:
+        end = text.find(quote, pos)
+        if len(quote) == 1:
+            newline = text.find('\n', pos)
+            if newline != -1 and (end == -1 or newline < end):
+                end = newline
+        if end == -1:
+            end = len(text)
+        parts.append((False, text[pos:end]))
+        return min(len(text), end + len(quote))
+
+    special = _STRING_SPECIAL[quote]
+    while True:
+        m = special.search(text, pos)
+        if not m:
+            parts.append((False, text[pos:]))
+            return len(text)
+        if m.start() > pos:
+            parts.append((False, text[pos:m.start()]))
+        token = m.group(0)
+        if token == quote:
+            return m.end()
+        if token == '\n':   # 单行字符串没闭合：到行尾为止
+            return m.end()
+        if token == '${':
+            end = _scan_code(text, m.end(), [], nested=True)
+            parts.append((True, text[m.end():end - 1].strip()))
+            pos = end
+        elif token[0] == '$':
+            parts.append((True, token[1:]))
+            pos = m.end()
+        else:
+            parts.append((False, _unescape(token)))
+            pos = m.end()
+
+
+def _unescape(token):
+    ch = token[1]
+    if ch == 'u':
+        return chr(int(token[3:-1] if token[2] == '{' else token[2:], 16))
+    if ch == 'x' and len(token) == 4:
+        return chr(int(token[2:], 16))
+    if ch == '\n':
+        return ''
+    return _ESCAPES.get(ch, ch)
+
+
+class _Scope:
+    __slots__ = ('kind', 'open', 'const', 'context', 'boundary', 'ends')
+
+    def __init__(self, kind, open_pos, const=False, context=False):
+        self.kind = kind
+        self.open = open_pos
+        self.const = const
+        self.context = context
+        self.boundary = open_pos + 1   # 当前语句的起点
+        self.ends = []                 # 各条语句结束的位置
+
+
+def _mask(text, spans):
+    """把注释和字面量换成空格（保留换行），只剩代码结构"""
+    chunks = []
+    pos = 0
+    for start, end in sorted(spans):
+        if start < pos:
+            continue
+        chunks.append(text[pos:start])
+        chunks.append(re.sub(r'[^\n]', ' ', text[start:end]))
+        pos = end
+    chunks.append(text[pos:])
+    return ''.join(chunks)
+
+
+def _structure(masked, starts):
+    """
+    按花括号、括号与 => 粗略还原代码结构，对 starts 里的每个位置返回
+    {'scope', 'constant', 'member': (起点, 终点)}；scope：
+        const    在 const 表达式、const 声明或参数默认值里
+        static   不在任何函数体里（字段、顶层变量、枚举值的初始化表达式）
+        context  所在函数或外层函数有 context 参数（BuildContext context、builder 的 (context)）
+        none     在函数体里，但拿不到 context
+    constant 表示在 static const / 顶层 const 声明里；member 是所在的类成员或顶层声明
+    """
+    stack = [_Scope('top', -1)]
+    params = set()          # 函数参数列表的 ( 位置
+    last_paren = None       # 最近闭合的 ( ) 的位置
+    found = []
+    pending = iter(sorted(starts))
+    next_start = next(pending, None)
+
+    def statements():
+        return next(scope for scope in reversed(stack) if scope.kind in _STATEMENTS)
+
+    def snapshot(start):
+        container = statements()
+        member = next(scope for scope in reversed(stack) if scope.kind in ('top', 'type'))
+        declared = _CONST_DECL.match(masked, container.boundary, start)
+        functions = [scope for scope in stack if scope.kind in ('function', 'arrow')]
+        found.append({
+            'start': start,
+            'const': bool(declared) or any(scope.const for scope in stack),
+            'constant': bool(declared) and container.kind in ('top', 'type'),
+            'in_function': bool(functions),
+            'context': any(scope.context for scope in functions),
+            'parens': [scope.open for scope in stack if scope.kind == '('],
+            'member': (member, member.boundary),
+        })
+
+    def close_arrows():
+        while stack[-1].kind in ('arrow', 'arm'):
+            stack.pop()
+
+    def end_statement(pos):
+        scope = stack[-1]
+        if scope.kind in _STATEMENTS:
+            scope.boundary = pos
+            scope.ends.append(pos)
+
+    def function_params(pos):
+        """pos 前面是不是 (参数) [async]，是的话返回 ( ) 的位置"""
+        tail = _FUNCTION_TAIL.search(masked, max(0, pos - _HEADER_WINDOW), pos)
+        if tail and last_paren and last_paren[1] == tail.start():
+            return last_paren
+        return None
+
+    for m in _STRUCTURE.finditer(masked):
+        pos = m.start()
+        while next_start is not None and next_start < pos:
+            snapshot(next_start)
+            next_start = next(pending, None)
+        token = m.group(0)
+        window = max(0, pos - _HEADER_WINDOW)
+        if token == '(':
+            stack.append(_Scope('(', pos, bool(_CONST_OPEN.search(masked, window, pos))))
+        elif token == '[':
+            stack.append(_Scope('[', pos, bool(_CONST_OPEN.search(masked, window, pos))))
+        elif token == '{':
+            container = stack[-1]
+            header = masked[max(container.boundary, window):pos]
+            paren = function_params(pos)
+            if paren and not _CONTROL.search(masked, max(0, paren[0] - 20), paren[0]):
+                params.add(paren[0])
+                scope = _Scope('function', pos,
+                               context=bool(_CONTEXT_PARAM.search(masked, paren[0], paren[1] + 1)))
+            elif paren or _GETTER.search(header):
+                scope = _Scope('block' if paren else 'function', pos)
+            elif container.kind == 'top' and _TYPE_HEADER.search(header):
+                scope = _Scope('type', pos)
+            elif container.kind == 'type' and '=' not in header:
+                scope = _Scope('function', pos)     # 构造函数的初始化列表之后等
+            elif container.kind in _STATEMENTS and _BLOCK_KEYWORD.search(header):
+                scope = _Scope('block', pos)
+            else:
+                scope = _Scope('map', pos, bool(_CONST_OPEN.search(masked, window, pos)))
+            stack.append(scope)
+        elif token == '=>':
+            paren = function_params(pos)
+            if paren:
+                params.add(paren[0])
+                stack.append(_Scope('arrow', pos,
+                                    context=bool(_CONTEXT_PARAM.search(masked, paren[0], paren[1] + 1))))
+            elif _GETTER.search(masked, window, pos):
+                stack.append(_Scope('arrow', pos))
+            else:
+                stack.append(_Scope('arm', pos))     # switch 表达式的分支
+        elif token in ';,':
+            close_arrows()
+            if token == ';':
+                end_statement(m.end())
+        else:
+            close_arrows()
+            if len(stack) == 1:
+                continue                             # 括号不配对：忽略多出来的
+            scope = stack.pop()
+            if token == ')':
+                last_paren = (scope.open, pos)
+            elif token == '}':
+                scope.ends.append(pos)
+                if scope.kind in _STATEMENTS:
+                    end_statement(m.end())
+    while next_start is not None:
+        snapshot(next_start)
+        next_start = next(pending, None)
+
+    results = []
+    for item in found:
+        member, first = item['member']
+        last = next((end for end in member.ends if end > item['start']), len(masked))
+        first = _NON_SPACE.search(masked, first, last)
+        const = item['const'] or any(open_pos in params for open_pos in item['parens'])
+        if const:
+            scope = 'const'
+        elif not item['in_function']:
+            scope = 'static'
+        else:
+            scope = 'context' if item['context'] else 'none'
+        results.append({'scope': scope, 'constant': item['constant'],
+                        'member': (first.start() if first else item['start'], last)})
+    return results
+
+
+def _context(text, start, end):
+    """返回 (所在调用, 直接的命名参数, 前面的记号) 用来给字面量分类、起键名"""
+    before = text[max(0, start - 120):start]
+    named = _NAMED_ARG.search(before)
+    arg = named.group(1) if named and not before[:named.start()].rstrip().endswith('?') else None
+    if _COMPARISON.search(before):
+        return None, arg, 'compare'
+    # 后面紧跟 : 的是 map 的键（c ? '是' : '否' 的前一个分支除外）
+    if _MAP_KEY.match(text, end) and not before.rstrip().endswith('?'):
+        return None, arg, 'key'
+    if _THROW.search(before):
+        return None, arg, 'throw'
+
+    depth = 0
+    lower = max(0, start - _CONTEXT_WINDOW)
+    arg_start = None
+    i = start - 1
+    while i >= lower:
+        ch = text[i]
+        if ch in ')]}':
+            depth += 1
+        elif ch == ',' and depth == 0 and arg_start is None:
+            arg_start = i + 1
+        elif ch in '([{':
+            if depth == 0:
+                if ch != '(':
+                    return None, arg, None
+                if arg is None:
+                    # tooltip: copied ? '已复制' : '复制代码'：参数名在这个实参的开头
+                    named = _ARG_NAME.match(text, arg_start or i + 1, start)
+                    arg = named and named.group(1)
+                callee = _CALLEE.search(text, max(0, i - 120), i)
+                if callee:
+                    name = re.sub(r'\s+', '', callee.group(1))
+                    before_callee = text[max(0, callee.start() - 10):callee.start()]
+                    return name, arg, 'throw' if _THROW.search(before_callee) else None
+                return None, arg, None
+            depth -= 1
+        elif ch == ';' and depth == 0:
+            return None, arg, None
+        i -= 1
+    return None, arg, None
+
+
+def _classify(call, arg, previous, plain, constant=False, interpolated=False):
+    if plain.count('\n') >= LONG_LINES or len(plain) > LONG_CHARS:
+        return 'long'
+    if previous in ('compare', 'key') or constant or _FILE_NAME.search(plain.rstrip()):
+        return 'code'
+    if interpolated and arg and _FILE_ARG.search(arg):
+        return 'code'
+    if call:
+        receiver, _, last = call.rpartition('.')
+        # logService.error(...)、_logger.w(...)：接收者名字里带 log 的都算日志
+        if (_LOG_CALL.match(last) or call.startswith(_LOG_RECEIVERS) or 'log' in receiver.lower()
+                or _LOG_TYPE.search(last)):
+            return 'log'
+        if call in _CODE_CALLS or last in _CODE_CALLS:
+            return 'code'
+        if previous == 'throw' or last.endswith(('Exception', 'Error')):
+            return 'error'
+    elif previous == 'throw':
+        return 'error'
+    return 'ui'
+
+
+def _argument_name(expr):
+    """插值表达式对应的占位符名：$count → count，${note.title} → title，其余为 value"""
+    if _DOTTED.fullmatch(expr):
+        name = re.split(r'[?!]?\.', expr)[-1].strip().lstrip('_')
+        if name:
+            return name
+    return 'value'
+
+
+def _message(parts):
+    """把字面量的各段拼成 ARB 消息，返回 (消息, [(占位符, 表达式)], 是否含花括号)"""
+    args = []
+    names = {}
+    chunks = []
+    braces = False
+    for is_expr, value in parts:
+        if not is_expr:
+            braces = braces or '{' in value or '}' in value
+            chunks.append(value)
+            continue
+        name = names.get(value)
+        if name is None:
+            base = name = _argument_name(value)
+            taken = {n for n, _ in args}
+            suffix = 2
+            while name in taken:
+                name = f'{base}{suffix}'
+                suffix += 1
+            names[value] = name
+            args.append((name, value))
+        chunks.append('{' + name + '}')
+    return ''.join(chunks), args, braces
+
+
+def scan_source(text):
+    """
+    切分一个 Dart 文件的内容，返回含中日韩文字或英文短语的字面量（可 JSON 序列化）
+    scope 见 _structure，另有 app：MaterialApp 等根组件的参数；
+    member 是所在类成员或顶层声明的 [首行, 末行]
+    """
+    literals = []
+    comments = []
+    _scan_code(text, 0, literals, nested=False, comments=comments)
+    picked = []
+    for literal in literals:
+        plain = ''.join(value for is_expr, value in literal.parts if not is_expr)
+        if _CJK.search(plain):
+            picked.append((literal, plain, 'cjk'))
+        elif _LATIN_PHRASE.search(plain):
+            picked.append((literal, plain, 'latin'))
+    if not picked:
+        return []
+    masked = _mask(text, comments + [(literal.start, literal.end) for literal in literals])
+    structure = _structure(masked, [literal.start for literal, _, _ in picked])
+
+    found = []
+    line = 1
+    line_pos = 0
+    for (literal, plain, script), place in zip(picked, structure):
+        line += text.count('\n', line_pos, literal.start)
+        line_pos = literal.start
+        first, last = place['member']
+        call, arg, previous = _context(text, literal.start, literal.end)
+        message, args, braces = _message(literal.parts)
+        found.append({
+            'line': line,
+            'source': text[literal.start:literal.end],
+            'message': message,
+            'args': args,
+            'braces': braces,
+            'script': script,
+            'kind': _classify(call, arg, previous, plain, place['constant'], bool(args)),
+            'call': call,
+            'arg': arg,
+            'scope': 'app' if call in _APP_CALLS and place['scope'] == 'context' else place['scope'],
+            'member': [line - text.count('\n', first, literal.start),
+                       line + text.count('\n', literal.start, max(literal.start, last))],
+        })
+    return found
+
+
+def _wanted(literal, kinds, latin):
+    if literal['kind'] not in kinds:
+        return False
+    if literal['script'] == 'cjk':
+        return True
+    # 英文只看明确是界面文字的位置，避免把标识符、路径之类当成文案
+    return latin and (literal['arg'] in _UI_ARGS or (literal['call'] or '').rsplit('.', 1)[-1] in _UI_CALLS)
+
+
+def source_files(project_root, paths=None):
+    excluded = tuple(os.path.join(project_root, d) for d in EXCLUDE_DIRS)
+    for base in paths or SCAN_DIRS:
+        root = os.path.join(project_root, base)
+        if os.path.isfile(root):
+            yield root
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            if dirpath.startswith(excluded):
+                dirnames[:] = []
+                continue
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith('.dart'):
+                    yield os.path.join(dirpath, name)
+
+
+class LiteralIndex:
+    """
+    Dart 文件 → 字面量索引，按 mtime、大小与内容哈希增量更新
+
+    用法：
+        index = LiteralIndex.build(project_root)
+        index.files        → {相对路径: [字面量]}
+        index.save()
+    """
+
+    def __init__(self, project_root, cache_path, cached):
+        self.project_root = project_root
+        self.cache_path = cache_path
+        self._cached = cached
+        self._entries = {}
+        self._dirty = False
+        self.files = {}
+        self.scanned = 0
+        self.reused = 0
+
+    @classmethod
+    def build(cls, project_root=None, paths=None, cache_path=None, use_cache=True):
+        project_root = project_root or get_project_root()
+        cache_path = cache_path or os.path.join(project_root, CACHE_DIR_NAME, LITERALS_NAME)
+        index = cls(project_root, cache_path, _read_cache(cache_path) if use_cache else {})
+        for path in source_files(project_root, paths):
+            index._index_file(path)
+        if paths is None:
+            # 只有全量扫描才知道哪些文件已经删掉了
+            stale = [rel for rel in index._cached if rel not in index._entries]
+            for rel in stale:
+                del index._cached[rel]
+            index._dirty = index._dirty or bool(stale)
+        return index
+
+    def _index_file(self, path):
+        rel = os.path.relpath(path, self.project_root).replace(os.sep, '/')
+        stat = os.stat(path)
+        entry = self._cached.get(rel)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            self.reused += 1
+        else:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            if entry and entry['sha256'] == digest:
+                self.reused += 1
+            else:
+                self.scanned += 1
+                entry = {'sha256': digest, 'literals': scan_source(raw.decode('utf-8', errors='replace'))}
+            entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            self._dirty = True
+        self._entries[rel] = entry
+        self.files[rel] = entry['literals']
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': LITERALS_VERSION, 'files': {**self._cached, **self._entries}}, f,
+                      ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != LITERALS_VERSION:
+        return {}
+    return data.get('files', {})
+
+
+def _camel(words):
+    words = [w for w in re.split(r'[^A-Za-z0-9]+', words) if w]
+    if not words:
+        return ''
+    return words[0][0].lower() + words[0][1:] + ''.join(w[0].upper() + w[1:] for w in words[1:])
+
+
+def _shape(message):
+    return re.sub(r'\{\w+\}', '{}', message)
+
+
+def _template_keys(arb_dir, template):
+    """模板 ARB 里 {消息形状: (键, 参数声明顺序)}，以及全部已有的键"""
+    path = os.path.join(arb_dir, f'app_{template}.arb')
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    shapes = {}
+    for key, value in data.items():
+        if key.startswith('@') or not isinstance(value, str):
+            continue
+        in_order = list(dict.fromkeys(re.findall(r'\{(\w+)\}', value)))
+        meta = data.get('@' + key)
+        declared = list((meta or {}).get('placeholders') or {}) if isinstance(meta, dict) else []
+        shapes.setdefault(_shape(value), (key, in_order, declared or in_order))
+    return shapes, set(data)
+
+
+def propose(index, arb_dir, template, kinds=DEFAULT_KINDS, latin=False, accessor=DEFAULT_ACCESSOR):
+    """
+    为选中的字面量建议键并生成改写
+    返回 (改动清单, codemod 规则, 复用已有键的条目数, [需要手工处理的 (位置, 原因)])
+    """
+    shapes, existing = _template_keys(arb_dir, template)
+    changes = {}
+    by_message = {}        # 消息 → (键, 调用参数的表达式顺序)
+    uses = {}              # 字面量源码 → [(相对路径, 字面量, 是否选中)]
+    replacements = {}      # 字面量源码 → 改写后的代码
+    reused = 0
+    manual = []
+    for rel, literals in sorted(index.files.items()):
+        stem = _camel(os.path.splitext(os.path.basename(rel))[0])
+        for literal in literals:
+            wanted = _wanted(literal, kinds, latin)
+            uses.setdefault(literal['source'], []).append((rel, literal, wanted))
+            if not wanted:
+                continue
+            where = f'{rel}:{literal["line"]}'
+            if literal['braces']:
+                manual.append((where, '文案里有花括号，需要按 ICU 规则转义'))
+                continue
+            message = literal['message']
+            exprs = dict(literal['args'])
+            if message in by_message:
+                key, order = by_message[message]
+                if key in changes:
+                    changes[key]['_where'].append(where)
+            elif _shape(message) in shapes:
+                key, in_order, declared = shapes[_shape(message)]
+                # 已有键的参数名可能不同：按出现位置对应，再按声明顺序传参
+                position = dict(zip(in_order, [name for name, _ in literal['args']]))
+                order = [position[name] for name in declared if name in position]
+                by_message[message] = (key, order)
+                reused += 1
+            else:
+                role = _camel(literal['arg'] or (literal['call'] or 'text').rsplit('.', 1)[-1]) or 'text'
+                base = stem + role[0].upper() + role[1:]
+                key = base
+                suffix = 2
+                while key in existing or key in changes:
+                    key = f'{base}{suffix}'
+                    suffix += 1
+                order = [name for name, _ in literal['args']]
+                entry = {template: message}
+                if literal['args']:
+                    entry['@'] = {'placeholders': {name: {'type': 'Object'} for name in order}}
+                entry['_source'] = literal['source']
+                entry['_where'] = [where]
+                changes[key] = entry
+                by_message[message] = (key, order)
+            call = f'{accessor}.{key}'
+            if order:
+                call += '(' + ', '.join(exprs[name] for name in order) + ')'
+            replacements.setdefault(literal['source'], call)
+
+    usable = ('context', 'none') if 'context' not in accessor else ('context',)
+    rules = []
+    for source, call in replacements.items():
+        # codemod 的字面量规则会改掉范围里每一处同样的源码，所以按成员分组：
+        # 成员里的每一处都是文案、都能改写，才把这个成员的行范围放进规则
+        members = {}
+        for rel, literal, wanted in uses[source]:
+            members.setdefault((rel, tuple(literal['member'])), []).append((literal, wanted))
+        lines = {}
+        for (rel, member), occurrences in members.items():
+            blocked = next((literal for literal, wanted in occurrences
+                            if wanted and literal['scope'] not in usable), None)
+            mixed = not all(wanted for _, wanted in occurrences)
+            if not blocked and not mixed:
+                lines.setdefault(rel, []).append(list(member))
+                continue
+            for literal, wanted in occurrences:
+                if not wanted:
+                    continue
+                reason = _MANUAL_REASONS[literal['scope']] if literal['scope'] not in usable else (
+                    '同一个成员里这段字面量另有日志、比较等用途或不能改写的出现处')
+                manual.append((f'{rel}:{literal["line"]}', f'{_preview(source)}：{reason}'))
+        if lines:
+            rules.append({'name': f'l10n-{len(rules) + 1}', 'find': source, 'replace': call,
+                          'files': sorted(lines), 'lines': lines})
+    return changes, rules, reused, manual
+
+
+_MANUAL_REASONS = {
+    'const': '在 const 表达式或参数默认值里，要先去掉 const 再改',
+    'static': '在字段或顶层变量的初始化表达式里，没有 context',
+    'none': '所在函数没有 BuildContext context 参数，需要把 context 或本地化对象传进来',
+    'app': '是 MaterialApp 等根组件的参数，在 Localizations 之上，title 改用 onGenerateTitle',
+}
+
+
+def _preview(source):
+    source = source.replace('\n', '⏎')
+    return source if len(source) <= PREVIEW_CHARS else source[:PREVIEW_CHARS - 1] + '…'
+
+
+def _write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='查找 Dart 代码里硬编码的界面文案')
+    parser.add_argument('--path', action='append', default=[],
+                        help='只扫描这些目录或文件（相对项目根目录），可重复；默认 lib/')
+    parser.add_argument('--kinds', default=','.join(DEFAULT_KINDS),
+                        help=f'报告哪些类别，逗号分隔：{", ".join(KINDS)}（默认 {",".join(DEFAULT_KINDS)}）')
+    parser.add_argument('--latin', action='store_true', help='界面位置上的英文短语也算')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                        help=f'每个文件最多列出几条，0 为不限（默认 {DEFAULT_LIMIT}）')
+    parser.add_argument('--summary', action='store_true', help='只输出汇总，不逐条列出')
+    parser.add_argument('--out', default=None, help='把建议的新词条写成 update_l10n 的改动清单')
+    parser.add_argument('--rules', default=None, help='把改写写成 codemod.py 的规则文件')
+    parser.add_argument('--accessor', default=DEFAULT_ACCESSOR,
+                        help=f'改写时取本地化对象的表达式（默认 {DEFAULT_ACCESSOR}）')
+    parser.add_argument('--arb-dir', default=None, help='ARB 目录（默认 lib/l10n）')
+    parser.add_argument('--no-cache', action='store_true', help='忽略缓存，重新切分全部文件')
+    args = parser.parse_args()
+
+    kinds = {kind.strip() for kind in args.kinds.split(',') if kind.strip()}
+    unknown = kinds - set(KINDS)
+    if unknown:
+        print(f'✗ 不认识的类别：{", ".join(sorted(unknown))}')
+        sys.exit(1)
+
+    start = time.perf_counter()
+    index = LiteralIndex.build(paths=args.path or None, use_cache=not args.no_cache)
+    index.save()
+    elapsed = time.perf_counter() - start
+
+    counts = {kind: 0 for kind in KINDS}
+    selected = {}
+    for rel, literals in index.files.items():
+        for literal in literals:
+            counts[literal['kind']] += literal['script'] == 'cjk'
+        picked = [literal for literal in literals if _wanted(literal, kinds, args.latin)]
+        if picked:
+            selected[rel] = picked
+
+    if not args.summary:
+        limit = args.limit or sys.maxsize
+        for rel, literals in sorted(selected.items()):
+            print(f'\n{rel}（{len(literals)}）')
+            for literal in literals[:limit]:
+                where = literal['arg'] and f'{literal["arg"]}:' or literal['call'] or '-'
+                print(f'  {literal["line"]:>5d}  {literal["kind"]:<5s} {where:<24s} {_preview(literal["source"])}')
+            if len(literals) > limit:
+                print(f'  ……另有 {len(literals) - limit} 条（--limit 0 列出全部）')
+
+    total = sum(len(literals) for literals in selected.values())
+    print(f'\nDart 文件 {len(index.files)} 个（重新切分 {index.scanned}，缓存 {index.reused}），'
+          f'用时 {elapsed:.2f}s')
+    print('含中日韩文字的字面量：' + '，'.join(f'{kind} {counts[kind]}' for kind in KINDS))
+    print(f'报告 {total} 条（{",".join(k for k in KINDS if k in kinds)}{" + 英文" if args.latin else ""}），'
+          f'分布在 {len(selected)} 个文件')
+
+    if not (args.out or args.rules):
+        return
+    changes, rules, reused, manual = propose(index, args.arb_dir or default_arb_dir(), template_locale(),
+                                             kinds, args.latin, args.accessor)
+    print(f'建议新键 {len(changes)} 个，复用模板里已有的键 {reused} 处，codemod 规则 {len(rules)} 条')
+    if args.out:
+        _write_json(args.out, changes)
+        print(f'✓ 改动清单已写入 {args.out}，审阅键名后用 update_l10n.py 应用')
+    if args.rules:
+        _write_json(args.rules, {'rules': rules})
+        print(f'✓ 改写规则已写入 {args.rules}，先用 codemod.py --dry-run 查看')
+    if manual:
+        print(f'⚠ {len(manual)} 处需要手工处理：')
+        for where, reason in manual[:DEFAULT_LIMIT]:
+            print(f'  {where}：{reason}')
+        if len(manual) > DEFAULT_LIMIT:
+            print(f'  ……另有 {len(manual) - DEFAULT_LIMIT} 处')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+查找 Dart 代码里没有用到的本地化键
+gen-l10n 为每个键在 AppLocalizations 及各语言实现里各生成一个 getter，
+没人用的键照样占包体、拖慢生成和加载。这里扫描 lib/（以及测试目录），
+建立每个 Dart 文件的引用索引，再和 ARB 里的键对比：
+
+    引用    通过本地化对象访问的成员：AppLocalizations.of(context).key、
+            l10n.key，以及文件里任何绑定到 AppLocalizations 的名字
+            （final dialogL10n = AppLocalizations.of(c)、AppLocalizations l10n 参数、
+            AppLocalizations get l10n 等）
+    名字    文件里所有的 .identifier 访问和 'identifier' 字符串，用来兜底：
+            键没有被识别为引用、但以 .key 或 'key' 的形式出现过（可能是动态查找）
+            时记为「疑似使用」，不会被删
+
+每个文件的索引按 mtime 与大小缓存在 <项目根>/.asset_cache/l10n_usage.json，
+只有改过的文件才会重新扫描；需要扫描的文件分给进程池并行处理
+
+用法：
+    python3 scripts/find_unused_l10n.py [--jobs N] [--list-uncertain]
+    python3 scripts/find_unused_l10n.py --prune [--yes]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from asset_cache import CACHE_DIR_NAME
+from l10n_index import ArbFormatError, ArbIndex, default_arb_dir, get_project_root
+
+USAGE_NAME = 'l10n_usage.json'
+
+# 索引格式版本，识别规则变化时递增，旧缓存整体作废
+USAGE_VERSION = 1
+
+# 扫描的目录（相对项目根目录）；测试里用到的键同样不能删
+SCAN_DIRS = ('lib', 'test', 'integration_test', 'test_driver')
+
+# gen-l10n 的输出目录：里面每个键都有定义，不算引用
+EXCLUDE_DIRS = ('lib/gen_l10n',)
+
+# 约定俗成的本地化对象名，跨文件传递时（widget.l10n、参数）也能识别
+DEFAULT_RECEIVERS = ('l10n',)
+
+# 每个进程一次处理的文件数，太小时进程间通信的开销比扫描还大
+CHUNK_SIZE = 32
+
+_DIRECT_ACCESS = re.compile(r'AppLocalizations\s*\.\s*of\s*\([^()]*\)\s*!?\s*\??\.\s*([A-Za-z_]\w*)')
+_BINDINGS = (
+    re.compile(r'\b([A-Za-z_]\w*)\s*=\s*AppLocalizations\s*\.\s*of\s*\('),
+    re.compile(r'\bAppLocalizations\??\s+(?:get\s+)?([A-Za-z_]\w*)'),
+)
+_NAME = re.compile(r'''\.\s*([A-Za-z_]\w*)|['"]([A-Za-z_]\w*)['"]''')
+
+
+def scan_file(path):
+    """返回 (本地化引用, 全部 .成员 与 '字符串' 名字)，都是排好序的列表"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        source = f.read()
+
+    refs = set(_DIRECT_ACCESS.findall(source))
+    receivers = set(DEFAULT_RECEIVERS)
+    for pattern in _BINDINGS:
+        receivers.update(pattern.findall(source))
+    receivers.discard('of')
+    # 一个正则一次找全部接收者的访问，比逐个接收者扫一遍快
+    access = re.compile(r'(?<![\w$])(?:' + '|'.join(map(re.escape, sorted(receivers)))
+                        + r')\s*!?\s*\??\.\s*([A-Za-z_]\w*)')
+    refs.update(access.findall(source))
+    names = {member or quoted for member, quoted in _NAME.findall(source)}
+    return sorted(refs), sorted(names)
+
+
+def _scan_chunk(paths):
+    return [(path, scan_file(path)) for path in paths]
+
+
+def dart_files(project_root):
+    excluded = tuple(os.path.join(project_root, d) for d in EXCLUDE_DIRS)
+    for scan_dir in SCAN_DIRS:
+        root = os.path.join(project_root, scan_dir)
+        for dirpath, dirnames, filenames in os.walk(root):
+            if dirpath.startswith(excluded):
+                dirnames[:] = []
+                continue
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith('.dart'):
+                    yield os.path.join(dirpath, name)
+
+
+class UsageIndex:
+    """
+    Dart 文件 → 引用索引，按 mtime 与大小增量更新
+
+    用法：
+        usage = UsageIndex.build(project_root, jobs=4)
+        usage.files        → {相对路径: {'refs': [...], 'names': [...]}}
+        usage.save()
+    """
+
+    def __init__(self, project_root, cache_path):
+        self.project_root = project_root
+        self.cache_path = cache_path
+        self.files = {}
+        self.scanned = 0
+        self.reused = 0
+        self._dirty = False
+
+    @classmethod
+    def build(cls, project_root=None, jobs=None, cache_path=None, use_cache=True):
+        project_root = project_root or get_project_root()
+        cache_path = cache_path or os.path.join(project_root, CACHE_DIR_NAME, USAGE_NAME)
+        usage = cls(project_root, cache_path)
+        cached = usage._load() if use_cache else {}
+
+        stale = []
+        for path in dart_files(project_root):
+            rel = os.path.relpath(path, project_root).replace(os.sep, '/')
+            stat = os.stat(path)
+            entry = cached.get(rel)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                usage.files[rel] = entry
+                usage.reused += 1
+            else:
+                usage.files[rel] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+                stale.append(path)
+
+        for path, (refs, names) in usage._scan(stale, jobs):
+            rel = os.path.relpath(path, project_root).replace(os.sep, '/')
+            usage.files[rel].update(refs=refs, names=names)
+        usage.scanned = len(stale)
+        usage._dirty = bool(stale) or set(cached) != set(usage.files)
+        return usage
+
+    @staticmethod
+    def _scan(paths, jobs):
+        jobs = jobs or os.cpu_count() or 1
+        chunks = [paths[i:i + CHUNK_SIZE] for i in range(0, len(paths), CHUNK_SIZE)]
+        if jobs <= 1 or len(chunks) <= 1:
+            return [item for chunk in chunks for item in _scan_chunk(chunk)]
+        with ProcessPoolExecutor(max_workers=min(jobs, len(chunks))) as executor:
+            return [item for result in executor.map(_scan_chunk, chunks) for item in result]
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != USAGE_VERSION:
+            return {}
+        return data.get('files', {})
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': USAGE_VERSION, 'files': self.files}, f)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+    def classify(self, keys):
+        """把 [keys] 分成 (使用中, 仅测试使用, 疑似使用, 未使用)"""
+        in_lib = set()
+        in_tests = set()
+        names = set()
+        for rel, entry in self.files.items():
+            (in_lib if rel.startswith('lib/') else in_tests).update(entry['refs'])
+            names.update(entry['names'])
+        used, test_only, uncertain, unused = [], [], [], []
+        for key in keys:
+            if key in in_lib:
+                used.append(key)
+            elif key in in_tests:
+                test_only.append(key)
+            elif key in names:
+                uncertain.append(key)
+            else:
+                unused.append(key)
+        return used, test_only, uncertain, unused
+
+
+def _confirm(prompt):
+    if not sys.stdin.isatty():
+        return False
+    return input(prompt).strip().lower() in ('y', 'yes')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='查找 Dart 代码里没有用到的本地化键')
+    parser.add_argument('--jobs', type=int, default=None, help='扫描进程数（默认 CPU 核数）')
+    parser.add_argument('--arb-dir', default=None, help='ARB 目录（默认 lib/l10n）')
+    parser.add_argument('--no-cache', action='store_true', help='忽略缓存，重新扫描全部 Dart 文件')
+    parser.add_argument('--list-uncertain', action='store_true',
+                        help="同时列出疑似使用（只以 .key 或 'key' 形式出现过）的键")
+    parser.add_argument('--prune', action='store_true', help='从所有语言的 ARB 里删除未使用的键')
+    parser.add_argument('--yes', action='store_true', help='删除前不再确认')
+    parser.add_argument('--dry-run', action='store_true', help='配合 --prune：只列出会改动的文件')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    project_root = get_project_root()
+    try:
+        index = ArbIndex.load(args.arb_dir or default_arb_dir(project_root))
+    except ArbFormatError as e:
+        print(f'✗ {e.path}: {e.message}')
+        sys.exit(1)
+    index.save()
+    # 任何一种语言里有的键都算：只存在于译文里的多余键同样是清理对象
+    keys = sorted({key for entry in index.locales.values() for key in entry['keys']})
+
+    usage = UsageIndex.build(project_root, args.jobs, use_cache=not args.no_cache)
+    usage.save()
+    used, test_only, uncertain, unused = usage.classify(keys)
+    elapsed = time.perf_counter() - start
+
+    print(f'Dart 文件 {len(usage.files)} 个（重新扫描 {usage.scanned}，缓存 {usage.reused}），'
+          f'用时 {elapsed:.2f}s')
+    print(f'本地化键 {len(keys)} 个：使用中 {len(used)}，仅测试使用 {len(test_only)}，'
+          f'疑似使用 {len(uncertain)}，未使用 {len(unused)}')
+    if args.list_uncertain and uncertain:
+        print("\n疑似使用（没有识别到本地化访问，但出现过同名的 .成员 或 '字符串'）：")
+        for key in uncertain:
+            print(f'  {key}')
+    if unused:
+        print('\n未使用：')
+        for key in unused:
+            print(f'  {key}')
+
+    if not args.prune or not unused:
+        return
+    if not (args.yes or args.dry_run or _confirm(f'\n从所有语言删除这 {len(unused)} 个键？[y/N] ')):
+        print('⚠ 未删除（非交互环境请加 --yes）')
+        return
+
+    from update_l10n import ArbError, remove_keys
+
+    try:
+        result = remove_keys(unused, index.arb_dir, dry_run=args.dry_run)
+    except ArbError as e:
+        print(f'✗ {e}')
+        sys.exit(1)
+    verb = '将修改' if args.dry_run else '已修改'
+    for name, removed in result.items():
+        print(f'✓ {verb} {name}：删除 {len(removed)} 个键')
+    if not args.dry_run:
+        print('记得运行 flutter gen-l10n 重新生成 AppLocalizations')
+
+
+if __name__ == '__main__':
+    main()
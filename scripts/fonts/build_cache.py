@@ -0,0 +1,148 @@
+"""字体子集的内容寻址构建缓存。
+
+子集化 + 收窄字重轴在整套 CJK 可变字体上要跑几十秒，而绝大多数重跑的输入
+其实没变。这里把「源字体字节、字符集、字重区间、版式特性、fontTools 版本」
+合成一个键，产物按键存进 `<仓库>/.asset_cache/fonts/`（已在 .gitignore 中忽略），
+命中时直接把缓存的字节拷回 `assets/fonts/`。
+
+能这样缓存的前提是构建可复现：`build_serif_subset` 钉死了 SOURCE_DATE_EPOCH，
+同样的输入一定产出同样的字节。
+
+未命中时拿这次的输入和最接近的一次历史构建逐项对比，告诉你是哪一项让缓存作废——
+「为什么又跑了四十秒」比「跑了四十秒」有用得多。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+# 清单格式版本，结构变化时递增，旧清单整体作废。
+MANIFEST_VERSION = 1
+
+# 最多保留几份产物。简体 / 含繁体两个变体来回切换时都能命中，又不至于
+# 把几 MB 一份的字体无限堆下去。
+MAX_ENTRIES = 4
+
+# 对比输入时给人看的名字。
+INPUT_LABELS = {
+    "source_font": "源字体",
+    "charset": "字符集",
+    "weight_range": "WEIGHT_RANGE",
+    "layout_features": "LAYOUT_FEATURES",
+    "family_name": "FAMILY_NAME",
+    "fonttools": "fontTools 版本",
+    "recipe": "构建步骤版本",
+}
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(inputs: dict[str, str]) -> str:
+    payload = json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _short(value: str) -> str:
+    # 哈希只露前 12 位，版本号、特性列表这类短值原样显示。
+    return value[:12] if len(value) == 64 else value
+
+
+def explain_miss(previous: dict[str, str] | None, inputs: dict[str, str]) -> str:
+    """一句话说明这次为什么没命中。"""
+    if previous is None:
+        return "没有可对比的历史构建"
+    changed = [
+        f"{INPUT_LABELS.get(name, name)}（{_short(previous.get(name, '-'))} → {_short(value)}）"
+        for name, value in inputs.items()
+        if previous.get(name) != value
+    ]
+    if not changed:
+        return "输入未变，但缓存的产物已丢失或损坏"
+    return "、".join(changed) + "变了"
+
+
+class FontBuildCache:
+    """`<cache_dir>/manifest.json` 记录每个键对应的输入与产物哈希，产物本体存为 `<键>.ttf`。"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.manifest_path = cache_dir / "manifest.json"
+        self._manifest = self._load()
+
+    def _load(self) -> dict:
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        if data.get("version") != MANIFEST_VERSION:
+            data = {"version": MANIFEST_VERSION, "last": None, "entries": {}}
+        return data
+
+    def _save(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        tmp_path.write_text(
+            # 不排序：entries 的插入顺序就是新旧顺序，淘汰时靠它。
+            json.dumps(self._manifest, indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.manifest_path)
+
+    def restore(self, inputs: dict[str, str], out_path: Path) -> tuple[bool, str]:
+        """命中时把产物放到 [out_path]，返回 (是否命中, 说明)。
+
+        [out_path] 已经是缓存里那份字节时连拷贝都省掉。
+        """
+        key = cache_key(inputs)
+        entry = self._manifest["entries"].get(key)
+        blob = self.cache_dir / f"{key}.ttf"
+        if entry and blob.exists() and file_sha256(blob) == entry["output"]:
+            if out_path.exists() and file_sha256(out_path) == entry["output"]:
+                return True, "产物已是最新"
+            tmp_path = out_path.with_name(out_path.name + ".tmp")
+            shutil.copyfile(blob, tmp_path)
+            os.replace(tmp_path, out_path)
+            return True, f"从缓存恢复（{key[:12]}）"
+
+        return False, explain_miss(self._closest(inputs), inputs)
+
+    def _closest(self, inputs: dict[str, str]) -> dict[str, str] | None:
+        # 和差异最少的那次历史构建对比：在简体 / 繁体之间来回切时，
+        # 「最近一次」往往不是最有参考价值的那次。
+        candidates = [entry["inputs"] for entry in self._manifest["entries"].values()]
+        if not candidates:
+            return self._manifest.get("last")
+        return min(
+            reversed(candidates),
+            key=lambda previous: sum(previous.get(k) != v for k, v in inputs.items()),
+        )
+
+    def store(self, inputs: dict[str, str], out_path: Path) -> None:
+        """登记刚构建出的产物，超出 [MAX_ENTRIES] 时丢掉最早的。"""
+        key = cache_key(inputs)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(out_path, self.cache_dir / f"{key}.ttf")
+
+        entries = self._manifest["entries"]
+        entries.pop(key, None)
+        entries[key] = {"inputs": inputs, "output": file_sha256(out_path)}
+        while len(entries) > MAX_ENTRIES:
+            oldest = next(iter(entries))
+            del entries[oldest]
+            (self.cache_dir / f"{oldest}.ttf").unlink(missing_ok=True)
+        self._manifest["last"] = inputs
+        self._save()
@@ -20,13 +20,17 @@ from __future__ import annotations
 
 import argparse
 import os
-import urllib.parse
-import urllib.request
 from pathlib import Path
+from typing import BinaryIO
 
+import fontTools
 from fontTools import subset as ft_subset
 from fontTools.varLib import instancer as ft_instancer
 
+from build_cache import FontBuildCache, file_sha256, text_sha256
+from charset import CharSet, big5_level1, gb2312
+from download_cache import DownloadCache, DownloadError, cache_root
+
 # fonttools 默认把当前时间写进 head 表，同样的输入会产出不同的字节。产物是要签入
 # 仓库的，重跑一次就多一个无意义的 5MB diff——钉死时间戳让构建可复现。
 os.environ.setdefault("SOURCE_DATE_EPOCH", "0")
@@ -36,6 +40,16 @@ OUT_DIR = REPO_ROOT / "assets" / "fonts"
 OUT_FONT = OUT_DIR / "NotoSerifSC-Subset.ttf"
 OUT_LICENSE = OUT_DIR / "OFL.txt"
 
+# web 构建按需加载的 WOFF2 分片（见 web_shards），flutter build web 会原样拷走 web/ 下的文件。
+WEB_OUT_DIR = REPO_ROOT / "web" / "fonts" / "NotoSerifSC"
+
+# 构建缓存放在仓库根的 .asset_cache 下，和图标流水线的增量缓存同一个目录。
+CACHE_DIR = REPO_ROOT / ".asset_cache" / "fonts"
+
+# 构建步骤本身的版本。下面 subset → instancer → fix_name_table 这条链路的行为
+# 有变化（参数、顺序、name 表怎么改）时递增，让旧缓存全部作废。
+BUILD_RECIPE = "1"
+
 # pubspec 里声明的族名必须和这个一致。
 FAMILY_NAME = "NotoSerifSC"
 
@@ -47,6 +61,17 @@ SOURCE_LICENSE_URL = (
     "https://raw.githubusercontent.com/google/fonts/main/ofl/notoserifsc/OFL.txt"
 )
 
+# 源文件的 SHA-256。URL 指向 google/fonts 的 main 分支，上游更新字体时内容会变——
+# 校验不过就是上游换了版本，确认新版本没问题后再更新这里（换字体版本本来就要重跑
+# 本脚本、重新签入产物）。值为 None 表示尚未固定，下载后会打印实际哈希。
+PINNED_SHA256: dict[str, str | None] = {
+    SOURCE_FONT_URL: None,
+    SOURCE_LICENSE_URL: None,
+}
+
+# 下载到 work_dir 里的源字体文件名。
+SOURCE_FONT_FILE = "NotoSerifSC-VF.ttf"
+
 # 保留的字重区间。下限取 400 而不是原始的 200：
 #   - 应用最细只用到 w400，砍掉 200–400 不损失任何取值；
 #   - 更要紧的是这样一来**默认实例就是 400**。原始字体的默认实例是 200（ExtraLight），
@@ -58,91 +83,128 @@ WEIGHT_RANGE = "wght=400:900"
 LAYOUT_FEATURES = "kern,liga,locl,ccmp,palt"
 
 
+# 应用支持 7 种界面语言（de/en/es/fr/ja/ko/zh），用户还会用任意语言记笔记。
+# 覆盖情况见下，**这不是随手划的范围**：
+#   - de / es / fr：重音字母全在拉丁补充区，下面第二条已覆盖；
+#   - ja：假名 GB2312 自带了大半，这里补齐整块。日文汉字会用简体字形渲染，
+#     这是用简体中文字体的固有代价，靠子集解决不了；
+#   - ko：**源字体根本不含谚文**（Noto Serif SC 的谚文音节数为 0），
+#     韩文一定会落到 fontFamilyFallback 的系统字体，这里加什么都没用；
+#   - ru / el：源字体只有 66 个西里尔字母和 49 个希腊字母，下面第二、三条
+#     已经把它们全收进来了。
+# 第二列是给 font_report 按条目归账用的名字。
+SCRIPT_RANGES = [
+    (range(0x20, 0x7F), "ASCII"),
+    (range(0xA0, 0x180), "拉丁补充 + 拉丁扩展 A"),
+    (range(0x370, 0x400), "希腊字母"),
+    (range(0x400, 0x500), "西里尔字母"),
+    (range(0x2000, 0x206F), "通用标点"),         # 含中文引号、省略号、破折号
+    (range(0x3000, 0x303F), "CJK 标点"),
+    (range(0x3040, 0x3100), "平假名 + 片假名"),
+    (range(0xFF00, 0xFFEF), "全角字符"),         # 含半角片假名
+]
+
+# 正文里真的会出现的零散符号：欧元、摄氏度、项目符号、星标、箭头。
+EXTRA_SYMBOLS = (0x20AC, 0x2103, 0x2109, 0x25CF, 0x25CB,
+                 0x2605, 0x2606, 0x2190, 0x2191, 0x2192, 0x2193)
+
+
 def build_charset(include_traditional: bool) -> str:
-    chars: set[str] = set()
+    return (legacy_chars(include_traditional) | script_chars()).to_text()
+
 
-    # GB2312 全量：6763 个汉字 + 符号区，覆盖简体中文日常书写。
-    for hi in range(0xA1, 0xFF):
-        for lo in range(0xA1, 0xFF):
-            try:
-                chars.add(bytes([hi, lo]).decode("gb2312"))
-            except UnicodeDecodeError:
-                pass
+def legacy_chars(include_traditional: bool) -> CharSet:
+    """按传统编码字符集圈出来的汉字与符号，占了子集体积的绝大部分。
 
+    GB2312 全量覆盖简体中文日常书写；[include_traditional] 时再加 Big5 一级字区，
+    覆盖繁体引文。两张表各自只解码一次（见 charset）。
+    """
+    chars = gb2312()
     if include_traditional:
-        # Big5 常用字（一级字区 0xA440–0xC67E），覆盖繁体引文。
-        for hi in range(0xA4, 0xC7):
-            for lo in list(range(0x40, 0x7F)) + list(range(0xA1, 0xFF)):
-                try:
-                    chars.add(bytes([hi, lo]).decode("big5"))
-                except UnicodeDecodeError:
-                    pass
-
-    # 应用支持 7 种界面语言（de/en/es/fr/ja/ko/zh），用户还会用任意语言记笔记。
-    # 覆盖情况见下，**这不是随手划的范围**：
-    #   - de / es / fr：重音字母全在拉丁补充区，下面第二条已覆盖；
-    #   - ja：假名 GB2312 自带了大半，这里补齐整块。日文汉字会用简体字形渲染，
-    #     这是用简体中文字体的固有代价，靠子集解决不了；
-    #   - ko：**源字体根本不含谚文**（Noto Serif SC 的谚文音节数为 0），
-    #     韩文一定会落到 fontFamilyFallback 的系统字体，这里加什么都没用；
-    #   - ru / el：源字体只有 66 个西里尔字母和 49 个希腊字母，下面第二、三条
-    #     已经把它们全收进来了。
-    ranges = [
-        range(0x20, 0x7F),      # ASCII
-        range(0xA0, 0x180),     # 拉丁补充 + 拉丁扩展 A
-        range(0x370, 0x400),    # 希腊字母
-        range(0x400, 0x500),    # 西里尔字母
-        range(0x2000, 0x206F),  # 通用标点（含中文引号、省略号、破折号）
-        range(0x3000, 0x303F),  # CJK 标点
-        range(0x3040, 0x3100),  # 平假名 + 片假名
-        range(0xFF00, 0xFFEF),  # 全角字符（含半角片假名）
-    ]
-    for r in ranges:
-        chars.update(chr(cp) for cp in r)
-    # 正文里真的会出现的零散符号：欧元、摄氏度、项目符号、星标、箭头。
-    chars.update(chr(cp) for cp in (0x20AC, 0x2103, 0x2109, 0x25CF, 0x25CB,
-                                    0x2605, 0x2606, 0x2190, 0x2191, 0x2192, 0x2193))
-    return "".join(sorted(chars))
+        chars |= big5_level1()
+    return chars
+
+
+def script_chars() -> CharSet:
+    """非汉字的书写系统与标点：字形少、体积小，不管怎么分层都整块保留。"""
+    return CharSet.from_ranges(r for r, _ in SCRIPT_RANGES) | CharSet.from_codepoints(EXTRA_SYMBOLS)
 
 
 def download(url: str, dest: Path) -> None:
-    """下载到 [dest]，已存在则跳过。
+    """把 [url] 的内容放到 [dest]，经由共享的下载缓存（见 download_cache）。
 
-    先校验 scheme 再打开：`urlopen` 认 `file:` 和自定义 scheme，上面那两个常量
-    改错一个字符就会从「下载字体」变成「读本地任意文件」。这里的 URL 目前都是
-    写死的常量，这道检查是给以后改常量的人留的。
+    [PINNED_SHA256] 里有这个 URL 的哈希时严格校验；还没固定的，下载完打印实际
+    哈希，核对无误后填进常量。
     """
-    scheme = urllib.parse.urlparse(url).scheme
-    if scheme != "https":
-        raise SystemExit(f"只允许 https，拿到的是 {scheme!r}：{url}")
-    if dest.exists():
-        print(f"跳过下载（已存在）：{dest.name}")
-        return
-    print(f"下载 {url}")
-    # nosec 的依据是上面那三行 scheme 校验，不是「这行看着没事」——
-    # 静态分析盯 urlopen 盯的就是 file:/ 与自定义 scheme，那条路已经堵死。
-    with urllib.request.urlopen(url, timeout=180) as response:  # nosec B310
-        dest.write_bytes(response.read())
-
-
-def fix_name_table(font_path: Path) -> None:
-    """把 name 表改回 Regular。
+    pinned = PINNED_SHA256.get(url)
+    cache = DownloadCache()
+    blob = cache.lookup(url, pinned)
+    if blob:
+        print(f"使用缓存：{dest.name}（{blob.name[:12]}）")
+    else:
+        try:
+            blob = cache.fetch(url, pinned)
+        except DownloadError as e:
+            raise SystemExit(str(e)) from e
+        if not pinned:
+            print(f"⚠ {dest.name} 未固定 SHA-256，本次内容为 {blob.name}")
+    cache.place(blob, dest)
+
+
+def subset_options() -> ft_subset.Options:
+    """等价于 `--layout-features=[LAYOUT_FEATURES] --no-hinting` 的子集化选项。"""
+    options = ft_subset.Options()
+    options.layout_features = LAYOUT_FEATURES.split(",")
+    options.hinting = False
+    return options
+
+
+def subset_in_memory(
+    source_font: Path | BinaryIO,
+    charset: str,
+    options: ft_subset.Options | None = None,
+):
+    """按字符集裁出子集，保留 [LAYOUT_FEATURES]，去掉 hinting，返回内存里的 TTFont。
+
+    [source_font] 也可以是已经读进内存的文件对象（build_variants 的每个 worker
+    只读一次源字体）。
+    """
+    # 直接调 fontTools 的 Python API，不起子进程：pyftsubset / fonttools 是否在
+    # PATH 上取决于安装方式，而且子进程那条路要么被静态分析盯上、要么得靠
+    # 抑制注释糊过去。库调用没有这些问题，报错也直接是 Python 异常。
+    options = options or subset_options()
+    if isinstance(source_font, Path):
+        source_font = str(source_font)
+    font = ft_subset.load_font(source_font, options, dontLoadGlyphNames=True)
+    subsetter = ft_subset.Subsetter(options=options)
+    # 和 `--text-file` 的读法一致：换行不算字符。
+    subsetter.populate(text=charset.replace("\n", ""))
+    subsetter.subset(font)
+    return font
+
+
+def subset_font(source_font: Path, charset_file: Path, subset_file: Path) -> None:
+    """文件进、文件出的子集化，只剩基准测试（bench_assets）单独测这一段时在用。"""
+    options = subset_options()
+    charset = charset_file.read_text(encoding="utf-8")
+    font = subset_in_memory(source_font, charset, options)
+    ft_subset.save_font(font, str(subset_file), options)
+
+
+def fix_name_table(font, style: str = "Regular") -> None:
+    """把 name 表改回 Regular（静态实例改成 [style]）。
 
     收窄字重轴之后默认实例已经是 w400，但 `--update-name-table` 只在生成静态实例时
     改名，可变字体仍然顶着源文件的 "ExtraLight"。Flutter 认的是 pubspec 里的
     `family`，所以这一步不影响渲染，纯粹是别让以后排查字体问题的人被名字带偏。
     """
-    from fontTools.ttLib import TTFont
-
-    font = TTFont(font_path)
     name = font["name"]
     for record in name.names:
         text = record.toUnicode()
         if "ExtraLight" in text:
-            record.string = text.replace("ExtraLight", "Regular").strip()
+            record.string = text.replace("ExtraLight", style).strip()
     name.setName(FAMILY_NAME, 1, 3, 1, 0x409)
-    name.setName("Regular", 2, 3, 1, 0x409)
-    font.save(font_path)
+    name.setName(style, 2, 3, 1, 0x409)
 
 
 def main() -> None:
@@ -155,54 +217,137 @@ def main() -> None:
     parser.add_argument(
         "--work-dir",
         default=None,
-        help="下载与中间产物目录，默认使用系统临时目录",
+        help="中间产物目录，默认为下载缓存根目录下的 fonts-work",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="忽略构建缓存强制重跑（产物仍会写回缓存）",
+    )
+    parser.add_argument(
+        "--web",
+        action="store_true",
+        help="另外生成 web 用的 unicode-range 分片（WOFF2 + manifest.json + CSS）",
     )
     args = parser.parse_args()
+    out_font = build(
+        args.traditional,
+        Path(args.work_dir) if args.work_dir else None,
+        use_cache=not args.no_cache,
+    )
+    if args.web:
+        build_web_shards(out_font)
+
+
+def build_web_shards(font_path: Path, out_dir: Path | None = None) -> dict:
+    """把构建好的子集按字频切成 web 分片，返回 manifest。"""
+    from corpus_charset import scan_ui
+    from web_shards import build_shards
+
+    counts = scan_ui()
+    return build_shards(font_path, out_dir or WEB_OUT_DIR, FAMILY_NAME, script_chars(), counts)
+
+
+def default_work_dir() -> Path:
+    """中间产物目录，和下载缓存放在同一个根目录下，重启、换终端都还在。"""
+    return cache_root() / "fonts-work"
+
 
-    import tempfile
+def build_font(
+    source_font: Path | BinaryIO,
+    charset: str,
+    out_path: Path,
+    axis_limits: str = WEIGHT_RANGE,
+) -> None:
+    """子集化 → 收窄字重轴 → 修 name 表，把 [charset] 对应的字体写到 [out_path]。
 
-    work_dir = (
-        Path(args.work_dir)
-        if args.work_dir
-        else Path(tempfile.gettempdir()) / "thoughtecho-fonts"
+    三步都在同一个内存里的 TTFont 上做，最后只序列化一次。以前每一步之间都要
+    整套 CJK 字体写盘、再完整解析一遍，光这几次往返就占了构建时间的大头。
+
+    [axis_limits] 默认是 [WEIGHT_RANGE]；写成 `wght=700` 这样的单值时产出静态实例
+    （build_variants 比较体积用）。
+    """
+    font = subset_in_memory(source_font, charset)
+
+    # 收窄字重轴，顺带把默认实例定到 400 并刷新 name 表。
+    limits = ft_instancer.parseLimits([axis_limits])
+    static = all(low == high for low, _, high in limits.values())
+    ft_instancer.instantiateVariableFont(
+        font,
+        limits,
+        inplace=True,
+        # 静态实例的改名要求 STAT 里正好有这个字重的命名值，w450 这种会直接抛错；
+        # 静态实例只用来比体积，名字由下面的 fix_name_table 给一个够用的。
+        updateFontNames=not static,
     )
+
+    if static:
+        weight = round(limits["wght"][0])
+        fix_name_table(font, {400: "Regular", 700: "Bold"}.get(weight, f"W{weight}"))
+    else:
+        fix_name_table(font)
+
+    # 子集化按 fontTools 的默认值加载，不重算包围盒和时间戳；原先最后一步是
+    # 重新打开文件再保存，两者都会重算。这里照做，产物逐字节不变——
+    # 时间戳由 SOURCE_DATE_EPOCH 钉死，所以仍然可复现。
+    font.recalcBBoxes = True
+    font.recalcTimestamp = True
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    font.save(str(tmp_path))
+    font.close()
+    os.replace(tmp_path, out_path)
+
+
+def cache_inputs(source_font: Path, charset: str) -> dict[str, str]:
+    """决定产物字节的全部输入，任何一项变化都让构建缓存作废。"""
+    return {
+        "source_font": file_sha256(source_font),
+        "charset": text_sha256(charset),
+        "weight_range": WEIGHT_RANGE,
+        "layout_features": LAYOUT_FEATURES,
+        "family_name": FAMILY_NAME,
+        "fonttools": fontTools.version,
+        "recipe": BUILD_RECIPE,
+    }
+
+
+def build(
+    include_traditional: bool = False,
+    work_dir: Path | None = None,
+    use_cache: bool = True,
+) -> Path:
+    """完整跑一遍下载 → 字符集 → 子集化 → 收窄字重轴 → 修 name 表，返回产物路径。
+
+    和 `main()` 分开是为了让常驻的 asset_daemon 在同一个进程里反复调用，
+    不必每次重新启动解释器、重新导入 fontTools。输入没变时直接从构建缓存恢复。
+    """
+    work_dir = work_dir or default_work_dir()
     work_dir.mkdir(parents=True, exist_ok=True)
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    source_font = work_dir / "NotoSerifSC-VF.ttf"
+    source_font = work_dir / SOURCE_FONT_FILE
     download(SOURCE_FONT_URL, source_font)
     download(SOURCE_LICENSE_URL, OUT_LICENSE)
 
-    charset = build_charset(args.traditional)
-    charset_file = work_dir / "charset.txt"
-    charset_file.write_text(charset, encoding="utf-8")
+    charset = build_charset(include_traditional)
     print(f"字符集：{len(charset)} 个字符"
-          f"（{'含繁体' if args.traditional else '简体'}）")
+          f"（{'含繁体' if include_traditional else '简体'}）")
 
-    # 直接调 fontTools 的 Python API，不起子进程：pyftsubset / fonttools 是否在
-    # PATH 上取决于安装方式，而且子进程那条路要么被静态分析盯上、要么得靠
-    # 抑制注释糊过去。库调用没有这些问题，报错也直接是 Python 异常。
-    subset_file = work_dir / "subset.ttf"
-    ft_subset.main([
-        str(source_font),
-        f"--text-file={charset_file}",
-        f"--output-file={subset_file}",
-        f"--layout-features={LAYOUT_FEATURES}",
-        "--no-hinting",
-    ])
-
-    # 收窄字重轴，顺带把默认实例定到 400 并刷新 name 表。
-    ft_instancer.main([
-        str(subset_file),
-        WEIGHT_RANGE,
-        "-o", str(OUT_FONT),
-        "--update-name-table",
-    ])
+    cache = FontBuildCache(CACHE_DIR)
+    inputs = cache_inputs(source_font, charset)
+    if use_cache:
+        hit, reason = cache.restore(inputs, OUT_FONT)
+        if hit:
+            print(f"构建缓存命中：{reason}")
+            return OUT_FONT
+        print(f"构建缓存未命中：{reason}")
 
-    fix_name_table(OUT_FONT)
+    build_font(source_font, charset, OUT_FONT)
+    cache.store(inputs, OUT_FONT)
 
     size_mb = OUT_FONT.stat().st_size / 1024 / 1024
     print(f"产物：{OUT_FONT.relative_to(REPO_ROOT)}  {size_mb:.2f} MB")
+    return OUT_FONT
 
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""并行构建多个字体变体，比较体积取舍。
+
+`build_serif_subset.py` 一次只出一个变体；要同时看简体 / 含繁体、可变 / 静态
+w400 / w700 各自多大，就得串行跑好几遍，每遍都重复下载检查、重新读源字体。
+这里把变体列表分发到进程池：每个 worker 只把源字体读进内存一次，之后每个
+变体各自在这份字节上解析、子集化、实例化，最后打印每个变体的体积与耗时。
+
+变体写法 `字符集[@实例][=输出路径]`：
+  - 字符集：`simplified`、`traditional`，或一个字符集文本文件
+    （比如 corpus_charset 写出的 tier-core.txt）；
+  - 实例：`variable`（默认，字重轴 WEIGHT_RANGE）或 `w400` / `w700` 这样的静态字重；
+  - 输出路径：默认 `<work_dir>/variants/NotoSerifSC-<字符集>-<实例>.ttf`。
+
+用法：
+    python3 scripts/fonts/build_variants.py [变体 ...] [--jobs N]
+    python3 scripts/fonts/build_variants.py simplified traditional simplified@w400 simplified@w700
+
+产物只写进 work_dir，不动 assets/fonts；签入仓库的那一份仍由 build_serif_subset.py 生成。
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from build_serif_subset import (
+    SOURCE_FONT_FILE,
+    SOURCE_FONT_URL,
+    WEIGHT_RANGE,
+    build_charset,
+    build_font,
+    default_work_dir,
+    download,
+)
+
+DEFAULT_VARIANTS = ("simplified", "traditional")
+
+_BUILTIN_CHARSETS = {"simplified": False, "traditional": True}
+
+
+@dataclass(frozen=True)
+class Variant:
+    name: str
+    charset: str
+    axis_limits: str
+    out_path: Path
+
+
+def parse_variant(spec: str, out_dir: Path) -> Variant:
+    """把 `字符集[@实例][=输出路径]` 解析成 [Variant]，字符集在这里就读出来。"""
+    spec, _, output = spec.partition("=")
+    charset_spec, _, instance = spec.partition("@")
+    instance = instance or "variable"
+
+    if charset_spec in _BUILTIN_CHARSETS:
+        charset = build_charset(_BUILTIN_CHARSETS[charset_spec])
+        label = charset_spec
+    else:
+        path = Path(charset_spec)
+        if not path.is_file():
+            raise SystemExit(f"未知字符集：{charset_spec}（可选 simplified / traditional / 文件路径）")
+        charset = path.read_text(encoding="utf-8")
+        label = path.stem
+
+    if instance == "variable":
+        axis_limits = WEIGHT_RANGE
+    elif instance.startswith("w") and instance[1:].isdigit():
+        axis_limits = f"wght={instance[1:]}"
+    else:
+        raise SystemExit(f"未知实例：{instance}（可选 variable / w400 这样的静态字重）")
+
+    name = f"{label}-{instance}"
+    out_path = Path(output) if output else out_dir / f"NotoSerifSC-{name}.ttf"
+    return Variant(name, charset, axis_limits, out_path)
+
+
+_worker_source: bytes | None = None
+
+
+def _init_worker(source_font: Path) -> None:
+    global _worker_source
+    _worker_source = source_font.read_bytes()
+
+
+def _build_variant(variant: Variant) -> tuple[str, float]:
+    start = time.perf_counter()
+    # 每个变体各拿一个 BytesIO：build_font 结束时会关掉字体的文件对象。
+    build_font(io.BytesIO(_worker_source), variant.charset, variant.out_path, variant.axis_limits)
+    return variant.name, time.perf_counter() - start
+
+
+def build_variants(variants: list[Variant], source_font: Path, jobs: int) -> dict[str, float]:
+    """在 [jobs] 个进程里构建全部变体，返回 {变体名: 耗时秒数}。
+
+    字符集最大的先提交：含繁体的变体最慢，放到最后会拖长整体用时。
+    """
+    for variant in variants:
+        variant.out_path.parent.mkdir(parents=True, exist_ok=True)
+    ordered = sorted(variants, key=lambda v: len(v.charset), reverse=True)
+
+    if jobs <= 1:
+        _init_worker(source_font)
+        return dict(_build_variant(v) for v in ordered)
+
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(variants)),
+        initializer=_init_worker,
+        initargs=(source_font,),
+    ) as executor:
+        return dict(executor.map(_build_variant, ordered))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="并行构建多个字体变体并比较体积")
+    parser.add_argument("variants", nargs="*", default=list(DEFAULT_VARIANTS),
+                        help="变体，写法 字符集[@实例][=输出路径]（默认 simplified traditional）")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="并行进程数（默认 CPU 核数）")
+    parser.add_argument("--work-dir", type=Path, default=None,
+                        help="产物目录，默认为下载缓存根目录下的 fonts-work")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or default_work_dir()
+    work_dir.mkdir(parents=True, exist_ok=True)
+    source_font = work_dir / SOURCE_FONT_FILE
+    download(SOURCE_FONT_URL, source_font)
+
+    variants = [parse_variant(spec, work_dir / "variants") for spec in args.variants]
+    names = [v.name for v in variants]
+    if len(set(names)) != len(names):
+        raise SystemExit("变体重复")
+
+    start = time.perf_counter()
+    timings = build_variants(variants, source_font, args.jobs)
+    wall = time.perf_counter() - start
+
+    print(f"\n{'变体':<28s}{'字符数':>8s}{'体积':>12s}{'耗时':>9s}")
+    for variant in variants:
+        size_mb = variant.out_path.stat().st_size / 1024 / 1024
+        print(f"{variant.name:<28s}{len(variant.charset):>8d}"
+              f"{size_mb:>9.2f} MB{timings[variant.name]:>8.1f}s")
+    print(f"\n总用时 {wall:.1f}s（各变体累计 {sum(timings.values()):.1f}s，{args.jobs} 个进程）")
+    print(f"产物目录：{work_dir / 'variants'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""以有序区间数组表示的字符集。
+
+字符集动辄上万个码位，而且几乎都是成片连续的（ASCII、假名、CJK 统一汉字……）。
+用 `set[str]` 一个字一个元素地存，做并集 / 差集 / 和 cmap 求交都要逐字过一遍，
+还得再排序才能交给子集化。这里只存互不重叠、互不相邻的半开区间 `[start, end)`：
+
+  - 并、交、差都是两个有序区间表的归并，代价和区间数成正比，与码位数无关；
+  - `in` 用二分查找；
+  - 可以序列化成 `U+4E00-9FFF, U+3000` 这样的紧凑写法（CSS unicode-range 同款），
+    也能从这种写法读回来。
+
+GB2312 / Big5 这类编码表整张一次性解码，结果按参数缓存，同一进程里只解一遍。
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import re
+from array import array
+from typing import Iterable, Iterator
+
+_NOTATION_ITEM = re.compile(r"^U\+([0-9A-Fa-f]{1,6})(?:-([0-9A-Fa-f]{1,6}))?$")
+
+
+class CharSet:
+    """不可变的码位集合。运算符与 `set` 一致：`|` 并、`&` 交、`-` 差。"""
+
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, intervals: Iterable[tuple[int, int]] = ()):
+        """[intervals] 是任意顺序、可以重叠的半开区间 `(start, end)`。"""
+        starts = array("L")
+        ends = array("L")
+        for start, end in sorted(intervals):
+            if start >= end:
+                continue
+            if ends and start <= ends[-1]:
+                # 与上一个区间重叠或相邻，直接并进去
+                if end > ends[-1]:
+                    ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+        self._starts = starts
+        self._ends = ends
+
+    @classmethod
+    def _from_sorted(cls, starts: array, ends: array) -> CharSet:
+        result = cls.__new__(cls)
+        result._starts = starts
+        result._ends = ends
+        return result
+
+    # ---- 构造 ----
+
+    @classmethod
+    def from_codepoints(cls, codepoints: Iterable[int]) -> CharSet:
+        starts = array("L")
+        ends = array("L")
+        for cp in sorted(set(codepoints)):
+            if ends and cp == ends[-1]:
+                ends[-1] = cp + 1
+            else:
+                starts.append(cp)
+                ends.append(cp + 1)
+        return cls._from_sorted(starts, ends)
+
+    @classmethod
+    def from_text(cls, text: Iterable[str]) -> CharSet:
+        """字符串或任意「可迭代的单个字符」（比如 Counter 的键）。"""
+        return cls.from_codepoints(map(ord, text))
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[range]) -> CharSet:
+        return cls((r.start, r.stop) for r in ranges)
+
+    @classmethod
+    def parse(cls, notation: str) -> CharSet:
+        """读回 [to_notation] 的写法，逗号或空白分隔。"""
+        intervals = []
+        for item in re.split(r"[,\s]+", notation.strip()):
+            if not item:
+                continue
+            match = _NOTATION_ITEM.match(item)
+            if not match:
+                raise ValueError(f"无法解析的码位区间：{item!r}")
+            start = int(match.group(1), 16)
+            end = int(match.group(2), 16) if match.group(2) else start
+            intervals.append((start, end + 1))
+        return cls(intervals)
+
+    @classmethod
+    def from_font(cls, font) -> CharSet:
+        """字体 cmap 覆盖的码位；[font] 可以是路径、文件对象或已打开的 TTFont。"""
+        from fontTools.ttLib import TTFont
+
+        if not isinstance(font, TTFont):
+            font = TTFont(font, lazy=True)
+        return cls.from_codepoints(font.getBestCmap())
+
+    # ---- 查询 ----
+
+    def intervals(self) -> list[tuple[int, int]]:
+        return list(zip(self._starts, self._ends))
+
+    def __len__(self) -> int:
+        return sum(self._ends) - sum(self._starts)
+
+    def __bool__(self) -> bool:
+        return bool(self._starts)
+
+    def __contains__(self, item: int | str) -> bool:
+        cp = ord(item) if isinstance(item, str) else item
+        i = bisect.bisect_right(self._starts, cp) - 1
+        return i >= 0 and cp < self._ends[i]
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in zip(self._starts, self._ends):
+            yield from range(start, end)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CharSet):
+            return NotImplemented
+        return self._starts == other._starts and self._ends == other._ends
+
+    def __hash__(self) -> int:
+        return hash((self._starts.tobytes(), self._ends.tobytes()))
+
+    def __repr__(self) -> str:
+        return f"CharSet({len(self)} 个码位，{len(self._starts)} 个区间)"
+
+    # ---- 集合运算 ----
+
+    def __or__(self, other: CharSet) -> CharSet:
+        return CharSet(self.intervals() + other.intervals())
+
+    def __and__(self, other: CharSet) -> CharSet:
+        starts = array("L")
+        ends = array("L")
+        a_starts, a_ends = self._starts, self._ends
+        b_starts, b_ends = other._starts, other._ends
+        i = j = 0
+        while i < len(a_starts) and j < len(b_starts):
+            start = max(a_starts[i], b_starts[j])
+            end = min(a_ends[i], b_ends[j])
+            if start < end:
+                starts.append(start)
+                ends.append(end)
+            # 先结束的那个区间不可能再和对面后面的区间相交
+            if a_ends[i] < b_ends[j]:
+                i += 1
+            else:
+                j += 1
+        return CharSet._from_sorted(starts, ends)
+
+    def __sub__(self, other: CharSet) -> CharSet:
+        starts = array("L")
+        ends = array("L")
+        b_starts, b_ends = other._starts, other._ends
+        j = 0
+        for start, end in zip(self._starts, self._ends):
+            # 跳过完全在当前区间左边的减数区间
+            while j < len(b_starts) and b_ends[j] <= start:
+                j += 1
+            k = j
+            while k < len(b_starts) and b_starts[k] < end:
+                if b_starts[k] > start:
+                    starts.append(start)
+                    ends.append(b_starts[k])
+                start = max(start, b_ends[k])
+                k += 1
+            if start < end:
+                starts.append(start)
+                ends.append(end)
+        return CharSet._from_sorted(starts, ends)
+
+    # ---- 序列化 ----
+
+    def to_text(self) -> str:
+        """按码位顺序拼成字符串，可以直接交给子集化。"""
+        return "".join(map(chr, self))
+
+    def to_notation(self, separator: str = ", ") -> str:
+        return separator.join(
+            f"U+{start:X}" if end - start == 1 else f"U+{start:X}-{end - 1:X}"
+            for start, end in zip(self._starts, self._ends)
+        )
+
+
+def _decode_table(encoding: str, leads: Iterable[int], trails: Iterable[int]) -> CharSet:
+    """把一张双字节编码表整张解码。
+
+    所有字节对用换行符隔开后一次 decode：非法字节对会变成 U+FFFD，但换行符
+    是 ASCII，不会被吞进多字节序列，split 之后第 i 段一定对应第 i 个字节对。
+    比逐对 try/except 快一个数量级以上。
+    """
+    trails = list(trails)
+    pairs = [bytes((lead, trail)) for lead in leads for trail in trails]
+    parts = b"\n".join(pairs).decode(encoding, errors="replace").split("\n")
+    if len(parts) != len(pairs):
+        raise ValueError(f"{encoding} 解码结果与字节对数不一致")
+    return CharSet.from_codepoints(ord(part) for part in parts if len(part) == 1 and part != "�")
+
+
+@functools.lru_cache(maxsize=None)
+def gb2312() -> CharSet:
+    """GB2312 全量：6763 个汉字 + 符号区。"""
+    return _decode_table("gb2312", range(0xA1, 0xFF), range(0xA1, 0xFF))
+
+
+@functools.lru_cache(maxsize=None)
+def big5_level1() -> CharSet:
+    """Big5 常用字（一级字区 0xA440–0xC67E）。"""
+    return _decode_table(
+        "big5", range(0xA4, 0xC7), list(range(0x40, 0x7F)) + list(range(0xA1, 0xFF)))
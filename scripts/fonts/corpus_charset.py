@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""按真实文本的字频把衬线字体子集拆成两层。
+
+`build_serif_subset.build_charset()` 不看用没用到，GB2312 的 6763 个汉字全收，
+`--traditional` 再加 Big5 一级字——每次安装都要带上、每次冷启动都要加载。
+这里扫一遍应用里真正会出现的文字，按字频排出两层：
+
+  - core：界面文案（lib/l10n/*.arb、assets 下的报告模板）里出现的每一个字，
+    加上笔记语料里按字频从高到低累计到 `--coverage`（默认 99.9%）为止的字，
+    再加上 `script_chars()` 那几块体积很小的非汉字区；
+  - extension：原先整套字符集（GB2312，可选 Big5）与语料里剩下的长尾。
+
+界面文案不参与按频率截断：一条按钮文字哪怕全库只出现一次，也不能渲染成回退字体。
+ASCII 不计入字频——它一定在 core 里，算进去只会把覆盖率数字冲淡。
+
+笔记语料是可选的，支持应用导出的备份 JSON（取 `quotes[].content`），
+也支持纯文本 / Markdown 文件或整个目录。文本文件按块流式读取，不整体载入内存。
+
+用法：
+    python3 scripts/fonts/corpus_charset.py [--notes 导出.json ...] [--coverage 0.999]
+                                            [--traditional] [--build]
+
+不带 `--build` 只写出两层字符集并打印覆盖率；带上则用源字体分别构建两层产物
+（写进 work_dir，不动 assets/fonts），并报告各层体积；full 行是原来的整套字符集，
+用来对比。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import unicodedata
+from collections import Counter
+from pathlib import Path
+
+from build_serif_subset import (
+    REPO_ROOT,
+    SOURCE_FONT_FILE,
+    SOURCE_FONT_URL,
+    build_font,
+    default_work_dir,
+    download,
+    legacy_chars,
+    script_chars,
+)
+from charset import CharSet
+
+DEFAULT_COVERAGE = 0.999
+
+# 界面文案的来源（相对仓库根目录）。
+UI_GLOBS = ("lib/l10n/*.arb", "assets/*.html", "assets/*.md")
+
+# 纯文本语料的扩展名；目录里其他文件跳过。
+TEXT_SUFFIXES = {".txt", ".md", ".markdown"}
+
+_CHUNK_CHARS = 1 << 20
+
+# 「其中汉字」一列只数 CJK 统一汉字（基本区 + 扩展 A/B……），不含兼容汉字。
+CJK_UNIFIED = CharSet.parse("U+3400-4DBF, U+4E00-9FFF, U+20000-2A6DF, U+2A700-2EBEF, U+30000-3134F")
+
+
+def _countable(ch: str) -> bool:
+    # 空白、控制字符、私用区不需要字形；ASCII 永远在 core 里。
+    return ord(ch) > 0x7F and unicodedata.category(ch)[0] not in "ZC"
+
+
+def _finish(raw: Counter[str]) -> Counter[str]:
+    return Counter({ch: n for ch, n in raw.items() if _countable(ch)})
+
+
+def count_text_file(path: Path, counts: Counter[str]) -> None:
+    """按块流式统计一个文本文件的字频。Counter.update 对字符串是 C 实现，
+    逐块喂进去比逐字循环快一个数量级。"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_CHARS), ""):
+            counts.update(chunk)
+
+
+def count_arb(path: Path, counts: Counter[str]) -> None:
+    """只统计 ARB 的译文，跳过 `@key` 元数据（描述、占位符说明不会显示出来）。"""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    for key, value in data.items():
+        if not key.startswith("@") and isinstance(value, str):
+            counts.update(value)
+
+
+def count_notes_export(path: Path, counts: Counter[str]) -> None:
+    """应用导出的备份 JSON：统计每条笔记的正文。"""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    quotes = data.get("quotes") if isinstance(data, dict) else data
+    for quote in quotes or []:
+        if isinstance(quote, dict) and isinstance(quote.get("content"), str):
+            counts.update(quote["content"])
+
+
+def scan_ui(repo_root: Path = REPO_ROOT) -> Counter[str]:
+    counts: Counter[str] = Counter()
+    for pattern in UI_GLOBS:
+        for path in sorted(repo_root.glob(pattern)):
+            if path.suffix == ".arb":
+                count_arb(path, counts)
+            else:
+                count_text_file(path, counts)
+    return _finish(counts)
+
+
+def scan_notes(paths: list[Path]) -> Counter[str]:
+    counts: Counter[str] = Counter()
+    for root in paths:
+        files = sorted(root.rglob("*")) if root.is_dir() else [root]
+        for path in files:
+            if path.suffix == ".json":
+                count_notes_export(path, counts)
+            elif path.suffix in TEXT_SUFFIXES:
+                count_text_file(path, counts)
+    return _finish(counts)
+
+
+def coverage(chars: CharSet, counts: Counter[str]) -> float:
+    """[chars] 覆盖了 [counts] 里百分之多少的字次。"""
+    total = sum(counts.values())
+    if not total:
+        return 1.0
+    return sum(n for ch, n in counts.items() if ch in chars) / total
+
+
+def split_tiers(
+    ui: Counter[str],
+    notes: Counter[str],
+    include_traditional: bool = False,
+    target: float = DEFAULT_COVERAGE,
+    available: CharSet | None = None,
+) -> tuple[CharSet, CharSet]:
+    """返回 (core, extension)。[available] 是源字体 cmap 里有的字，给了就把没有字形的去掉。"""
+    if available is not None:
+        ui = Counter({ch: n for ch, n in ui.items() if ch in available})
+        notes = Counter({ch: n for ch, n in notes.items() if ch in available})
+    core = script_chars() | CharSet.from_text(ui)
+    combined = ui + notes
+    total = sum(combined.values())
+    covered = sum(n for ch, n in combined.items() if ch in core)
+    picked = []
+    for ch, n in notes.most_common():
+        if total and covered / total >= target:
+            break
+        if ch not in core:
+            picked.append(ch)
+            covered += n
+    core |= CharSet.from_text(picked)
+
+    extension = (legacy_chars(include_traditional) | CharSet.from_text(notes)) - core
+    if available is not None:
+        core &= available
+        extension &= available
+    return core, extension
+
+
+def font_chars(font_path: Path) -> CharSet:
+    return CharSet.from_font(font_path)
+
+
+def _cjk(chars: CharSet) -> int:
+    return len(chars & CJK_UNIFIED)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="按语料字频拆分两层字体子集")
+    parser.add_argument("--notes", type=Path, action="append", default=[],
+                        help="笔记语料：导出的备份 JSON、文本文件或目录，可重复")
+    parser.add_argument("--coverage", type=float, default=DEFAULT_COVERAGE,
+                        help=f"core 层要覆盖的字次比例（默认 {DEFAULT_COVERAGE}）")
+    parser.add_argument("--traditional", action="store_true",
+                        help="extension 层额外收录 Big5 一级常用繁体字")
+    parser.add_argument("--build", action="store_true", help="构建两层字体并报告体积")
+    parser.add_argument("--work-dir", type=Path, default=None,
+                        help="源字体、字符集与产物目录，默认为下载缓存根目录下的 fonts-work")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or default_work_dir()
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    ui = scan_ui()
+    notes = scan_notes(args.notes)
+    print(f"界面文案：{len(ui)} 个不同字符，{sum(ui.values())} 字次")
+    if args.notes:
+        print(f"笔记语料：{len(notes)} 个不同字符，{sum(notes.values())} 字次")
+
+    available = None
+    source_font = work_dir / SOURCE_FONT_FILE
+    if args.build:
+        download(SOURCE_FONT_URL, source_font)
+    if source_font.exists():
+        available = font_chars(source_font)
+
+    core, extension = split_tiers(ui, notes, args.traditional, args.coverage, available)
+    legacy = legacy_chars(args.traditional) | script_chars()
+    combined = ui + notes
+    if available is not None:
+        # 源字体本来就没有字形的字（比如谚文）不管怎么分层都会回退，不计入覆盖率。
+        legacy &= available
+        missing = Counter({ch: n for ch, n in combined.items() if ch not in available})
+        combined -= missing
+        if missing:
+            share = sum(missing.values()) / (sum(missing.values()) + sum(combined.values()))
+            print(f"源字体没有字形：{len(missing)} 个不同字符，占 {share * 100:.2f}% 字次（不计入覆盖率）")
+
+    print(f"\n{'层':<10s}{'字符数':>8s}{'其中汉字':>10s}{'语料覆盖':>10s}{'体积':>12s}")
+    tiers = [("core", core), ("extension", extension), ("full", legacy)]
+    for name, chars in tiers:
+        charset = chars.to_text()
+        (work_dir / f"tier-{name}.txt").write_text(charset, encoding="utf-8")
+        size = "-"
+        if args.build:
+            out_path = work_dir / f"NotoSerifSC-{name.capitalize()}.ttf"
+            build_font(source_font, charset, out_path)
+            size = f"{out_path.stat().st_size / 1024 / 1024:.2f} MB"
+        print(f"{name:<10s}{len(chars):>8d}{_cjk(chars):>10d}"
+              f"{coverage(chars, combined) * 100:>9.3f}%{size:>12s}")
+
+    both = coverage(core | extension, combined)
+    print(f"\ncore + extension 覆盖 {both * 100:.3f}% 字次；字符集已写入 {work_dir}")
+    if available is None:
+        print("（未找到源字体，未剔除源字体里没有字形的字符；加 --build 会先下载）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""把构建好的字体体积拆开看：按表、按 Unicode 区块、按 build_charset 的条目。
+
+`build_serif_subset.py` 最后只打印一个 `size_mb`。`--traditional` 那 +1.6MB、
+希腊 / 西里尔字母那几条值不值得带，光看总数没法判断。这里把体积归到三个维度：
+
+  - 表：直接读 sfnt 目录里每张表的长度（glyf、gvar、GSUB、GPOS、cmap……），
+    不解析表内容；
+  - 字形：每个字形在 glyf 里的字节数取自 loca 相邻偏移之差，在 gvar 里的字节数
+    取自 gvar 头部的偏移数组——同样不解码轮廓和 delta，几千个字形也是毫秒级；
+  - 码位：按 cmap 把字形字节记到码位上（多个码位共用一个字形时平摊），再汇总到
+    Unicode 区块和 build_charset 的各条来源（SCRIPT_RANGES、GB2312、Big5……）。
+
+只有 GSUB 能到达、cmap 里没有的字形（竖排、合字等）单独记成「未映射」。
+
+用法：
+    python3 scripts/fonts/font_report.py [字体.ttf] [--top 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import struct
+from collections import defaultdict
+from pathlib import Path
+
+from build_serif_subset import EXTRA_SYMBOLS, OUT_FONT, SCRIPT_RANGES, legacy_chars
+
+# 字体里可能出现的 Unicode 区块（起、止、名称），按起点排序。没列出的归「其他」。
+UNICODE_BLOCKS = [
+    (0x0000, 0x007F, "Basic Latin"),
+    (0x0080, 0x00FF, "Latin-1 Supplement"),
+    (0x0100, 0x017F, "Latin Extended-A"),
+    (0x0180, 0x024F, "Latin Extended-B"),
+    (0x0250, 0x02AF, "IPA Extensions"),
+    (0x02B0, 0x02FF, "Spacing Modifier Letters"),
+    (0x0300, 0x036F, "Combining Diacritical Marks"),
+    (0x0370, 0x03FF, "Greek and Coptic"),
+    (0x0400, 0x04FF, "Cyrillic"),
+    (0x1E00, 0x1EFF, "Latin Extended Additional"),
+    (0x2000, 0x206F, "General Punctuation"),
+    (0x2070, 0x209F, "Superscripts and Subscripts"),
+    (0x20A0, 0x20CF, "Currency Symbols"),
+    (0x2100, 0x214F, "Letterlike Symbols"),
+    (0x2150, 0x218F, "Number Forms"),
+    (0x2190, 0x21FF, "Arrows"),
+    (0x2200, 0x22FF, "Mathematical Operators"),
+    (0x2300, 0x23FF, "Miscellaneous Technical"),
+    (0x2460, 0x24FF, "Enclosed Alphanumerics"),
+    (0x2500, 0x257F, "Box Drawing"),
+    (0x2580, 0x259F, "Block Elements"),
+    (0x25A0, 0x25FF, "Geometric Shapes"),
+    (0x2600, 0x26FF, "Miscellaneous Symbols"),
+    (0x2E80, 0x2EFF, "CJK Radicals Supplement"),
+    (0x2F00, 0x2FDF, "Kangxi Radicals"),
+    (0x2FF0, 0x2FFF, "Ideographic Description Characters"),
+    (0x3000, 0x303F, "CJK Symbols and Punctuation"),
+    (0x3040, 0x309F, "Hiragana"),
+    (0x30A0, 0x30FF, "Katakana"),
+    (0x3100, 0x312F, "Bopomofo"),
+    (0x3130, 0x318F, "Hangul Compatibility Jamo"),
+    (0x3190, 0x319F, "Kanbun"),
+    (0x31A0, 0x31BF, "Bopomofo Extended"),
+    (0x31C0, 0x31EF, "CJK Strokes"),
+    (0x31F0, 0x31FF, "Katakana Phonetic Extensions"),
+    (0x3200, 0x32FF, "Enclosed CJK Letters and Months"),
+    (0x3300, 0x33FF, "CJK Compatibility"),
+    (0x3400, 0x4DBF, "CJK Unified Ideographs Extension A"),
+    (0x4E00, 0x9FFF, "CJK Unified Ideographs"),
+    (0xAC00, 0xD7AF, "Hangul Syllables"),
+    (0xE000, 0xF8FF, "Private Use Area"),
+    (0xF900, 0xFAFF, "CJK Compatibility Ideographs"),
+    (0xFE10, 0xFE1F, "Vertical Forms"),
+    (0xFE30, 0xFE4F, "CJK Compatibility Forms"),
+    (0xFE50, 0xFE6F, "Small Form Variants"),
+    (0xFF00, 0xFFEF, "Halfwidth and Fullwidth Forms"),
+    (0x20000, 0x2A6DF, "CJK Unified Ideographs Extension B"),
+    (0x2A700, 0x2EBEF, "CJK Unified Ideographs Extension C–F"),
+    (0x2F800, 0x2FA1F, "CJK Compatibility Ideographs Supplement"),
+]
+_BLOCK_STARTS = [start for start, _, _ in UNICODE_BLOCKS]
+
+UNMAPPED = "未映射（GSUB 变体等）"
+OTHER = "其他"
+
+_GVAR_HEADER = struct.Struct(">HHHHIHHI")
+
+
+def unicode_block(cp: int) -> str:
+    i = bisect.bisect_right(_BLOCK_STARTS, cp) - 1
+    if i >= 0 and cp <= UNICODE_BLOCKS[i][1]:
+        return UNICODE_BLOCKS[i][2]
+    return OTHER
+
+
+def charset_sources() -> dict[int, str]:
+    """码位 → build_charset 里把它带进来的那一条；先列的条目优先。"""
+    sources: dict[int, str] = {}
+    for r, label in SCRIPT_RANGES:
+        for cp in r:
+            sources.setdefault(cp, label)
+    for cp in EXTRA_SYMBOLS:
+        sources.setdefault(cp, "零散符号")
+    simplified = legacy_chars(False)
+    for cp in simplified:
+        sources.setdefault(cp, "GB2312")
+    for cp in legacy_chars(True) - simplified:
+        sources.setdefault(cp, "Big5 一级（GB2312 以外）")
+    return sources
+
+
+def table_sizes(font) -> dict[str, int]:
+    return {tag: entry.length for tag, entry in font.reader.tables.items()}
+
+
+def _offset_deltas(offsets: list[int]) -> list[int]:
+    return [end - start for start, end in zip(offsets, offsets[1:])]
+
+
+def glyph_sizes(font) -> tuple[list[int], list[int]]:
+    """每个字形在 glyf 与 gvar 里各占多少字节（按 glyph ID 排列）。"""
+    glyph_count = font["maxp"].numGlyphs
+    glyf = [0] * glyph_count
+    if "loca" in font:
+        glyf = _offset_deltas(list(font["loca"].locations))[:glyph_count]
+
+    gvar = [0] * glyph_count
+    if "gvar" in font.reader:
+        data = font.reader["gvar"]
+        (_, _, _, _, _, count, flags, _) = _GVAR_HEADER.unpack_from(data, 0)
+        if flags & 1:
+            offsets = struct.unpack_from(f">{count + 1}I", data, _GVAR_HEADER.size)
+        else:
+            # 短偏移存的是实际偏移的一半
+            offsets = [o * 2 for o in struct.unpack_from(f">{count + 1}H", data, _GVAR_HEADER.size)]
+        gvar = _offset_deltas(list(offsets))[:glyph_count]
+    return glyf, gvar
+
+
+def attribute(font) -> dict[str, dict[str, list[float]]]:
+    """返回 {'block': {名: [码位数, glyf, gvar]}, 'source': {...}}。"""
+    glyf, gvar = glyph_sizes(font)
+    order = font.getGlyphOrder()
+    cmap = font.getBestCmap()
+    users: dict[str, list[int]] = defaultdict(list)
+    for cp, glyph_name in cmap.items():
+        users[glyph_name].append(cp)
+
+    sources = charset_sources()
+    report: dict[str, dict[str, list[float]]] = {
+        "block": defaultdict(lambda: [0, 0.0, 0.0]),
+        "source": defaultdict(lambda: [0, 0.0, 0.0]),
+    }
+    for gid, glyph_name in enumerate(order):
+        cps = users.get(glyph_name)
+        if not cps:
+            for kind in report.values():
+                row = kind[UNMAPPED]
+                row[1] += glyf[gid]
+                row[2] += gvar[gid]
+            continue
+        share = 1 / len(cps)
+        for cp in cps:
+            for kind, key in (("block", unicode_block(cp)), ("source", sources.get(cp, OTHER))):
+                row = report[kind][key]
+                row[0] += 1
+                row[1] += glyf[gid] * share
+                row[2] += gvar[gid] * share
+    return report
+
+
+def _kb(n: float) -> str:
+    return f"{n / 1024:10.1f} KB"
+
+
+def print_report(path: Path, top: int) -> None:
+    from fontTools.ttLib import TTFont
+
+    font = TTFont(path, lazy=True)
+    total = path.stat().st_size
+    print(f"{path}  {total / 1024 / 1024:.2f} MB，{font['maxp'].numGlyphs} 个字形")
+
+    print(f"\n{'表':<8s}{'体积':>13s}{'占比':>8s}")
+    for tag, size in sorted(table_sizes(font).items(), key=lambda item: -item[1]):
+        print(f"{tag:<8s}{_kb(size)}{size / total * 100:7.1f}%")
+
+    report = attribute(font)
+    titles = {"source": "build_charset 条目", "block": "Unicode 区块"}
+    for kind in ("source", "block"):
+        rows = sorted(report[kind].items(), key=lambda item: -(item[1][1] + item[1][2]))
+        print(f"\n{titles[kind]:<40s}{'码位':>6s}{'glyf':>13s}{'gvar':>13s}{'合计占比':>8s}")
+        for name, (count, glyf, gvar) in rows[:top]:
+            print(f"{name:<40s}{count:>6d}{_kb(glyf)}{_kb(gvar)}{(glyf + gvar) / total * 100:7.1f}%")
+        if len(rows) > top:
+            rest = rows[top:]
+            glyf = sum(row[1] for _, row in rest)
+            gvar = sum(row[2] for _, row in rest)
+            label = f"（其余 {len(rest)} 项）"
+            print(f"{label:<40s}{sum(row[0] for _, row in rest):>6d}{_kb(glyf)}{_kb(gvar)}"
+                  f"{(glyf + gvar) / total * 100:7.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="按表、Unicode 区块与字符集条目拆分字体体积")
+    parser.add_argument("font", nargs="?", type=Path, default=OUT_FONT,
+                        help="要分析的字体，默认 assets/fonts/NotoSerifSC-Subset.ttf")
+    parser.add_argument("--top", type=int, default=20, help="每个维度最多列出几项（默认 20）")
+    args = parser.parse_args()
+    if not args.font.exists():
+        raise SystemExit(f"找不到字体：{args.font}（先运行 build_serif_subset.py）")
+    print_report(args.font, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""把衬线字体子集切成按 unicode-range 分片的 WOFF2，给 web 构建按需加载。
+
+单个 TTF 在 web 上必须整个下载完，衬线正文才会出现——首屏时间基本就耗在这上面。
+这里把已经构建好的 `NotoSerifSC-Subset.ttf` 按字频切片：
+
+  - 第 0 片：`script_chars()` 的非汉字区（拉丁、标点、假名……），字形少、处处要用；
+  - 之后每片 [SHARD_CHARS] 个字，按「界面文案（ARB、报告模板）字频 → GB2312
+    一级字 → 二级字 → 其他」排序：第 1 片就是界面最常用的那批汉字，首屏通常
+    只需要前一两片；
+  - 每片都保留可变字重轴，文件名带内容哈希，可以放心设长缓存。
+
+同时生成：
+  - `manifest.json`：每片的文件名、unicode-range、码位数、字节数，供加载器使用；
+  - `NotoSerifSC.css`：每片一条 `@font-face`，浏览器按页面实际用到的字只下载
+    需要的分片。
+
+WOFF2 需要 brotli（`pip install brotli`）；没装时退回 WOFF（zlib），并给出提示。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+from pathlib import Path
+
+from fontTools import subset as ft_subset
+
+from charset import CharSet
+
+# 每个分片（第 0 片除外）的码位数。CJK 字形每个约 1KB（含 gvar），
+# 一片 1000 字压缩后一百多 KB，请求数和单片体积比较均衡。
+SHARD_CHARS = 1000
+
+WEIGHT_CSS = "400 900"
+
+
+def woff2_available() -> bool:
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _gb2312_rank(ch: str) -> int:
+    """GB2312 一级字（常用，0xB0–0xD7 区）排 0，二级字排 1，其余排 2。"""
+    try:
+        hi = ch.encode("gb2312")[0]
+    except UnicodeEncodeError:
+        return 2
+    if 0xB0 <= hi <= 0xD7:
+        return 0
+    if 0xD8 <= hi <= 0xF7:
+        return 1
+    return 2
+
+
+def order_codepoints(cmap: CharSet, first: CharSet, counts: dict[str, int]) -> list[list[int]]:
+    """把字体里的码位排成分片：第 0 片是 [first]，其余按字频切成 [SHARD_CHARS] 一片。"""
+    head = list(cmap & first)
+    rest = sorted(
+        cmap - first,
+        key=lambda cp: (-counts.get(chr(cp), 0), _gb2312_rank(chr(cp)), cp),
+    )
+    shards = [head] if head else []
+    shards += [rest[i:i + SHARD_CHARS] for i in range(0, len(rest), SHARD_CHARS)]
+    return shards
+
+
+def unicode_range(codepoints: list[int]) -> str:
+    """[0x41, 0x42, 0x43, 0x4E00] → "U+41-43, U+4E00"（CSS unicode-range 写法）。"""
+    return CharSet.from_codepoints(codepoints).to_notation()
+
+
+def _encode_shard(font_bytes: bytes, codepoints: list[int], flavor: str) -> bytes:
+    options = ft_subset.Options()
+    options.flavor = flavor
+    # 输入已经是裁好的子集，版式特性与 name 表照单全收，这里只按码位再切。
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    font = ft_subset.load_font(io.BytesIO(font_bytes), options, dontLoadGlyphNames=True)
+    subsetter = ft_subset.Subsetter(options=options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    ft_subset.save_font(font, buffer, options)
+    return buffer.getvalue()
+
+
+def build_shards(
+    font_path: Path,
+    out_dir: Path,
+    family: str,
+    first: CharSet,
+    counts: dict[str, int],
+) -> dict:
+    """把 [font_path] 切片写进 [out_dir]，返回写出的 manifest。"""
+    flavor = "woff2" if woff2_available() else "woff"
+    if flavor == "woff":
+        print("⚠ 没有安装 brotli，分片退回 WOFF 格式（pip install brotli 后重跑即可得到 WOFF2）")
+
+    font_bytes = font_path.read_bytes()
+    cmap = CharSet.from_font(io.BytesIO(font_bytes))
+    shards = order_codepoints(cmap, first, counts)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # 上一次的分片内容哈希不同、文件名也不同，先清掉免得越积越多。
+    for stale in out_dir.glob(f"{family}.*.woff*"):
+        stale.unlink()
+
+    entries = []
+    css = []
+    for index, codepoints in enumerate(shards):
+        data = _encode_shard(font_bytes, codepoints, flavor)
+        digest = hashlib.sha256(data).hexdigest()
+        file_name = f"{family}.{index}.{digest[:10]}.{flavor}"
+        (out_dir / file_name).write_bytes(data)
+        urange = unicode_range(codepoints)
+        entries.append({
+            "file": file_name,
+            "unicodeRange": urange,
+            "codepoints": len(codepoints),
+            "bytes": len(data),
+            "sha256": digest,
+        })
+        css.append(
+            "@font-face {\n"
+            f"  font-family: '{family}';\n"
+            "  font-style: normal;\n"
+            f"  font-weight: {WEIGHT_CSS};\n"
+            "  font-display: swap;\n"
+            f"  src: url('{file_name}') format('{flavor}');\n"
+            f"  unicode-range: {urange};\n"
+            "}\n"
+        )
+        print(f"  分片 {index:2d}：{len(codepoints):5d} 个码位  {len(data) / 1024:8.1f} KB")
+
+    manifest = {
+        "family": family,
+        "format": flavor,
+        "weight": WEIGHT_CSS,
+        "source": {"file": font_path.name, "sha256": hashlib.sha256(font_bytes).hexdigest()},
+        "shards": entries,
+    }
+    (out_dir / "manifest.json").write_text(
+        json.dumps(manifest, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    (out_dir / f"{family}.css").write_text("\n".join(css), encoding="utf-8")
+
+    total = sum(entry["bytes"] for entry in entries)
+    print(f"web 分片：{len(entries)} 片，共 {total / 1024 / 1024:.2f} MB，"
+          f"首片 {entries[0]['bytes'] / 1024:.1f} KB → {out_dir}")
+    return manifest
@@ -2,12 +2,17 @@
 """
 生成高质量的 Windows 应用程序图标（.ico）
 包含多种分辨率以避免在任务栏、安装包等位置失真
-使用 ImageMagick 确保最佳兼容性和质量
+各尺寸帧由共享缩放金字塔生成，用进程内的 ICO 编码器写出，不依赖 ImageMagick
 """
 
 import os
 import sys
-import subprocess
+
+from icon_pipeline import ResizePyramid, find_source_icon, get_project_root, source_candidates
+from ico_writer import IcoError, write_ico
+
+# ICO 包含的尺寸（从大到小）
+APP_ICON_SIZES = [256, 128, 96, 64, 48, 32, 24, 16]
 
 def generate_high_quality_ico(source_path, output_path):
     """
@@ -22,53 +27,30 @@ def generate_high_quality_ico(source_path, output_path):
     - 96x96: 超高 DPI
     - 128x128: 大图标视图
     - 256x256: 超大图标视图、Windows 10/11 高 DPI
+
+    source_path 也可以是已解码的 PIL 图像或共享的 ResizePyramid
     """
     
     print(f"正在从 {source_path} 生成高质量 ICO 文件...")
     
     try:
-        # 检查 ImageMagick 是否安装
-        result = subprocess.run(['convert', '--version'], 
-                              capture_output=True, text=True, check=False)
-        if result.returncode != 0:
-            print("❌ 错误：未安装 ImageMagick")
-            print("   请运行: sudo apt-get install imagemagick")
-            return False
+        if isinstance(source_path, str):
+            pyramid = ResizePyramid.from_file(source_path)
+        else:
+            pyramid = ResizePyramid.of(source_path)
         
-        # 使用 ImageMagick 生成包含多种尺寸的 ICO
-        # -define icon:auto-resize 会自动生成指定尺寸的图标
-        cmd = [
-            'convert',
-            source_path,
-            '-background', 'transparent',
-            '-define', 'icon:auto-resize=256,128,96,64,48,32,24,16',
-            output_path
-        ]
+        # 各尺寸帧只缩放一次，256px 存 PNG，其余存 32 位 BMP
+        frames = [pyramid.get(size) for size in APP_ICON_SIZES]
         
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        
-        # 验证生成的 ICO 文件
-        identify_result = subprocess.run(
-            ['identify', output_path],
-            capture_output=True, text=True, check=True
-        )
-        
-        # 统计包含的图标数量
-        icon_count = len(identify_result.stdout.strip().split('\n'))
+        # 写入后解析 ICO 目录校验每一帧
+        entries = write_ico(output_path, frames)
         
         print(f"\n✅ 成功生成高质量 ICO 文件: {output_path}")
-        print(f"   包含 {icon_count} 种尺寸")
+        print(f"   包含 {len(entries)} 种尺寸")
         
         # 显示所有尺寸
-        for line in identify_result.stdout.strip().split('\n'):
-            if 'ICO' in line or 'PNG' in line:
-                # 提取尺寸信息
-                parts = line.split()
-                for i, part in enumerate(parts):
-                    if 'x' in part and part.replace('x', '').replace('+', '').replace('0', '').isdigit():
-                        size = part.split('+')[0] if '+' in part else part
-                        print(f"   ✓ {size}")
-                        break
+        for entry in entries:
+            print(f"   ✓ {entry['width']}x{entry['height']} ({entry['format']})")
         
         # 验证文件大小
         file_size = os.path.getsize(output_path)
@@ -76,10 +58,8 @@ def generate_high_quality_ico(source_path, output_path):
         
         return True
         
-    except subprocess.CalledProcessError as e:
-        print(f"❌ 运行 ImageMagick 时出错: {e}")
-        if e.stderr:
-            print(f"   错误信息: {e.stderr}")
+    except IcoError as e:
+        print(f"❌ ICO 校验失败: {e}")
         return False
     except Exception as e:
         print(f"❌ 生成 ICO 文件时出错: {e}")
@@ -87,26 +67,15 @@ def generate_high_quality_ico(source_path, output_path):
 
 def main():
     # 项目根目录
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir)
+    project_root = get_project_root()
     
     # 源图标路径（使用项目中的高分辨率源图）
-    source_candidates = [
-        os.path.join(project_root, 'icon.png'),
-        os.path.join(project_root, 'res', 'icon.png'),
-        os.path.join(project_root, 'assets', 'icon.png'),
-    ]
-    
-    source_path = None
-    for candidate in source_candidates:
-        if os.path.exists(candidate):
-            source_path = candidate
-            break
+    source_path = find_source_icon(project_root)
     
     if not source_path:
         print("❌ 错误：找不到源图标文件")
         print("   请确保以下任一路径存在高分辨率 PNG 图标：")
-        for path in source_candidates:
+        for path in source_candidates(project_root):
             print(f"   - {path}")
         sys.exit(1)
     
@@ -4,51 +4,183 @@
 解决 10.1.1.11 On Device Tiles 认证问题
 """
 
-from PIL import Image
+from icon_pipeline import (
+    DEFAULT_RESAMPLE, RESAMPLE_MODES, ResizePyramid, find_source_icon,
+    get_project_root,
+)
+from asset_cache import AssetCache
+from png_optimizer import DEFAULT_BUDGET, DEFAULT_MAX_ERROR, optimize_image
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import io
 import os
 
-def generate_tile_icon(source_img, output_path, size, description):
+def tile_cache_params(pyramid, size, optimize_budget=None):
+    """磁贴产物的增量缓存参数：目标尺寸 + 重采样方式 + PNG 编码参数"""
+    params = {
+        'kind': 'tile',
+        'size': [size, size],
+        'format': 'PNG',
+        'optimize': True,
+    }
+    params.update(pyramid.cache_params())
+    if optimize_budget is not None:
+        params['png_optimizer'] = {'budget': optimize_budget, 'max_error': DEFAULT_MAX_ERROR}
+    return params
+
+def encode_tile(pyramid, size, optimize_budget=None):
+    """
+    缩放并编码单个磁贴，返回 PNG 字节
+    串行与进程池两条路径共用这一个函数，保证产物逐字节一致
+
+    optimize_budget 不为 None 时经过多策略 PNG 优化器（每个文件的秒数预算）。
+    预算把尝试截断时产物取决于机器快慢，此时不再保证串行/并行逐字节一致
+    """
+    # 从共享金字塔取图（高质量的 Lanczos 算法缩放）
+    resized = pyramid.get(size)
+    
+    if optimize_budget is not None:
+        return optimize_image(resized, budget=optimize_budget)['data']
+    
+    # 编码为 PNG 格式
+    buffer = io.BytesIO()
+    resized.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+def write_tile(data, output_paths):
+    """把同一份编码结果写到所有同尺寸的输出路径"""
+    for output_path in output_paths:
+        with open(output_path, 'wb') as f:
+            f.write(data)
+
+def generate_tile_icon(source_img, output_path, size, description, cache=None,
+                       optimize_budget=None):
     """
     生成指定尺寸的高质量磁贴图标
     使用 Lanczos 重采样确保清晰度
+
+    source_img 可以是 PIL 图像或共享的 ResizePyramid，
+    同一尺寸在金字塔里只缩放一次；传入 cache 时未变化的产物直接跳过
     """
-    # 使用高质量的 Lanczos 算法缩放
-    resized = source_img.resize((size, size), Image.Resampling.LANCZOS)
+    source_img = ResizePyramid.of(source_img)
+    params = tile_cache_params(source_img, size, optimize_budget)
+    if cache is not None and cache.is_fresh(output_path, params):
+        file_size = os.path.getsize(output_path) / 1024
+        print(f"  · {description:30s} - {size}x{size}px - {file_size:.1f}KB（未变化，跳过）")
+        return output_path
     
-    # 保存为 PNG 格式
-    resized.save(output_path, format='PNG', optimize=True)
+    write_tile(encode_tile(source_img, size, optimize_budget), [output_path])
+    if cache is not None:
+        cache.record(output_path, params)
     
     file_size = os.path.getsize(output_path) / 1024
     print(f"  ✓ {description:30s} - {size}x{size}px - {file_size:.1f}KB")
     
     return output_path
 
-def generate_scaled_tiles(source_img, base_path, base_name, base_size, scales):
+def scaled_tile_jobs(base_path, base_name, base_size, scales):
     """
-    生成不同 DPI 缩放的磁贴图标
+    列出不同 DPI 缩放的磁贴图标任务 [(输出路径, 尺寸, 描述), ...]
     例如：Square150x150Logo.scale-100.png, Square150x150Logo.scale-125.png 等
     """
-    results = []
+    # 基础版本（无缩放后缀）
+    jobs = [(os.path.join(base_path, f"{base_name}.png"), base_size, f"{base_name}")]
     
-    # 生成基础版本（无缩放后缀）
-    base_output = os.path.join(base_path, f"{base_name}.png")
-    generate_tile_icon(source_img, base_output, base_size, f"{base_name}")
-    results.append(base_output)
-    
-    # 生成不同缩放版本
+    # 不同缩放版本
     for scale in scales:
         scaled_size = int(base_size * scale / 100)
         output_name = f"{base_name}.scale-{scale}.png"
         output_path = os.path.join(base_path, output_name)
-        generate_tile_icon(source_img, output_path, scaled_size, f"{base_name} @{scale}%")
-        results.append(output_path)
+        jobs.append((output_path, scaled_size, f"{base_name} @{scale}%"))
     
-    return results
+    return jobs
+
+# 进程池 worker 内的缩放金字塔：每个 worker 只解码一次源图
+_worker_pyramid = None
+
+def _init_tile_worker(seed, min_ratio, mode):
+    global _worker_pyramid
+    if isinstance(seed, str):
+        _worker_pyramid = ResizePyramid.from_file(seed, min_ratio, mode)
+    else:
+        _worker_pyramid = ResizePyramid(seed, min_ratio, mode)
+
+def _render_tile_job(size, output_paths, optimize_budget):
+    write_tile(encode_tile(_worker_pyramid, size, optimize_budget), output_paths)
+    return size
 
-def generate_all_msix_tiles():
+def run_tile_jobs(pyramid, groups, cache=None, jobs=1, optimize_budget=None):
+    """
+    按分组执行磁贴任务，返回生成（或缓存命中）的文件路径列表
+
+    groups 为 [(分组标题, [(输出路径, 尺寸, 描述), ...]), ...]。
+    jobs > 1 时把待生成的尺寸分发到进程池，同尺寸的多个输出只编码一次，
+    最大的尺寸最先提交（400% 磁贴的 PNG 优化最耗时）；进度仍按分组顺序打印。
+    optimize_budget 见 encode_tile
+    """
+    # 先过缓存，剩下的按尺寸归并
+    fresh = set()
+    pending = {}
+    for _, items in groups:
+        for output_path, size, _ in items:
+            if cache is not None and cache.is_fresh(output_path, tile_cache_params(pyramid, size, optimize_budget)):
+                fresh.add(output_path)
+            else:
+                pending.setdefault(size, []).append(output_path)
+    
+    futures = {}
+    encoded = {}
+    executor = None
+    if jobs > 1 and len(pending) > 1:
+        seed = pyramid.path or pyramid.source
+        executor = ProcessPoolExecutor(
+            max_workers=min(jobs, len(pending)),
+            initializer=_init_tile_worker,
+            initargs=(seed, pyramid.min_ratio, pyramid.mode),
+        )
+        for size in sorted(pending, reverse=True):
+            futures[size] = executor.submit(_render_tile_job, size, pending[size], optimize_budget)
+    
+    generated = []
+    try:
+        for title, items in groups:
+            print(f"\n{title}")
+            for output_path, size, description in items:
+                if output_path in fresh:
+                    file_size = os.path.getsize(output_path) / 1024
+                    print(f"  · {description:30s} - {size}x{size}px - {file_size:.1f}KB（未变化，跳过）")
+                    generated.append(output_path)
+                    continue
+                
+                if size in futures:
+                    futures[size].result()
+                elif size not in encoded:
+                    encoded[size] = encode_tile(pyramid, size, optimize_budget)
+                    write_tile(encoded[size], pending[size])
+                if cache is not None:
+                    cache.record(output_path, tile_cache_params(pyramid, size, optimize_budget))
+                
+                file_size = os.path.getsize(output_path) / 1024
+                print(f"  ✓ {description:30s} - {size}x{size}px - {file_size:.1f}KB")
+                generated.append(output_path)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    
+    return generated
+
+def generate_all_msix_tiles(source=None, project_root=None, cache=None, force=False, jobs=1,
+                            optimize_budget=None, resample=DEFAULT_RESAMPLE):
     """
     生成所有 MSIX 需要的磁贴图标
     符合 Microsoft Store 认证要求
+
+    source 可传入已解码的 PIL 图像或共享的 ResizePyramid（由 icon_pipeline
+    统一渲染时使用），省略时自行查找源图标；cache 为共享的 AssetCache，
+    省略时按找到的源图标自建一份，force=True 时忽略缓存全部重建；
+    jobs > 1 时用进程池并行生成，产物与串行逐字节一致；
+    optimize_budget 不为 None 时每个磁贴再经过 png_optimizer（单文件秒数预算）；
+    resample 为自行解码源图时的重采样模式（见 icon_pipeline.RESAMPLE_MODES）
     """
     print("=" * 70)
     print("Microsoft Store 高质量磁贴图标生成器")
@@ -56,37 +188,32 @@ def generate_all_msix_tiles():
     print("=" * 70)
     print()
     
-    # 查找源图标
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir)
-    
-    source_paths = [
-        os.path.join(project_root, 'icon.png'),
-        os.path.join(project_root, 'res', 'icon.png'),
-        os.path.join(project_root, 'assets', 'icon.png'),
-    ]
-    
-    source_icon = None
-    for path in source_paths:
-        if os.path.exists(path):
-            source_icon = path
-            print(f"✓ 找到源图标: {path}")
-            break
+    project_root = project_root or get_project_root()
+    own_cache = False
     
-    if not source_icon:
-        print("✗ 错误: 找不到源图标文件")
-        return False
+    if source is None:
+        # 查找源图标
+        source_icon = find_source_icon(project_root)
+        if not source_icon:
+            print("✗ 错误: 找不到源图标文件")
+            return False
+        print(f"✓ 找到源图标: {source_icon}")
+        
+        # 打开源图像（只读文件头，真正需要缩放时才解码）
+        try:
+            source = ResizePyramid.from_file(source_icon, mode=resample)
+        except Exception as e:
+            print(f"✗ 无法打开源图像: {e}")
+            return False
+        
+        if cache is None:
+            cache = AssetCache(project_root, source_icon, force=force)
+            own_cache = True
     
-    # 打开源图像
-    try:
-        img = Image.open(source_icon)
-        if img.mode != 'RGBA':
-            img = img.convert('RGBA')
-        print(f"✓ 源图像尺寸: {img.size}")
-        print()
-    except Exception as e:
-        print(f"✗ 无法打开源图像: {e}")
-        return False
+    # 所有磁贴共用一个缩放金字塔
+    pyramid = ResizePyramid.of(source, mode=resample)
+    print(f"✓ 源图像尺寸: {pyramid.size}（重采样: {pyramid.mode}）")
+    print()
     
     # 创建输出目录
     output_dir = os.path.join(project_root, 'windows', 'runner', 'resources', 'tiles')
@@ -101,34 +228,29 @@ def generate_all_msix_tiles():
     print("正在生成磁贴图标...")
     print("-" * 70)
     
-    all_generated = []
-    
-    # 1. Square 44x44 Logo (小磁贴，用于应用列表)
-    print("\n📱 Square 44x44 Logo (应用列表图标)")
-    generated = generate_scaled_tiles(img, output_dir, "Square44x44Logo", 44, scales)
-    all_generated.extend(generated)
-    
-    # 2. Square 71x71 Logo (小磁贴)
-    print("\n📱 Square 71x71 Logo (小磁贴)")
-    output_path = os.path.join(output_dir, "Square71x71Logo.png")
-    generate_tile_icon(img, output_path, 71, "Square71x71Logo")
-    all_generated.append(output_path)
-    
-    # 3. Square 150x150 Logo (中等磁贴) - 最重要的一个
-    print("\n📱 Square 150x150 Logo (中等磁贴 - 主要显示)")
-    generated = generate_scaled_tiles(img, output_dir, "Square150x150Logo", 150, scales)
-    all_generated.extend(generated)
-    
-    # 4. Square 310x310 Logo (大磁贴)
-    print("\n📱 Square 310x310 Logo (大磁贴)")
-    output_path = os.path.join(output_dir, "Square310x310Logo.png")
-    generate_tile_icon(img, output_path, 310, "Square310x310Logo")
-    all_generated.append(output_path)
+    groups = [
+        # 1. Square 44x44 Logo (小磁贴，用于应用列表)
+        ("📱 Square 44x44 Logo (应用列表图标)",
+         scaled_tile_jobs(output_dir, "Square44x44Logo", 44, scales)),
+        # 2. Square 71x71 Logo (小磁贴)
+        ("📱 Square 71x71 Logo (小磁贴)",
+         [(os.path.join(output_dir, "Square71x71Logo.png"), 71, "Square71x71Logo")]),
+        # 3. Square 150x150 Logo (中等磁贴) - 最重要的一个
+        ("📱 Square 150x150 Logo (中等磁贴 - 主要显示)",
+         scaled_tile_jobs(output_dir, "Square150x150Logo", 150, scales)),
+        # 4. Square 310x310 Logo (大磁贴)
+        ("📱 Square 310x310 Logo (大磁贴)",
+         [(os.path.join(output_dir, "Square310x310Logo.png"), 310, "Square310x310Logo")]),
+        # 5. Wide 310x150 Logo (宽磁贴)
+        ("📱 Wide 310x150 Logo (宽磁贴)",
+         scaled_tile_jobs(output_dir, "Wide310x150Logo", 310, scales)),
+    ]
     
-    # 5. Wide 310x150 Logo (宽磁贴)
-    print("\n📱 Wide 310x150 Logo (宽磁贴)")
-    generated = generate_scaled_tiles(img, output_dir, "Wide310x150Logo", 310, scales)
-    all_generated.extend(generated)
+    if jobs > 1:
+        print(f"⚙️  并行进程数: {jobs}")
+    if optimize_budget is not None:
+        print(f"🗜️  PNG 优化器: 每个文件预算 {optimize_budget}s")
+    all_generated = run_tile_jobs(pyramid, groups, cache, jobs, optimize_budget)
     
     print()
     print("-" * 70)
@@ -139,11 +261,29 @@ def generate_all_msix_tiles():
     total_size = sum(os.path.getsize(f) for f in all_generated) / 1024
     print(f"💾 总大小: {total_size:.1f} KB")
     
+    if own_cache:
+        cache.save()
+        print(f"♻️  增量缓存: 命中 {cache.hits} 个，重新生成 {cache.misses} 个")
+    
     print("\n✅ 现在你的应用应该能通过 MS Store 的 10.1.1.11 认证了！")
     print("   所有磁贴图标都是高分辨率、无失真的 PNG 格式")
     
     return True
 
 if __name__ == '__main__':
-    success = generate_all_msix_tiles()
+    parser = argparse.ArgumentParser(description='生成 Microsoft Store 磁贴图标')
+    parser.add_argument('--force', action='store_true', help='忽略增量缓存，全部重新生成')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='并行进程数，0 表示使用全部 CPU 核心（默认 1，串行）')
+    parser.add_argument('--optimize', action='store_true',
+                        help='用多策略 PNG 优化器压缩每个磁贴（见 png_optimizer.py）')
+    parser.add_argument('--optimize-budget', type=float, default=DEFAULT_BUDGET,
+                        help=f'PNG 优化器每个文件的时间预算（秒，默认 {DEFAULT_BUDGET}）')
+    parser.add_argument('--resample', choices=RESAMPLE_MODES, default=DEFAULT_RESAMPLE,
+                        help=f'重采样模式（默认 {DEFAULT_RESAMPLE}，质量对比见 resample_quality.py）')
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    optimize_budget = args.optimize_budget if args.optimize else None
+    success = generate_all_msix_tiles(force=args.force, jobs=jobs, optimize_budget=optimize_budget,
+                                      resample=args.resample)
     exit(0 if success else 1)
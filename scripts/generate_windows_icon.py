@@ -4,90 +4,118 @@
 包含多种尺寸以确保在任务栏、开始菜单、安装包等位置清晰显示
 """
 
-from PIL import Image
+from icon_pipeline import (
+    DEFAULT_RESAMPLE, RESAMPLE_MODES, ResizePyramid, find_source_icon,
+    get_project_root, source_candidates,
+)
+from asset_cache import AssetCache
+from ico_writer import PNG_MIN_SIZE, write_ico
+import argparse
 import os
 
-def generate_windows_icon():
-    """从源图标生成包含多种尺寸的高质量 ICO 文件"""
-    
-    # 查找源图标
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir)
-    
-    # 可能的源图标位置
-    source_paths = [
-        os.path.join(project_root, 'icon.png'),
-        os.path.join(project_root, 'res', 'icon.png'),
-        os.path.join(project_root, 'assets', 'icon.png'),
-    ]
+# Windows ICO 应该包含的所有尺寸
+# 这些尺寸覆盖了所有 Windows 显示场景：
+# 16x16 - 小图标（资源管理器列表视图）
+# 32x32 - 中等图标（资源管理器、任务栏）
+# 48x48 - 大图标（桌面图标）
+# 64x64 - 额外大图标（某些高 DPI 场景）
+# 128x128 - 超大图标（Windows 7+ 缩略图）
+# 256x256 - 最大尺寸（高 DPI 显示、Windows 10+ 开始菜单）
+ICO_SIZES = [
+    (16, 16),
+    (32, 32),
+    (48, 48),
+    (64, 64),
+    (128, 128),
+    (256, 256),
+]
+
+def ico_cache_params(pyramid, sizes):
+    """ICO 产物的增量缓存参数"""
+    params = {
+        'kind': 'ico',
+        'sizes': [list(size) for size in sizes],
+        'encoder': 'ico_writer',
+        'png_min_size': PNG_MIN_SIZE,
+    }
+    params.update(pyramid.cache_params())
+    return params
+
+def generate_windows_icon(source=None, project_root=None, cache=None, force=False,
+                          resample=DEFAULT_RESAMPLE):
+    """
+    从源图标生成包含多种尺寸的高质量 ICO 文件
+
+    source 可传入已解码的 PIL 图像或共享的 ResizePyramid（由 icon_pipeline
+    统一渲染时使用），省略时自行查找源图标；cache 为共享的 AssetCache，
+    省略时按找到的源图标自建一份，force=True 时忽略缓存；
+    resample 为自行解码源图时的重采样模式（见 icon_pipeline.RESAMPLE_MODES）
+    """
     
-    source_icon = None
-    for path in source_paths:
-        if os.path.exists(path):
-            source_icon = path
-            print(f"✓ 找到源图标: {path}")
-            break
+    project_root = project_root or get_project_root()
+    own_cache = False
     
-    if not source_icon:
-        print("✗ 错误: 找不到源图标文件")
-        print("  请确保以下位置之一存在图标:")
-        for path in source_paths:
-            print(f"    - {path}")
-        return False
+    if source is None:
+        # 查找源图标
+        source_icon = find_source_icon(project_root)
+        if not source_icon:
+            print("✗ 错误: 找不到源图标文件")
+            print("  请确保以下位置之一存在图标:")
+            for path in source_candidates(project_root):
+                print(f"    - {path}")
+            return False
+        print(f"✓ 找到源图标: {source_icon}")
+        if cache is None:
+            cache = AssetCache(project_root, source_icon, force=force)
+            own_cache = True
     
     # 输出路径
     output_path = os.path.join(project_root, 'windows', 'runner', 'resources', 'app_icon.ico')
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
     try:
-        # 打开源图像
-        img = Image.open(source_icon)
+        # 源图像（统一为 RGBA 模式）与共享缩放金字塔；独立运行时延迟解码，
+        # 缓存命中时源图不会被解码
+        if source is None:
+            source = ResizePyramid.from_file(source_icon, mode=resample)
+        pyramid = ResizePyramid.of(source, mode=resample)
         
-        # 转换为 RGBA 模式（如果不是的话）
-        if img.mode != 'RGBA':
-            img = img.convert('RGBA')
+        sizes = ICO_SIZES
+        params = ico_cache_params(pyramid, sizes)
+        if cache is not None and cache.is_fresh(output_path, params):
+            print(f"✓ 源图标与参数均未变化，跳过: {output_path}")
+            return True
         
-        print(f"✓ 源图像尺寸: {img.size}")
+        img = pyramid.source
         
-        # Windows ICO 应该包含的所有尺寸
-        # 这些尺寸覆盖了所有 Windows 显示场景：
-        # 16x16 - 小图标（资源管理器列表视图）
-        # 32x32 - 中等图标（资源管理器、任务栏）
-        # 48x48 - 大图标（桌面图标）
-        # 64x64 - 额外大图标（某些高 DPI 场景）
-        # 128x128 - 超大图标（Windows 7+ 缩略图）
-        # 256x256 - 最大尺寸（高 DPI 显示、Windows 10+ 开始菜单）
-        sizes = [
-            (16, 16),
-            (32, 32),
-            (48, 48),
-            (64, 64),
-            (128, 128),
-            (256, 256),
-        ]
+        print(f"✓ 源图像尺寸: {img.size}")
         
         # 生成所有尺寸的图像
         icons = []
         for size in sizes:
-            # 使用高质量的 Lanczos 重采样算法
-            resized = img.resize(size, Image.Resampling.LANCZOS)
+            # 从共享金字塔取图（高质量的 Lanczos 重采样）
+            resized = pyramid.get(size)
             icons.append(resized)
             print(f"✓ 生成 {size[0]}x{size[1]} 图标")
         
-        # 保存为 ICO 文件，包含所有尺寸
-        # 注意：PIL 的 ICO 保存需要传递所有图像
-        img.save(
-            output_path,
-            format='ICO',
-            sizes=sizes
-        )
+        # 直接用上面缩放好的帧编码 ICO（256px 存 PNG，小尺寸存 BMP），
+        # 写完后在进程内解析目录校验
+        entries = write_ico(output_path, icons)
         
         print(f"\n✓ 成功生成高质量 ICO 文件: {output_path}")
-        print(f"  包含 {len(sizes)} 种尺寸")
+        print(f"  包含 {len(entries)} 种尺寸")
+        for entry in entries:
+            print(f"    {entry['width']}x{entry['height']} {entry['format']} {entry['size'] / 1024:.1f} KB")
         
         # 验证生成的文件
         file_size = os.path.getsize(output_path)
         print(f"  文件大小: {file_size / 1024:.1f} KB")
         
+        if cache is not None:
+            cache.record(output_path, params)
+            if own_cache:
+                cache.save()
+        
         return True
         
     except Exception as e:
@@ -95,12 +123,18 @@ def generate_windows_icon():
         return False
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Windows 高质量 ICO 图标生成器')
+    parser.add_argument('--force', action='store_true', help='忽略增量缓存，强制重新生成')
+    parser.add_argument('--resample', choices=RESAMPLE_MODES, default=DEFAULT_RESAMPLE,
+                        help=f'重采样模式（默认 {DEFAULT_RESAMPLE}，质量对比见 resample_quality.py）')
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Windows 高质量 ICO 图标生成器")
     print("=" * 60)
     print()
     
-    success = generate_windows_icon()
+    success = generate_windows_icon(force=args.force, resample=args.resample)
     
     print()
     if success:
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+纯 Python 多帧 ICO 编码器
+直接接收已经缩放好的各尺寸帧：256px 帧按 PNG 存储，小尺寸帧按 32 位 BMP
+（BGRA + AND 掩码）存储，写完后在进程内解析 ICO 目录做校验
+
+取代 PIL 的 img.save(format='ICO', sizes=...)（会把所有尺寸再缩放一遍）
+和 ImageMagick 的 convert / identify 子进程
+"""
+
+from PIL import Image
+import io
+import os
+import struct
+
+# 不小于这个边长的帧存为 PNG（Vista 起支持，体积远小于 256px 的 BMP）
+PNG_MIN_SIZE = 256
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_ICONDIR = struct.Struct('<HHH')
+_ICONDIRENTRY = struct.Struct('<BBBBHHII')
+_BITMAPINFOHEADER = struct.Struct('<IiiHHIIiiII')
+
+
+class IcoError(ValueError):
+    """ICO 数据不合法"""
+
+
+def _encode_png(frame):
+    buffer = io.BytesIO()
+    frame.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _encode_bmp(frame):
+    """32 位 DIB：BITMAPINFOHEADER + 自下而上的 BGRA 像素 + 1 位 AND 掩码"""
+    width, height = frame.size
+    flipped = frame.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+    xor = flipped.tobytes('raw', 'BGRA')
+
+    # AND 掩码：完全透明的像素置 1，每行按 32 位对齐
+    alpha = flipped.getchannel('A')
+    mask = alpha.point(lambda a: 255 if a == 0 else 0).convert('1', dither=Image.Dither.NONE)
+    packed_row = (width + 7) // 8
+    padded_row = (width + 31) // 32 * 4
+    mask_bytes = mask.tobytes()
+    padding = b'\x00' * (padded_row - packed_row)
+    and_mask = b''.join(
+        mask_bytes[row * packed_row:(row + 1) * packed_row] + padding
+        for row in range(height)
+    )
+
+    header = _BITMAPINFOHEADER.pack(
+        _BITMAPINFOHEADER.size,  # biSize
+        width,
+        height * 2,              # ICO 里的高度包含 XOR 与 AND 两部分
+        1,                       # biPlanes
+        32,                      # biBitCount
+        0,                       # BI_RGB
+        len(xor) + len(and_mask),
+        0, 0, 0, 0,
+    )
+    return header + xor + and_mask
+
+
+def encode_ico(frames):
+    """把已缩放好的 RGBA 帧编码为 ICO 字节，帧顺序即目录顺序"""
+    if not frames:
+        raise IcoError('至少需要一帧')
+
+    payloads = []
+    for frame in frames:
+        width, height = frame.size
+        if not (0 < width <= 256 and 0 < height <= 256):
+            raise IcoError(f'ICO 帧尺寸必须在 1–256 之间: {frame.size}')
+        if frame.mode != 'RGBA':
+            frame = frame.convert('RGBA')
+        if max(width, height) >= PNG_MIN_SIZE:
+            payloads.append(_encode_png(frame))
+        else:
+            payloads.append(_encode_bmp(frame))
+
+    offset = _ICONDIR.size + _ICONDIRENTRY.size * len(frames)
+    directory = [_ICONDIR.pack(0, 1, len(frames))]
+    for frame, payload in zip(frames, payloads):
+        width, height = frame.size
+        directory.append(_ICONDIRENTRY.pack(
+            width % 256,   # 256 记作 0
+            height % 256,
+            0, 0,          # 调色板颜色数、保留字段
+            1, 32,         # planes、bitCount
+            len(payload),
+            offset,
+        ))
+        offset += len(payload)
+    return b''.join(directory) + b''.join(payloads)
+
+
+def read_ico_directory(data):
+    """
+    解析 ICO 目录并逐帧校验，返回
+    [{'width', 'height', 'bit_count', 'format', 'size', 'offset'}, ...]
+    """
+    if len(data) < _ICONDIR.size:
+        raise IcoError('文件过短')
+    reserved, kind, count = _ICONDIR.unpack_from(data, 0)
+    if reserved != 0 or kind != 1 or count == 0:
+        raise IcoError('不是 ICO 文件')
+    if len(data) < _ICONDIR.size + _ICONDIRENTRY.size * count:
+        raise IcoError('目录被截断')
+
+    entries = []
+    for index in range(count):
+        (width, height, _, _, _, bit_count, size, offset) = _ICONDIRENTRY.unpack_from(
+            data, _ICONDIR.size + _ICONDIRENTRY.size * index)
+        width = width or 256
+        height = height or 256
+        if offset + size > len(data):
+            raise IcoError(f'第 {index} 帧越界')
+        payload = data[offset:offset + size]
+        if payload.startswith(_PNG_SIGNATURE):
+            fmt = 'PNG'
+            # IHDR 紧跟签名：长度(4) + 类型(4) + 宽(4) + 高(4)
+            if len(payload) < 24:
+                raise IcoError(f'第 {index} 帧数据过短')
+            actual = struct.unpack('>II', payload[16:24])
+        else:
+            fmt = 'BMP'
+            if len(payload) < _BITMAPINFOHEADER.size:
+                raise IcoError(f'第 {index} 帧数据过短')
+            header = _BITMAPINFOHEADER.unpack_from(payload, 0)
+            actual = (header[1], header[2] // 2)
+        if actual != (width, height):
+            raise IcoError(f'第 {index} 帧尺寸不一致: 目录 {width}x{height}，数据 {actual[0]}x{actual[1]}')
+        entries.append({
+            'width': width,
+            'height': height,
+            'bit_count': bit_count,
+            'format': fmt,
+            'size': size,
+            'offset': offset,
+        })
+    return entries
+
+
+def write_ico(output_path, frames):
+    """编码、原子写入并校验 ICO 文件，返回解析出的目录"""
+    data = encode_ico(frames)
+    entries = read_ico_directory(data)
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, output_path)
+    return entries
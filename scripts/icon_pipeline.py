@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+图标资源统一渲染流水线
+源图标只解码一次，所有目标尺寸都从共享的缩放金字塔里取，
+Windows ICO、MSIX 磁贴、iOS 大图标一次性写完
+
+单独的脚本（generate_windows_icon / generate_msix_tiles / optimize_ios_icon）
+仍可独立运行，它们查找与解码源图标时也走这里的函数
+"""
+
+from PIL import Image
+import os
+import sys
+
+# 缩放算法版本，写进增量缓存的编码参数里；改动重采样方式时递增，
+# 让已缓存的产物全部失效
+PIPELINE_VERSION = 1
+
+# 重采样模式（见 ResizePyramid）：
+#   pyramid - 逐级减半的 Lanczos 金字塔，最后一步 Lanczos（默认）
+#   reduce  - 整数倍 box reduce() 缩到目标的 min_ratio 倍附近，最后一步 Lanczos
+#   direct  - 每个尺寸都从原图直接 Lanczos（质量基准，最慢）
+RESAMPLE_MODES = ('pyramid', 'reduce', 'direct')
+DEFAULT_RESAMPLE = 'pyramid'
+
+# 源图标候选位置（相对项目根目录），按优先级排列
+SOURCE_CANDIDATES = [
+    'icon.png',
+    os.path.join('res', 'icon.png'),
+    os.path.join('assets', 'icon.png'),
+]
+
+
+def get_project_root():
+    """scripts/ 的上一级即项目根目录"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.dirname(script_dir)
+
+
+def source_candidates(project_root=None):
+    """返回源图标候选绝对路径列表"""
+    root = project_root or get_project_root()
+    return [os.path.join(root, rel) for rel in SOURCE_CANDIDATES]
+
+
+def find_source_icon(project_root=None):
+    """按优先级查找源图标，找不到时返回 None"""
+    for path in source_candidates(project_root):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_source(path):
+    """解码源图标并统一为 RGBA 模式"""
+    img = Image.open(path)
+    img.load()
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    return img
+
+
+class ResizePyramid:
+    """
+    共享缩放金字塔
+
+    从源图像开始逐级减半建立金字塔层级，每个目标尺寸从「仍不小于目标
+    min_ratio 倍」的最小层级做最后一次 Lanczos 重采样。这样 16px、44px
+    这类小尺寸不必每次都从 1024px+ 原图缩放，同一尺寸的结果也只算一次
+    （例如 Square150x150Logo.png 与 scale-100 共用同一张图）。
+
+    mode='reduce' 时改为先用整数倍 box reduce() 把原图缩到目标的 min_ratio
+    倍附近（同一倍数的结果共用），再做最后一次 Lanczos，大比例缩小时
+    最快；mode='direct' 每次都从原图直接 Lanczos，用作质量基准。
+    各模式的质量差异用 resample_quality.py 检查
+    """
+
+    def __init__(self, source, min_ratio=2.0, mode=DEFAULT_RESAMPLE):
+        if mode not in RESAMPLE_MODES:
+            raise ValueError(f"未知的重采样模式: {mode}")
+        self._source = source
+        self._path = None
+        self._size = source.size if source is not None else None
+        self.min_ratio = min_ratio
+        self.mode = mode
+        self._levels = None
+        self._premultiplied = None
+        self._reduced = {}
+        self._cache = {}
+
+    @classmethod
+    def of(cls, source, mode=DEFAULT_RESAMPLE):
+        """已经是金字塔则原样返回，否则以 PIL 图像为源新建一个"""
+        if isinstance(source, cls):
+            return source
+        return cls(source, mode=mode)
+
+    @classmethod
+    def from_file(cls, path, min_ratio=2.0, mode=DEFAULT_RESAMPLE):
+        """
+        延迟解码的金字塔：此处只读文件头（尺寸、格式校验），
+        第一次真正需要像素时才解码。增量缓存全部命中时源图不会被解码
+        """
+        pyramid = cls(None, min_ratio, mode)
+        pyramid._path = path
+        with Image.open(path) as header:
+            pyramid._size = header.size
+        return pyramid
+
+    @property
+    def source(self):
+        if self._source is None:
+            self._source = load_source(self._path)
+        return self._source
+
+    @property
+    def path(self):
+        """延迟解码时的源文件路径；直接以图像构建时为 None"""
+        return self._path
+
+    @property
+    def size(self):
+        return self._size
+
+    def cache_params(self):
+        """影响像素结果的参数，写进增量缓存键"""
+        return {'pipeline': PIPELINE_VERSION, 'resample': self.mode}
+
+    def _fits(self, level_size, size):
+        return (level_size[0] >= size[0] * self.min_ratio
+                and level_size[1] >= size[1] * self.min_ratio)
+
+    def _level_for(self, size):
+        """取能承载目标尺寸的最小金字塔层级，必要时按需补建下一层"""
+        if self._levels is None:
+            self._levels = [self.source]
+        index = 0
+        while True:
+            level = self._levels[index]
+            if index + 1 < len(self._levels):
+                next_level = self._levels[index + 1]
+            else:
+                half = (level.width // 2, level.height // 2)
+                if not self._fits(half, size):
+                    return level
+                next_level = level.resize(half, Image.Resampling.LANCZOS)
+                self._levels.append(next_level)
+            if not self._fits(next_level.size, size):
+                return level
+            index += 1
+
+    def get(self, size):
+        """返回指定尺寸的 RGBA 图像；size 可以是整数（正方形）或 (宽, 高)"""
+        if isinstance(size, int):
+            size = (size, size)
+        size = tuple(size)
+        if size == self.size:
+            return self.source
+        resized = self._cache.get(size)
+        if resized is None:
+            if self.mode == 'direct':
+                resized = self.source.resize(size, Image.Resampling.LANCZOS)
+            elif self.mode == 'reduce':
+                resized = self._reduce_then_resample(size)
+            else:
+                level = self._level_for(size)
+                resized = level.resize(size, Image.Resampling.LANCZOS)
+            self._cache[size] = resized
+        return resized
+
+    def _reduce_then_resample(self, size):
+        """
+        与 PIL resize(..., reducing_gap=min_ratio) 相同的算法，但 reduce()
+        的结果按倍数缓存，多个目标尺寸共用
+        """
+        width, height = self.size
+        factor = (max(1, int(width / size[0] / self.min_ratio)),
+                  max(1, int(height / size[1] / self.min_ratio)))
+        if factor == (1, 1):
+            return self.source.resize(size, Image.Resampling.LANCZOS)
+        reduced = self._reduced.get(factor)
+        if reduced is None:
+            # 和 PIL 一样在预乘 alpha 空间里做 box 平均，透明像素的颜色不会渗进边缘
+            if self._premultiplied is None:
+                source = self.source
+                self._premultiplied = source.convert('RGBa') if source.mode == 'RGBA' else source
+            reduced = self._premultiplied.reduce(factor)
+            self._reduced[factor] = reduced
+        # 边长不能被倍数整除时最后一格是部分 box，用小数 box 补偿几何偏移
+        box = (0, 0, width / factor[0], height / factor[1])
+        resized = reduced.resize(size, Image.Resampling.LANCZOS, box=box)
+        return resized.convert('RGBA') if resized.mode == 'RGBa' else resized
+
+
+def render_all(project_root=None, force=False, jobs=1, optimize_budget=None,
+               resample=DEFAULT_RESAMPLE, pyramid=None):
+    """
+    解码一次源图标，写出 Windows ICO、全部 MSIX 磁贴与 iOS 大图标
+    三者共用一份增量缓存清单，force=True 时忽略缓存全部重建；
+    jobs > 1 时磁贴用进程池并行生成，optimize_budget 不为 None 时
+    磁贴再经过多策略 PNG 优化器；resample 见 RESAMPLE_MODES。
+    pyramid 为常驻进程（asset_daemon）保留在内存里的金字塔，源文件路径与
+    重采样模式一致时直接复用，省去重新解码
+    """
+    # 延迟导入：这几个脚本也会反过来导入本模块
+    from generate_windows_icon import generate_windows_icon
+    from generate_msix_tiles import generate_all_msix_tiles
+    from optimize_ios_icon import create_large_ios_icon
+    from asset_cache import AssetCache
+
+    root = project_root or get_project_root()
+    source_icon = find_source_icon(root)
+    if not source_icon:
+        print("✗ 错误: 找不到源图标文件")
+        print("  请确保以下位置之一存在图标:")
+        for path in source_candidates(root):
+            print(f"    - {path}")
+        return False
+
+    print(f"✓ 找到源图标: {source_icon}")
+    if pyramid is None or pyramid.path != source_icon or pyramid.mode != resample:
+        pyramid = ResizePyramid.from_file(source_icon, mode=resample)
+    print(f"✓ 源图像尺寸: {pyramid.size}（重采样: {pyramid.mode}）")
+    cache = AssetCache(root, source_icon, force=force)
+
+    ok = generate_windows_icon(source=pyramid, project_root=root, cache=cache)
+    ok = generate_all_msix_tiles(source=pyramid, project_root=root, cache=cache, jobs=jobs,
+                                 optimize_budget=optimize_budget) and ok
+    ios_output = os.path.join(root, 'assets', 'icon_ios_large.png')
+    ok = create_large_ios_icon(pyramid, ios_output, padding_percent=0.15, cache=cache) and ok
+    cache.save()
+    print(f"\n✓ 增量缓存: 命中 {cache.hits} 个，重新生成 {cache.misses} 个")
+    return ok
+
+
+if __name__ == '__main__':
+    import argparse
+    from png_optimizer import DEFAULT_BUDGET
+
+    parser = argparse.ArgumentParser(description='一次性生成 Windows ICO、MSIX 磁贴与 iOS 大图标')
+    parser.add_argument('--force', action='store_true', help='忽略增量缓存，全部重新生成')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='磁贴并行进程数，0 表示使用全部 CPU 核心（默认 1，串行）')
+    parser.add_argument('--optimize', action='store_true', help='磁贴经过多策略 PNG 优化器')
+    parser.add_argument('--optimize-budget', type=float, default=DEFAULT_BUDGET,
+                        help=f'PNG 优化器每个文件的时间预算（秒，默认 {DEFAULT_BUDGET}）')
+    parser.add_argument('--resample', choices=RESAMPLE_MODES, default=DEFAULT_RESAMPLE,
+                        help=f'重采样模式（默认 {DEFAULT_RESAMPLE}，质量对比见 resample_quality.py）')
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    optimize_budget = args.optimize_budget if args.optimize else None
+    # 作为脚本运行时本文件是 __main__，而各生成器 from icon_pipeline import ResizePyramid
+    # 拿到的是另一份模块里的类；统一走导入的模块，金字塔才能在各阶段之间原样传递
+    import icon_pipeline
+    ok = icon_pipeline.render_all(force=args.force, jobs=jobs, optimize_budget=optimize_budget,
+                                  resample=args.resample)
+    sys.exit(0 if ok else 1)
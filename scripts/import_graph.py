@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Dart 导入关系分析：找出适合改成 deferred 加载的库
+解析 lib/ 下每个文件的 import / export / part 指令，建出库之间的依赖图，
+从 lib/main.dart 出发求启动时必须加载的库（deferred as 的导入不算），
+再在这张图上求支配树：库 X 支配的子树，就是「所有路径都要经过 X」的那些库——
+把每一处对 X 的普通 import 都改成 deferred 之后，这一整棵子树都会离开启动路径。
+按子树源码体积排序，就是 deferred 加载的候选清单
+
+    库        part 文件并进它所属的库，体积按源码字节算（编译产物大小的近似）
+    条件导入  import 'a.dart' if (dart.library.io) 'b.dart'：按 --platform 选一个分支
+              （默认 io，即 Android / iOS / 桌面）
+    独占包    只被这棵子树里的库用到的第三方包，子树推迟加载后它们也跟着推迟
+
+从入口根本到不了的库另外列出（--unreachable）：要么已经只经由 deferred 导入加载，
+要么没有从入口出发的导入链，是可以删掉的死代码（或只有测试在用）
+
+每个文件解析出的指令按 mtime 与大小缓存在 <项目根>/.asset_cache/dart_imports.json，
+变了再比内容哈希，没改动的文件不重新解析
+
+用法：
+    python3 scripts/import_graph.py [--limit 25] [--platform web] [--keep lib/pages/home_page.dart]
+    python3 scripts/import_graph.py --why lib/services/ai_service.dart     # 为什么在启动路径上
+    python3 scripts/import_graph.py --tree lib/pages/settings_page.dart    # 这棵子树里有什么
+    python3 scripts/import_graph.py --unreachable                          # 入口到不了的库
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+
+from asset_cache import CACHE_DIR_NAME
+from l10n_index import get_project_root
+
+IMPORTS_NAME = 'dart_imports.json'
+
+# 缓存格式版本，解析规则变化时递增，旧缓存整体作废
+IMPORTS_VERSION = 1
+
+SOURCE_DIR = 'lib'
+DEFAULT_ENTRY = 'lib/main.dart'
+
+# 不在仓库里、构建时生成的目录：找不到时只提示，不算错误
+GENERATED_DIRS = ('lib/gen_l10n/',)
+
+# 各平台上 dart.library.xxx 条件为真的库
+PLATFORM_LIBRARIES = {
+    'io': {'io', 'ffi', 'isolate'},
+    'web': {'html', 'js', 'js_util', 'js_interop', 'ui_web'},
+}
+
+# 默认列出的候选数
+DEFAULT_LIMIT = 25
+
+# 子树比这还小的不值得推迟：改成 deferred 之后每处调用都要先 await loadLibrary()
+MIN_CANDIDATE_BYTES = 20 * 1024
+
+_COMMENT_OR_STRING = re.compile(r"""//[^\n]*|/\*.*?\*/|('(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*")""", re.S)
+_DIRECTIVE = re.compile(r"""^[ \t]*(import|export|part)\b(?!\s+of\b)\s*(['"])(.*?)\2([^;]*);""", re.M | re.S)
+_PART_OF = re.compile(r'^[ \t]*part\s+of\b', re.M)
+_CONDITION = re.compile(r"""\bif\s*\(\s*dart\.library\.(\w+)\s*\)\s*(['"])(.*?)\2""")
+_DEFERRED = re.compile(r'\bdeferred\s+as\b')
+_PUBSPEC_NAME = re.compile(r'^name:\s*(\S+)', re.M)
+
+
+def _strip_comments(text):
+    return _COMMENT_OR_STRING.sub(lambda m: m.group(1) or ' ', text)
+
+
+def parse_directives(text):
+    """
+    返回 (指令列表, 是否 part of 文件)
+    指令是 [类型, uri, 是否 deferred, [[条件库, uri], ...]]，可 JSON 序列化
+    """
+    text = _strip_comments(text)
+    directives = []
+    for kind, _, uri, rest in _DIRECTIVE.findall(text):
+        conditions = [[library, target] for library, _, target in _CONDITION.findall(rest)]
+        directives.append([kind, uri, bool(_DEFERRED.search(rest)), conditions])
+    return directives, bool(_PART_OF.search(text))
+
+
+def package_name(project_root):
+    try:
+        with open(os.path.join(project_root, 'pubspec.yaml'), 'r', encoding='utf-8') as f:
+            match = _PUBSPEC_NAME.search(f.read())
+    except OSError:
+        return None
+    return match and match.group(1).strip('\'"')
+
+
+class ImportIndex:
+    """
+    lib/ 下每个文件的指令，按 mtime、大小与内容哈希增量更新
+
+    用法：
+        index = ImportIndex.build(project_root)
+        index.files        → {相对路径: {'directives': [...], 'part_of': bool, 'size': 字节数}}
+        index.save()
+    """
+
+    def __init__(self, project_root, cache_path, cached):
+        self.project_root = project_root
+        self.cache_path = cache_path
+        self._cached = cached
+        self._dirty = False
+        self.files = {}
+        self.parsed = 0
+        self.reused = 0
+
+    @classmethod
+    def build(cls, project_root=None, cache_path=None, use_cache=True):
+        project_root = project_root or get_project_root()
+        cache_path = cache_path or os.path.join(project_root, CACHE_DIR_NAME, IMPORTS_NAME)
+        index = cls(project_root, cache_path, _read_cache(cache_path) if use_cache else {})
+        for dirpath, dirnames, filenames in os.walk(os.path.join(project_root, SOURCE_DIR)):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith('.dart'):
+                    index._index_file(os.path.join(dirpath, name))
+        index._dirty = index._dirty or set(index._cached) != set(index.files)
+        return index
+
+    def _index_file(self, path):
+        rel = os.path.relpath(path, self.project_root).replace(os.sep, '/')
+        stat = os.stat(path)
+        entry = self._cached.get(rel)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            self.reused += 1
+        else:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            if entry and entry['sha256'] == digest:
+                self.reused += 1
+            else:
+                self.parsed += 1
+                directives, part_of = parse_directives(raw.decode('utf-8', errors='replace'))
+                entry = {'sha256': digest, 'directives': directives, 'part_of': part_of}
+            entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            self._dirty = True
+        self.files[rel] = entry
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': IMPORTS_VERSION, 'files': self.files}, f)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != IMPORTS_VERSION:
+        return {}
+    return data.get('files', {})
+
+
+class ImportGraph:
+    """
+    库级别的依赖图
+
+    用法：
+        graph = ImportGraph(index.files, package, platform='io')
+        graph.edges[库]      → {依赖的库: 是否 deferred}
+        graph.external[库]   → {'package:dio', 'dart:io', ...}
+        graph.size[库]       → 库连同 part 文件的源码字节数
+        graph.unresolved     → [(库, 找不到的文件)]
+    """
+
+    def __init__(self, files, package, platform='io'):
+        self.package = package
+        available = PLATFORM_LIBRARIES[platform]
+        self.library_of = {}
+        self.size = {}
+        self.edges = {}
+        self.external = {}
+        self.unresolved = []
+
+        for rel, entry in files.items():
+            if entry['part_of']:
+                continue
+            self.library_of[rel] = rel
+            for kind, uri, _, _ in entry['directives']:
+                if kind == 'part':
+                    part = self._resolve(rel, uri)
+                    if part in files:
+                        self.library_of[part] = rel
+
+        for rel, entry in files.items():
+            library = self.library_of.get(rel)
+            if library is None:
+                # 没有被任何库 part 进去的 part 文件：单独算一个库
+                library = self.library_of[rel] = rel
+            self.size[library] = self.size.get(library, 0) + entry['size']
+            edges = self.edges.setdefault(library, {})
+            external = self.external.setdefault(library, set())
+            for kind, uri, deferred, conditions in entry['directives']:
+                if kind == 'part':
+                    continue
+                for condition, target in conditions:
+                    if condition in available:
+                        uri = target
+                        break
+                if uri.startswith('dart:') or (uri.startswith('package:')
+                                               and not uri.startswith(f'package:{package}/')):
+                    external.add(uri.split('/', 1)[0])
+                    continue
+                target = self._resolve(rel, uri)
+                if target not in files:
+                    self.unresolved.append((rel, target))
+                    continue
+                target = self.library_of.get(target, target)
+                # 同一个库既有普通导入又有 deferred 导入时，普通导入说了算
+                edges[target] = edges.get(target, True) and deferred
+
+    def _resolve(self, rel, uri):
+        prefix = f'package:{self.package}/'
+        if uri.startswith(prefix):
+            return f'{SOURCE_DIR}/{uri[len(prefix):]}'
+        return os.path.normpath(os.path.join(os.path.dirname(rel), uri)).replace(os.sep, '/')
+
+    def closure(self, entry, follow_deferred=False):
+        """从 entry 出发，只走普通（非 deferred）依赖能到达的库，返回 {库: 前驱}"""
+        parents = {entry: None}
+        queue = deque([entry])
+        while queue:
+            library = queue.popleft()
+            for target, deferred in sorted(self.edges.get(library, {}).items()):
+                if (follow_deferred or not deferred) and target not in parents:
+                    parents[target] = library
+                    queue.append(target)
+        return parents
+
+    def dominators(self, entry, reachable):
+        """在启动路径上求每个库的直接支配者（Cooper–Harvey–Kennedy 迭代算法）"""
+        order = []
+        seen = {entry}
+        stack = [(entry, iter(sorted(self._eager(entry))))]
+        while stack:
+            library, children = stack[-1]
+            for child in children:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append((child, iter(sorted(self._eager(child)))))
+                    break
+            else:
+                stack.pop()
+                order.append(library)
+        order.reverse()   # 逆后序
+        rank = {library: i for i, library in enumerate(order)}
+        predecessors = {library: [] for library in order}
+        for library in order:
+            for child in self._eager(library):
+                if child in reachable:
+                    predecessors[child].append(library)
+
+        idom = {entry: entry}
+        changed = True
+        while changed:
+            changed = False
+            for library in order[1:]:
+                new = None
+                for pred in predecessors[library]:
+                    if pred not in idom:
+                        continue
+                    if new is None:
+                        new = pred
+                        continue
+                    a, b = pred, new
+                    while a != b:
+                        while rank[a] > rank[b]:
+                            a = idom[a]
+                        while rank[b] > rank[a]:
+                            b = idom[b]
+                    new = a
+                if idom.get(library) != new:
+                    idom[library] = new
+                    changed = True
+        return idom
+
+    def _eager(self, library):
+        return [target for target, deferred in self.edges.get(library, {}).items() if not deferred]
+
+
+def dominated_subtrees(idom, entry):
+    """支配树上每个库的子树（包括它自己）"""
+    children = {}
+    for library, parent in idom.items():
+        if library != entry:
+            children.setdefault(parent, []).append(library)
+    subtrees = {}
+
+    def collect(library):
+        members = [library]
+        for child in children.get(library, ()):
+            members.extend(collect(child))
+        subtrees[library] = members
+        return members
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * len(idom)))
+    collect(entry)
+    return subtrees
+
+
+def rank_candidates(graph, entry, startup, idom):
+    """返回 [(库, 子树里的库, 子树字节数, 启动路径上的普通导入处, 独占包)]，按字节数从大到小"""
+    subtrees = dominated_subtrees(idom, entry)
+    importers = {}
+    for library in startup:
+        for target in graph._eager(library):
+            importers.setdefault(target, []).append(library)
+    package_users = {}
+    for library in startup:
+        for package in graph.external.get(library, ()):
+            package_users.setdefault(package, set()).add(library)
+
+    candidates = []
+    for library, members in subtrees.items():
+        if library == entry:
+            continue
+        member_set = set(members)
+        exclusive = sorted(package for package, users in package_users.items()
+                           if users <= member_set and package.startswith('package:'))
+        candidates.append((library, members, sum(graph.size[m] for m in members),
+                           sorted(importers.get(library, [])), exclusive))
+    candidates.sort(key=lambda c: (-c[2], c[0]))
+    return candidates
+
+
+def _kb(size):
+    return f'{size / 1024:.0f}KB'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分析 Dart 导入关系，找出适合 deferred 加载的库')
+    parser.add_argument('--entry', default=DEFAULT_ENTRY, help=f'入口文件（默认 {DEFAULT_ENTRY}）')
+    parser.add_argument('--platform', choices=sorted(PLATFORM_LIBRARIES), default='io',
+                        help='条件导入按哪个平台取分支（默认 io）')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                        help=f'列出的候选数，0 为不限（默认 {DEFAULT_LIMIT}）')
+    parser.add_argument('--min-size', type=int, default=MIN_CANDIDATE_BYTES // 1024,
+                        help=f'子树小于这么多 KB 的不列出（默认 {MIN_CANDIDATE_BYTES // 1024}）')
+    parser.add_argument('--keep', action='append', default=[],
+                        help='启动时必须加载的库（如首页），不列为候选，可重复')
+    parser.add_argument('--why', default=None, help='列出从入口到这个库的一条导入链')
+    parser.add_argument('--tree', default=None, help='列出这个库支配的子树')
+    parser.add_argument('--unreachable', action='store_true', help='列出从入口到不了的库')
+    parser.add_argument('--no-cache', action='store_true', help='忽略缓存，重新解析全部文件')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    project_root = get_project_root()
+    index = ImportIndex.build(project_root, use_cache=not args.no_cache)
+    index.save()
+    graph = ImportGraph(index.files, package_name(project_root), args.platform)
+    entry = graph.library_of.get(args.entry)
+    if entry is None:
+        print(f'✗ 找不到入口 {args.entry}')
+        sys.exit(1)
+    parents = graph.closure(entry)
+    startup = set(parents)
+    idom = graph.dominators(entry, startup)
+    elapsed = time.perf_counter() - start
+
+    for target in (args.why, args.tree):
+        if target and graph.library_of.get(target) not in startup:
+            print(f'✗ {target} 不在启动路径上' if target in graph.library_of else f'✗ 找不到 {target}')
+            sys.exit(1)
+    if args.why:
+        chain = []
+        library = graph.library_of[args.why]
+        while library is not None:
+            chain.append(library)
+            library = parents[library]
+        print('最短导入链：')
+        for depth, library in enumerate(reversed(chain)):
+            print(f'  {"  " * depth}{library}')
+        return
+    if args.tree:
+        members = dominated_subtrees(idom, entry)[graph.library_of[args.tree]]
+        print(f'{args.tree} 支配 {len(members)} 个库，共 {_kb(sum(graph.size[m] for m in members))}：')
+        for library in sorted(members, key=lambda m: (-graph.size[m], m)):
+            print(f'  {_kb(graph.size[library]):>7s}  {library}')
+        return
+
+    total = sum(graph.size.values())
+    startup_size = sum(graph.size[m] for m in startup)
+    deferred = sorted((library, target) for library in startup
+                      for target, is_deferred in graph.edges[library].items() if is_deferred)
+    packages = {p for library in startup for p in graph.external[library]}
+    print(f'库 {len(graph.size)} 个（解析 {index.parsed} 个文件，缓存 {index.reused} 个），用时 {elapsed * 1000:.0f}ms')
+    print(f'启动路径（{args.entry}，{args.platform}）：{len(startup)} 个库，{_kb(startup_size)} / {_kb(total)}'
+          f'（{startup_size / total * 100:.0f}%），外部库 {len(packages)} 个，已有 deferred 导入 {len(deferred)} 处')
+    missing = {}
+    for rel, target in graph.unresolved:
+        missing.setdefault(target, []).append(rel)
+    for target, importers in sorted(missing.items()):
+        hint = '（生成的代码，先运行 flutter gen-l10n 才算得进去）' if target.startswith(GENERATED_DIRS) else ''
+        print(f'⚠ 找不到 {target}，{len(importers)} 处导入{hint}：{importers[0]} 等')
+
+    lazy = set(graph.closure(entry, follow_deferred=True)) - startup
+    orphans = set(graph.size) - startup - lazy
+    print(f'不在启动路径上：只经由 deferred 导入 {len(lazy)} 个（{_kb(sum(graph.size[m] for m in lazy))}），'
+          f'入口到不了 {len(orphans)} 个（{_kb(sum(graph.size[m] for m in orphans))}）')
+    if args.unreachable:
+        for title, libraries in (('只经由 deferred 导入', lazy), ('入口到不了（死代码或只有测试在用）', orphans)):
+            if libraries:
+                print(f'\n{title}：')
+                for library in sorted(libraries, key=lambda m: (-graph.size[m], m)):
+                    print(f'  {_kb(graph.size[library]):>7s}  {library}')
+        return
+
+    min_size = args.min_size * 1024
+    keep = {graph.library_of.get(path, path) for path in args.keep}
+    candidates = [c for c in rank_candidates(graph, entry, startup, idom)
+                  if c[2] >= min_size and c[0] not in keep]
+    limit = args.limit or len(candidates)
+    print(f'\ndeferred 候选（子树 ≥ {args.min_size}KB，共 {len(candidates)} 个）：')
+    print(f'  {"子树":>7s} {"占启动":>6s} {"库数":>4s} {"导入处":>4s}  库 / 独占包')
+    for library, members, size, importers, exclusive in candidates[:limit]:
+        print(f'  {_kb(size):>7s} {size / startup_size * 100:>6.1f}% {len(members):>5d} {len(importers):>5d}  {library}')
+        if exclusive:
+            print(f'  {"":>27s}  + {", ".join(p[len("package:"):] for p in exclusive)}')
+    if len(candidates) > limit:
+        print(f'  ……另有 {len(candidates) - limit} 个（--limit 0 列出全部）')
+    print('\n子树：所有导入路径都经过这个库的库；导入处：启动路径上需要改成 deferred 的 import 数')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+ARB 词条索引
+把 lib/l10n/*.arb 解析成「语言 → {键: 消息参数}」的索引，按文件缓存：
+mtime 与大小没变直接用缓存；变了再算内容哈希，内容没变（只是被 touch、切了分支
+又切回来）也不重新解析
+
+索引缓存位于 <项目根>/.asset_cache/l10n_index.json（已在 .gitignore 中忽略）
+
+消息参数按 ICU MessageFormat 的结构解析，而不是找所有 {单词}：
+plural / select 分支的文本本身也写在花括号里（"=1{Item}"），
+只有分支文本里再嵌套的 {name} 才是参数
+"""
+
+import hashlib
+import json
+import os
+import re
+
+from asset_cache import CACHE_DIR_NAME
+
+INDEX_NAME = 'l10n_index.json'
+
+# 索引格式版本，解析规则或结构变化时递增，旧缓存整体作废
+INDEX_VERSION = 1
+
+# 这些参数类型后面跟的是分支，分支文本里可能还有参数
+_BRANCHING = ('plural', 'select', 'selectordinal')
+
+_TEMPLATE_ARB = re.compile(r'^template-arb-file:\s*(\S+)', re.M)
+
+
+def get_project_root():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def default_arb_dir(project_root=None):
+    return os.path.join(project_root or get_project_root(), 'lib', 'l10n')
+
+
+def template_locale(project_root=None, default='zh'):
+    """l10n.yaml 里 template-arb-file 对应的语言（app_zh.arb → zh）"""
+    try:
+        with open(os.path.join(project_root or get_project_root(), 'l10n.yaml'), 'r', encoding='utf-8') as f:
+            match = _TEMPLATE_ARB.search(f.read())
+    except OSError:
+        return default
+    return locale_from_name(match.group(1)) if match else default
+
+
+def locale_from_name(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name.split('_', 1)[1] if '_' in name else name
+
+
+class MessageSyntaxError(ValueError):
+    pass
+
+
+class ArbFormatError(ValueError):
+    """ARB 文件本身读不出来：不是合法 JSON、不是 UTF-8 或顶层不是对象"""
+
+    def __init__(self, path, message):
+        super().__init__(f'{path}: {message}')
+        self.path = path
+        self.message = message
+
+
+def message_arguments(text):
+    """返回消息里用到的参数 {名字: 类型}；简单参数的类型是 ''，其余为 plural / select 等"""
+    args = {}
+    end = _parse_message(text, 0, args, nested=False)
+    if end != len(text):
+        raise MessageSyntaxError(f'多余的 }}（位置 {end}）')
+    return args
+
+
+def _parse_message(text, i, args, nested):
+    """从 i 开始解析消息文本，直到匹配的 }（nested）或结尾，返回停下的位置"""
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch == '{':
+            i = _parse_argument(text, i + 1, args)
+        elif ch == '}':
+            return i
+        else:
+            i += 1
+    if nested:
+        raise MessageSyntaxError('花括号没有闭合')
+    return i
+
+
+def _parse_argument(text, i, args):
+    """解析 {name} / {name, type, ...}，i 指向 { 之后，返回 } 之后的位置"""
+    close = _find_any(text, i, ',}')
+    name = text[i:close].strip()
+    if not re.fullmatch(r'[A-Za-z_]\w*', name):
+        raise MessageSyntaxError(f'参数名不合法：{name!r}')
+    if text[close] == '}':
+        args.setdefault(name, '')
+        return close + 1
+
+    i = close + 1
+    close = _find_any(text, i, ',}')
+    kind = text[i:close].strip()
+    args.setdefault(name, kind)
+    if text[close] == '}':
+        return close + 1
+    if kind not in _BRANCHING:
+        # {amount, number, currency} 这类带格式的参数：跳到配对的 }
+        return _skip_braces(text, close + 1)
+
+    # 分支：选择器 {消息} 选择器 {消息} ... }
+    i = close + 1
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch == '}':
+            return i + 1
+        if ch == '{':
+            i = _parse_message(text, i + 1, args, nested=True) + 1
+        else:
+            i += 1
+    raise MessageSyntaxError(f'{name} 的分支没有闭合')
+
+
+def _find_any(text, i, chars):
+    n = len(text)
+    while i < n:
+        if text[i] in chars:
+            return i
+        if text[i] == '{':
+            break
+        i += 1
+    raise MessageSyntaxError('参数没有闭合')
+
+
+def _skip_braces(text, i):
+    depth = 1
+    n = len(text)
+    while i < n:
+        if text[i] == '{':
+            depth += 1
+        elif text[i] == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise MessageSyntaxError('花括号没有闭合')
+
+
+def index_arb(content):
+    """解析一个 ARB 的内容，返回可 JSON 序列化的索引；内容不是 JSON 对象时抛 ValueError"""
+    data = json.loads(content)
+    if not isinstance(data, dict):
+        raise ValueError('顶层不是 JSON 对象')
+    keys = {}
+    errors = {}
+    declared = {}
+    for key, value in data.items():
+        if key.startswith('@'):
+            if key.startswith('@@') or not isinstance(value, dict):
+                continue
+            placeholders = value.get('placeholders')
+            if isinstance(placeholders, dict):
+                declared[key[1:]] = sorted(placeholders)
+            continue
+        if not isinstance(value, str):
+            errors[key] = '值不是字符串'
+            continue
+        try:
+            keys[key] = sorted(message_arguments(value))
+        except MessageSyntaxError as e:
+            keys[key] = []
+            errors[key] = str(e)
+    return {
+        'locale': data.get('@@locale'),
+        'keys': keys,
+        'declared': declared,
+        'errors': errors,
+    }
+
+
+class ArbIndex:
+    """
+    全部 ARB 的索引
+
+    用法：
+        index = ArbIndex.load(arb_dir)
+        index.locales          → {语言: {'keys': {键: [参数]}, 'declared': {键: [占位符]}, 'errors': ...}}
+        index.save()
+
+    declared 是 @键 元数据里 placeholders 声明的名字；有 ARB 读不出来时 load 抛 ArbFormatError
+    """
+
+    def __init__(self, arb_dir, cache_path, cached):
+        self.arb_dir = arb_dir
+        self.cache_path = cache_path
+        self._cached = cached
+        self._files = {}
+        self._dirty = False
+        self.locales = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, arb_dir=None, cache_path=None, use_cache=True):
+        arb_dir = arb_dir or default_arb_dir()
+        cache_path = cache_path or os.path.join(get_project_root(), CACHE_DIR_NAME, INDEX_NAME)
+        cached = _read_cache(cache_path) if use_cache else {}
+        index = cls(arb_dir, cache_path, cached)
+        for name in sorted(os.listdir(arb_dir)):
+            if name.endswith('.arb'):
+                index._index_file(os.path.join(arb_dir, name))
+        # 缓存里其他目录的条目原样保留，只有本目录新增 / 删除了文件才需要重写
+        stale = [name for name in cached
+                 if os.path.dirname(name) == os.path.abspath(arb_dir) and name not in index._files]
+        for name in stale:
+            del cached[name]
+        index._dirty = index._dirty or bool(stale)
+        return index
+
+    def _index_file(self, path):
+        name = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self._cached.get(name)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            self.hits += 1
+        else:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            if entry and entry['sha256'] == digest:
+                self.hits += 1
+            else:
+                self.misses += 1
+                try:
+                    entry = {'sha256': digest, 'index': index_arb(raw.decode('utf-8'))}
+                except ValueError as e:
+                    raise ArbFormatError(_display_path(path), e) from e
+            entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            self._dirty = True
+        self._files[name] = entry
+        locale = entry['index']['locale'] or locale_from_name(name)
+        self.locales[locale] = entry['index']
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'files': {**self._cached, **self._files}}, f,
+                      ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+
+def _display_path(path):
+    """项目里的文件显示相对项目根目录的路径，其余显示绝对路径"""
+    path = os.path.abspath(path)
+    rel = os.path.relpath(path, get_project_root())
+    return path if rel.startswith('..') else rel
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != INDEX_VERSION:
+        return {}
+    return data.get('files', {})
@@ -1,21 +1,119 @@
-from PIL import Image, ImageChops
+from PIL import Image
+import numpy as np
 import os
 
-def create_large_ios_icon(input_path, output_path, padding_percent=0.1):
+from icon_pipeline import PIPELINE_VERSION, ResizePyramid, load_source
+
+# Per-channel (R, G, B, A) distance a pixel may have from the background colour and
+# still count as background. 100 matches the old ImageChops.add(diff, diff, 2.0, -100)
+# cut-off; a channel set to 255 is ignored entirely.
+DEFAULT_TOLERANCE = 100
+
+# Side of the square patch sampled at each corner, and rows processed per band.
+CORNER_PATCH = 4
+BAND_ROWS = 256
+
+def _as_rgba(source):
+    if isinstance(source, ResizePyramid):
+        return source.source
+    if isinstance(source, Image.Image):
+        return source if source.mode == "RGBA" else source.convert("RGBA")
+    return load_source(source)
+
+def _tolerance_array(tolerance):
+    tol = np.broadcast_to(np.asarray(tolerance, dtype=np.int16), (4,))
+    if tol.min() < 0 or tol.max() > 255:
+        raise ValueError(f"tolerance must be within 0-255: {tolerance}")
+    return tol
+
+def _matches(pixels, color, tol):
+    """Boolean mask of pixels within tol of color on every channel.
+
+    When the background is fully transparent only alpha is compared: RGB under
+    alpha 0 is arbitrary and anti-aliased edges often carry stray colour there.
+    """
+    diff = np.abs(pixels.astype(np.int16) - color.astype(np.int16))
+    if color[3] == 0:
+        return diff[..., 3] <= tol[3]
+    return (diff <= tol).all(axis=-1)
+
+def detect_background(arr, tolerance=DEFAULT_TOLERANCE, patch=CORNER_PATCH):
+    """Pick the background colour by sampling all four corners.
+
+    Each corner contributes the median of a small patch; the corner agreeing
+    (within tolerance) with the most other corners wins, ties going to the
+    top-left corner as before.
+    """
+    tol = _tolerance_array(tolerance)
+    h, w = arr.shape[:2]
+    p = max(1, min(patch, h, w))
+    corners = [
+        arr[:p, :p], arr[:p, w - p:], arr[h - p:, :p], arr[h - p:, w - p:],
+    ]
+    colors = [np.median(c.reshape(-1, 4), axis=0).round().astype(np.uint8) for c in corners]
+    votes = [
+        sum(bool(_matches(other[np.newaxis], color, tol)[0]) for other in colors)
+        for color in colors
+    ]
+    return colors[int(np.argmax(votes))]
+
+def content_bbox(source, tolerance=DEFAULT_TOLERANCE, bg_color=None):
+    """Return (bg_color, bbox) of the non-background content in one vectorized pass.
+
+    source may be a path, a PIL image or a ResizePyramid. The image is scanned
+    in bands of BAND_ROWS rows, so apart from the pixel array itself no
+    full-size intermediate is allocated. bbox is None for a solid image.
+    """
+    arr = np.asarray(_as_rgba(source))
+    tol = _tolerance_array(tolerance)
+    if bg_color is None:
+        bg_color = detect_background(arr, tol)
+    color = np.asarray(bg_color, dtype=np.uint8)
+
+    h, w = arr.shape[:2]
+    rows = np.zeros(h, dtype=bool)
+    cols = np.zeros(w, dtype=bool)
+    for top in range(0, h, BAND_ROWS):
+        content = ~_matches(arr[top:top + BAND_ROWS], color, tol)
+        rows[top:top + BAND_ROWS] = content.any(axis=1)
+        cols |= content.any(axis=0)
+
+    bg = tuple(int(c) for c in color)
+    if not rows.any():
+        return bg, None
+    ys = np.flatnonzero(rows)
+    xs = np.flatnonzero(cols)
+    return bg, (int(xs[0]), int(ys[0]), int(xs[-1]) + 1, int(ys[-1]) + 1)
+
+def content_bboxes(sources, tolerance=DEFAULT_TOLERANCE):
+    """Batch form of content_bbox: one (bg_color, bbox) per source, in order."""
+    return [content_bbox(source, tolerance) for source in sources]
+
+def ios_cache_params(padding_percent, tolerance=DEFAULT_TOLERANCE):
+    return {
+        'kind': 'ios-large',
+        'size': [1024, 1024],
+        'padding': padding_percent,
+        'tolerance': tolerance,
+        'pipeline': PIPELINE_VERSION,
+    }
+
+def create_large_ios_icon(input_path, output_path, padding_percent=0.1, cache=None,
+                          tolerance=DEFAULT_TOLERANCE):
+    # input_path may also be an already decoded RGBA image or a (lazy) ResizePyramid
+    # shared by icon_pipeline; with a cache, an unchanged output is skipped before decoding.
+    params = ios_cache_params(padding_percent, tolerance)
+    if cache is not None and cache.is_fresh(output_path, params):
+        print(f"Unchanged, skipping {output_path}")
+        return True
     try:
-        img = Image.open(input_path).convert("RGBA")
+        img = _as_rgba(input_path)
         
-        # 1. Determine background color from top-left corner
-        bg_color = img.getpixel((0, 0))
+        # 1. Determine background color from the four corners
+        # 2. Find the bounding box of pixels outside the tolerance of that color
+        bg_color, bbox = content_bbox(img, tolerance)
         print(f"Detected background color: {bg_color}")
         
-        # 2. Create a mask of pixels that match the background color
-        # We'll use a difference method to find non-background pixels
-        bg_image = Image.new("RGBA", img.size, bg_color)
-        diff = ImageChops.difference(img, bg_image)
-        diff = ImageChops.add(diff, diff, 2.0, -100)
-        bbox = diff.getbbox()
-        
         if bbox:
             print(f"Content bounding box: {bbox}")
             # 3. Crop to the content (the book)
@@ -60,6 +158,8 @@ def create_large_ios_icon(input_path, output_path, padding_percent=0.1):
             new_icon.paste(content_resized, (x, y), content_resized)
             
             new_icon.save(output_path)
+            if cache is not None:
+                cache.record(output_path, params)
             print(f"Saved optimized iOS icon to {output_path}")
             return True
         else:
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+PNG 体积优化器（磁贴与商店素材）
+对每个输出尝试多种编码，保留解码结果与原图一致（视觉无损）的最小一份：
+- 全透明像素的 RGB 清零（不可见）
+- 像素表示：RGBA / RGB / 灰度+透明 / 灰度 / 调色板（含 1/2/4 位深）
+- PNG 行滤波：None / Sub / Up / Average / Paeth / 逐行自适应
+- zlib 压缩级别与策略（默认 / FILTERED / RLE）
+- 有损调色板量化（仅在 --max-error > 0 且透明度只有全透/不透两档时尝试）
+
+每个文件有时间预算，超出后不再开新的尝试；尝试在线程池里并行执行
+（zlib 压缩会释放 GIL）。PIL 默认 optimize=True 的结果始终作为候选之一，
+所以优化后的文件不会比原先更大
+
+用法：
+    python3 scripts/png_optimizer.py [路径 ...] [--budget 秒] [--jobs N] [--max-error N] [--dry-run]
+
+路径可以是 PNG 文件或目录，省略时处理 windows/runner/resources/tiles
+"""
+
+from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import io
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+# 单个文件的默认时间预算（秒）
+DEFAULT_BUDGET = 2.0
+
+# 默认只接受与原图逐像素一致的结果
+DEFAULT_MAX_ERROR = 0
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# PNG 行滤波类型
+FILTERS = {
+    'none': 0,
+    'sub': 1,
+    'up': 2,
+    'average': 3,
+    'paeth': 4,
+}
+
+# 尝试顺序：收益最可能高的在前，预算不够时先砍掉后面的
+FILTER_ORDER = ['adaptive', 'none', 'paeth', 'sub', 'up', 'average']
+ZLIB_VARIANTS = [
+    (9, zlib.Z_DEFAULT_STRATEGY, 'z9'),
+    (9, zlib.Z_FILTERED, 'z9-filtered'),
+    (9, zlib.Z_RLE, 'z9-rle'),
+]
+
+
+def _chunk(tag, data):
+    return (struct.pack('>I', len(data)) + tag + data
+            + struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+
+def _filtered_rows(raw, bpp):
+    """
+    返回 5 种滤波结果，形状 (5, 高, 行字节数)
+    PNG 滤波只依赖原始字节，因此整幅图可以一次向量化算完
+    """
+    x = raw.astype(np.int16)
+    a = np.zeros_like(x)
+    a[:, bpp:] = x[:, :-bpp]
+    b = np.zeros_like(x)
+    b[1:] = x[:-1]
+    c = np.zeros_like(x)
+    c[1:, bpp:] = x[:-1, :-bpp]
+
+    p = a + b - c
+    pa = np.abs(p - a)
+    pb = np.abs(p - b)
+    pc = np.abs(p - c)
+    paeth = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+
+    out = np.stack([
+        x,
+        x - a,
+        x - b,
+        x - ((a + b) >> 1),
+        x - paeth,
+    ])
+    return (out & 0xFF).astype(np.uint8)
+
+
+def _scanlines(filtered, filter_name):
+    """按指定策略选取滤波结果，返回带滤波类型字节的扫描线数据"""
+    raw = filtered[0]
+    if filter_name == 'adaptive':
+        # 经典启发式：每行选「按有符号字节取绝对值之和」最小的滤波
+        cost = np.abs(filtered.view(np.int8).astype(np.int32)).sum(axis=2)
+        types = cost.argmin(axis=0).astype(np.uint8)
+        rows = filtered[types, np.arange(raw.shape[0])]
+    else:
+        types = np.full(raw.shape[0], FILTERS[filter_name], dtype=np.uint8)
+        rows = filtered[FILTERS[filter_name]]
+    return np.concatenate([types[:, np.newaxis], rows], axis=1).tobytes()
+
+
+def _pack_bits(indices, bit_depth):
+    """把每像素一个字节的调色板索引按位深打包成扫描线"""
+    if bit_depth == 8:
+        return indices
+    h, w = indices.shape
+    per_byte = 8 // bit_depth
+    padded_w = -(-w // per_byte) * per_byte
+    padded = np.zeros((h, padded_w), dtype=np.uint8)
+    padded[:, :w] = indices
+    groups = padded.reshape(h, -1, per_byte)
+    shifts = np.arange(per_byte - 1, -1, -1, dtype=np.uint8) * bit_depth
+    return (groups << shifts).sum(axis=2, dtype=np.uint16).astype(np.uint8)
+
+
+class Representation:
+    """一种像素表示：扫描线原始字节 + IHDR/PLTE/tRNS 所需信息"""
+
+    def __init__(self, name, raw, color_type, bit_depth, bpp, palette=None, trns=None):
+        self.name = name
+        self.raw = raw
+        self.color_type = color_type
+        self.bit_depth = bit_depth
+        self.bpp = bpp
+        self.palette = palette
+        self.trns = trns
+        self._filtered = None
+        self._lock = threading.Lock()
+
+    def scanlines(self, filter_name):
+        # 5 种滤波结果只算一次，同一表示的各个尝试共用
+        with self._lock:
+            if self._filtered is None:
+                self._filtered = _filtered_rows(self.raw, self.bpp)
+        return _scanlines(self._filtered, filter_name)
+
+    def encode(self, width, height, scanlines, level, strategy):
+        header = struct.pack('>IIBBBBB', width, height, self.bit_depth, self.color_type, 0, 0, 0)
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 15, 9, strategy)
+        idat = compressor.compress(scanlines) + compressor.flush()
+        parts = [_PNG_SIGNATURE, _chunk(b'IHDR', header)]
+        if self.palette is not None:
+            parts.append(_chunk(b'PLTE', self.palette))
+        if self.trns:
+            parts.append(_chunk(b'tRNS', self.trns))
+        parts += [_chunk(b'IDAT', idat), _chunk(b'IEND', b'')]
+        return b''.join(parts)
+
+
+def _palette_representation(name, indices, colors):
+    """colors 为 (N, 4) 的 RGBA 调色板，indices 为 (高, 宽) 索引"""
+    count = len(colors)
+    bit_depth = next(bits for bits in (1, 2, 4, 8) if count <= 1 << bits)
+    alpha = colors[:, 3]
+    opaque = np.flatnonzero(alpha != 255)
+    trns = alpha[:opaque[-1] + 1].tobytes() if len(opaque) else None
+    return Representation(
+        name, _pack_bits(indices.astype(np.uint8), bit_depth), 3, bit_depth, 1,
+        palette=colors[:, :3].tobytes(), trns=trns,
+    )
+
+
+def _lossless_palette(arr):
+    """不超过 256 种 RGBA 颜色时的无损调色板；透明色排在前面以缩短 tRNS"""
+    h, w = arr.shape[:2]
+    packed = arr.reshape(-1, 4).view(np.uint32).ravel()
+    colors, inverse = np.unique(packed, return_inverse=True)
+    if len(colors) > 256:
+        return None
+    rgba = colors.view(np.uint8).reshape(-1, 4)
+    order = np.argsort(rgba[:, 3] == 255, kind='stable')
+    remap = np.empty(len(order), dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    indices = remap[inverse].reshape(h, w)
+    return _palette_representation('palette', indices, rgba[order])
+
+
+def _quantized_palette(img, arr):
+    """有损调色板量化：只在透明度只有 0/255 两档时尝试"""
+    alpha = arr[..., 3]
+    if not np.isin(alpha, (0, 255)).all():
+        return None
+    quantized = img.quantize(colors=256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    palette = np.asarray(quantized.convert('RGBA'))
+    indexed = np.asarray(quantized)
+    used = int(indexed.max()) + 1
+    colors = np.zeros((used, 4), dtype=np.uint8)
+    colors[indexed.ravel()] = palette.reshape(-1, 4)
+    return _palette_representation('palette-quantized', indexed, colors)
+
+
+def representations(img, max_error=DEFAULT_MAX_ERROR):
+    """按可用的位深/颜色类型列出候选表示，最紧凑的在前"""
+    arr = np.array(img.convert('RGBA'))
+    # 全透明像素的 RGB 看不见，统一清零后压缩率更高（校验时同样忽略）
+    arr[arr[..., 3] == 0, :3] = 0
+    h, w = arr.shape[:2]
+    opaque = bool((arr[..., 3] == 255).all())
+    gray = bool(((arr[..., 0] == arr[..., 1]) & (arr[..., 1] == arr[..., 2])).all())
+
+    reps = []
+    palette = _lossless_palette(arr)
+    if palette is not None:
+        reps.append(palette)
+    if gray and opaque:
+        reps.append(Representation('gray', arr[..., 0].copy(), 0, 8, 1))
+    elif gray:
+        reps.append(Representation('gray-alpha', arr[..., [0, 3]].reshape(h, -1), 4, 8, 2))
+    if opaque:
+        reps.append(Representation('rgb', arr[..., :3].reshape(h, -1), 2, 8, 3))
+    reps.append(Representation('rgba', arr.reshape(h, -1), 6, 8, 4))
+    if max_error > 0 and palette is None:
+        quantized = _quantized_palette(img.convert('RGBA'), arr)
+        if quantized is not None:
+            reps.insert(0, quantized)
+    return arr, reps
+
+
+def _baseline(img):
+    """现有做法：PIL 默认 optimize=True"""
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _verify(data, reference, max_error):
+    """解码候选结果并与原图比对，误差不超过 max_error 才算视觉无损"""
+    with Image.open(io.BytesIO(data)) as decoded:
+        pixels = np.asarray(decoded.convert('RGBA'))
+    if pixels.shape != reference.shape:
+        return False
+    diff = np.abs(pixels.astype(np.int16) - reference.astype(np.int16))
+    # 全透明像素的 RGB 不可见，不计入误差
+    visible = reference[..., 3] != 0
+    diff[~visible, :3] = 0
+    return int(diff.max(initial=0)) <= max_error
+
+
+def optimize_image(img, budget=DEFAULT_BUDGET, workers=None, max_error=DEFAULT_MAX_ERROR):
+    """
+    返回 {'data', 'trial', 'trials', 'elapsed'}：最小且通过校验的编码结果
+
+    每个尝试 = (表示, 行滤波)，内部再比较几种 zlib 设置；超出 budget 秒后
+    不再提交新尝试，在途的尝试只做完当前这一种 zlib 设置
+    """
+    start = time.perf_counter()
+    width, height = img.size
+    reference, reps = representations(img, max_error)
+
+    candidates = [(len(data), 0, 'pil-optimize', data) for data in [_baseline(img)]]
+    trials = [(rep, filter_name) for rep in reps for filter_name in FILTER_ORDER]
+
+    deadline = start + budget
+
+    def run(index):
+        rep, filter_name = trials[index]
+        scanlines = rep.scanlines(filter_name)
+        best = None
+        for level, strategy, label in ZLIB_VARIANTS:
+            # 第一种 zlib 设置总要做完，其余的超出预算就放弃
+            if best is not None and time.perf_counter() > deadline:
+                break
+            data = rep.encode(width, height, scanlines, level, strategy)
+            if best is None or len(data) < len(best[0]):
+                best = (data, f'{rep.name}/{filter_name}/{label}')
+        return best
+
+    workers = workers or min(4, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for index in range(len(trials)):
+            if time.perf_counter() > deadline:
+                break
+            # 控制在途数量，预算判断才有意义
+            if len(futures) >= workers:
+                futures[len(futures) - workers].result()
+            futures.append(executor.submit(run, index))
+        for index, future in enumerate(futures, start=1):
+            data, label = future.result()
+            candidates.append((len(data), index, label, data))
+
+    # 从小到大校验，第一个通过的胜出；PIL 基线必然通过
+    for size, _, label, data in sorted(candidates, key=lambda c: (c[0], c[1])):
+        if label == 'pil-optimize' or _verify(data, reference, max_error):
+            return {
+                'data': data,
+                'trial': label,
+                'trials': len(candidates),
+                'elapsed': time.perf_counter() - start,
+            }
+    raise AssertionError('unreachable: baseline always verifies')
+
+
+def optimize_file(path, budget=DEFAULT_BUDGET, workers=None, max_error=DEFAULT_MAX_ERROR,
+                  dry_run=False):
+    """优化单个 PNG 文件，只在变小时原子替换；返回 (原大小, 新大小, 结果)"""
+    before = os.path.getsize(path)
+    with Image.open(path) as img:
+        img.load()
+        source = img.convert('RGBA')
+    result = optimize_image(source, budget, workers, max_error)
+    after = len(result['data'])
+    if after < before and not dry_run:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(result['data'])
+        os.replace(tmp_path, path)
+    return before, min(before, after), result
+
+
+def _collect(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith('.png')
+            ))
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PNG 体积优化器（磁贴与商店素材）')
+    parser.add_argument('paths', nargs='*', help='PNG 文件或目录，默认为 MSIX 磁贴目录')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help=f'每个文件的时间预算（秒，默认 {DEFAULT_BUDGET}）')
+    parser.add_argument('--jobs', type=int, default=None, help='每个文件的并行尝试线程数')
+    parser.add_argument('--max-error', type=int, default=DEFAULT_MAX_ERROR,
+                        help='允许的单通道最大误差，>0 时才尝试有损调色板量化（默认 0，逐像素一致）')
+    parser.add_argument('--dry-run', action='store_true', help='只报告可节省的字节数，不改写文件')
+    args = parser.parse_args()
+
+    paths = args.paths
+    if not paths:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        paths = [os.path.join(os.path.dirname(script_dir), 'windows', 'runner', 'resources', 'tiles')]
+    files = _collect(paths)
+    if not files:
+        print("✗ 没有找到 PNG 文件")
+        return 1
+
+    total_before = total_after = 0
+    for path in files:
+        before, after, result = optimize_file(path, args.budget, args.jobs, args.max_error, args.dry_run)
+        total_before += before
+        total_after += after
+        saved = before - after
+        print(f"  {os.path.basename(path):40s} {before / 1024:8.1f}KB → {after / 1024:8.1f}KB"
+              f"  -{saved:7d}B  {result['trial']}  ({result['elapsed']:.2f}s)")
+
+    saved = total_before - total_after
+    ratio = saved / total_before * 100 if total_before else 0
+    print(f"\n{'（试运行）' if args.dry_run else ''}共 {len(files)} 个文件，"
+          f"节省 {saved / 1024:.1f} KB（{ratio:.1f}%）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
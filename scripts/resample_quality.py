@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+重采样模式的质量与速度检查
+以「每个尺寸都从原图直接 Lanczos」（direct）为基准，对 ICO 与 MSIX 磁贴用到的
+全部尺寸比较 pyramid / reduce 两种快速模式的 PSNR 与 SSIM，并给出各模式的
+总耗时。任一尺寸低于阈值时以非零状态退出，可直接放进 CI
+
+比较在预乘 alpha 的 RGBA 上进行：全透明像素的颜色看不见，不应计入误差
+
+用法：
+    python3 scripts/resample_quality.py [源图.png] [--min-psnr 40] [--min-ssim 0.99]
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from icon_pipeline import RESAMPLE_MODES, ResizePyramid, find_source_icon, load_source
+
+# ICO（generate_windows_icon / generate_app_icon）与 MSIX 磁贴用到的全部尺寸
+TARGET_SIZES = sorted({
+    16, 24, 32, 48, 64, 96, 128, 256,
+    44, 55, 66, 88, 176, 71,
+    150, 187, 225, 300, 600,
+    310, 387, 465, 620, 1240,
+})
+
+DEFAULT_MIN_PSNR = 40.0
+DEFAULT_MIN_SSIM = 0.99
+
+# SSIM 常量（8 位像素，K1=0.01，K2=0.03）与窗口边长
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+_WINDOW = 7
+
+
+def _premultiplied(img):
+    arr = np.asarray(img.convert('RGBA'), dtype=np.float64)
+    arr[..., :3] *= arr[..., 3:4] / 255.0
+    return arr
+
+
+def psnr(a, b):
+    mse = np.mean((a - b) ** 2)
+    if mse == 0:
+        return float('inf')
+    return 10 * np.log10(255.0 ** 2 / mse)
+
+
+def _box_mean(x, k):
+    """k×k 滑动窗口均值（积分图实现，只取完整窗口）"""
+    integral = np.pad(x, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    window = (integral[k:, k:] - integral[:-k, k:] - integral[k:, :-k] + integral[:-k, :-k])
+    return window / (k * k)
+
+
+def ssim(a, b):
+    """各通道 SSIM 的均值（均匀窗口）；图像小于窗口时退化为全图单窗口"""
+    k = min(_WINDOW, a.shape[0], a.shape[1])
+    scores = []
+    for channel in range(a.shape[2]):
+        x = a[..., channel]
+        y = b[..., channel]
+        mu_x = _box_mean(x, k)
+        mu_y = _box_mean(y, k)
+        var_x = _box_mean(x * x, k) - mu_x ** 2
+        var_y = _box_mean(y * y, k) - mu_y ** 2
+        cov = _box_mean(x * y, k) - mu_x * mu_y
+        score = ((2 * mu_x * mu_y + _C1) * (2 * cov + _C2)
+                 / ((mu_x ** 2 + mu_y ** 2 + _C1) * (var_x + var_y + _C2)))
+        scores.append(score.mean())
+    return float(np.mean(scores))
+
+
+def render(img, mode, sizes):
+    """用指定模式渲染全部尺寸，返回 ({尺寸: 图像}, 耗时秒数)"""
+    pyramid = ResizePyramid(img, mode=mode)
+    start = time.perf_counter()
+    images = {size: pyramid.get(size) for size in sizes}
+    return images, time.perf_counter() - start
+
+
+def check(img, sizes=TARGET_SIZES, min_psnr=DEFAULT_MIN_PSNR, min_ssim=DEFAULT_MIN_SSIM):
+    """打印质量报告，全部达标时返回 True"""
+    reference, reference_time = render(img, 'direct', sizes)
+    reference = {size: _premultiplied(image) for size, image in reference.items()}
+
+    ok = True
+    timings = {'direct': reference_time}
+    for mode in RESAMPLE_MODES:
+        if mode == 'direct':
+            continue
+        images, timings[mode] = render(img, mode, sizes)
+        print(f"\n{mode} 对比 direct:")
+        print(f"  {'尺寸':>6s} {'PSNR(dB)':>10s} {'SSIM':>8s}")
+        for size in sizes:
+            candidate = _premultiplied(images[size])
+            p = psnr(candidate, reference[size])
+            s = ssim(candidate, reference[size])
+            passed = p >= min_psnr and s >= min_ssim
+            ok = ok and passed
+            print(f"  {size:6d} {p:10.2f} {s:8.4f}{'' if passed else '  ✗'}")
+
+    print("\n耗时（全部尺寸）:")
+    for mode, elapsed in timings.items():
+        speedup = timings['direct'] / elapsed if elapsed else float('inf')
+        print(f"  {mode:8s} {elapsed:7.3f}s  ({speedup:.1f}x)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='重采样模式的质量与速度检查')
+    parser.add_argument('source', nargs='?', default=None, help='源图，默认使用项目源图标')
+    parser.add_argument('--min-psnr', type=float, default=DEFAULT_MIN_PSNR,
+                        help=f'PSNR 下限（默认 {DEFAULT_MIN_PSNR}）')
+    parser.add_argument('--min-ssim', type=float, default=DEFAULT_MIN_SSIM,
+                        help=f'SSIM 下限（默认 {DEFAULT_MIN_SSIM}）')
+    args = parser.parse_args()
+
+    source = args.source or find_source_icon()
+    if not source:
+        print("✗ 错误: 找不到源图标文件")
+        return 1
+    img = load_source(source)
+    print(f"源图: {source} {img.size}")
+
+    ok = check(img, min_psnr=args.min_psnr, min_ssim=args.min_ssim)
+    print("\n✓ 全部尺寸达标" if ok else "\n✗ 有尺寸低于阈值")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+翻译记忆：给稀疏语言的缺失词条找最相近的已译词条
+以英文为中介语言：目标语言已经翻译过的键构成 (英文原文, 译文) 对，
+缺失的键拿自己的英文原文去查最相近的几条，返回它们的译文作为参考或预填
+
+相似度是英文原文字符 3-gram 集合的 Jaccard 系数。索引是 3-gram → 词条编号数组的
+倒排表：查询把自己那几十个 3-gram 的倒排数组拼起来做一次 bincount，得到每个词条
+共享的 3-gram 数，Jaccard = 共享 / (查询 + 词条 - 共享) 对全部词条向量化算出，
+再用 argpartition 取前几名——结果是精确的，不用和几千条逐一比较，单次查询在
+亚毫秒级
+
+预填规则：
+  - 英文原文（占位符按出现顺序归一化后）完全相同：直接套用译文，占位符按顺序改名；
+  - 相似度不低于 --min-score：同样预填，留待审阅；
+  - 近邻的参数个数和当前词条不同（改名后译文会多出或漏掉参数）时跳过，看下一个近邻；
+  - 更低的只在报告里列出参考，不进批次
+
+导出的批次就是 update_l10n.py 的改动清单（同时带上模板语言的原文，插入位置跟随
+模板顺序），"_" 开头的字段是给审阅者看的匹配来源，update_l10n 会忽略它们。
+审阅、修改或删掉不合适的条目后：
+
+    python3 scripts/update_l10n.py fill-de.json
+
+用法：
+    python3 scripts/translation_memory.py de [--out fill-de.json] [--min-score 0.6]
+    python3 scripts/translation_memory.py de --query "Delete this note?"
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from l10n_index import default_arb_dir, locale_from_name, template_locale
+
+PIVOT_LOCALE = 'en'
+NGRAM = 3
+
+# 预填的最低相似度；低于它只作参考
+DEFAULT_MIN_SCORE = 0.6
+
+# 每个缺失词条报告的近邻数
+DEFAULT_TOP = 3
+
+_SIMPLE_ARG = re.compile(r'\{\s*([A-Za-z_]\w*)\s*(?=[},])')
+_SPACES = re.compile(r'\s+')
+
+
+def arguments_in_order(text):
+    """消息里参数名按首次出现的顺序（{name}、{count, plural, ...} 都算）"""
+    seen = []
+    for name in _SIMPLE_ARG.findall(text):
+        if name not in seen:
+            seen.append(name)
+    return seen
+
+
+def normalize(text):
+    """参数名换成序号、统一大小写与空白：只是参数名不同的两条原文视为相同"""
+    order = {name: i for i, name in enumerate(arguments_in_order(text))}
+    text = _SIMPLE_ARG.sub(lambda m: '{' + str(order[m.group(1)]), text)
+    return _SPACES.sub(' ', text.strip().lower())
+
+
+def ngrams(text):
+    padded = f' {text} '
+    if len(padded) <= NGRAM:
+        return {padded}
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def rename_arguments(translation, source_args, target_args):
+    """把近邻译文里的参数名按位置换成当前词条的参数名；个数对不上时原样返回"""
+    if len(source_args) != len(target_args) or source_args == target_args:
+        return translation
+    mapping = dict(zip(source_args, target_args))
+    return _SIMPLE_ARG.sub(lambda m: '{' + mapping.get(m.group(1), m.group(1)), translation)
+
+
+class TranslationMemory:
+    """
+    (中介语言原文, 译文) 对的 3-gram 倒排索引
+
+    用法：
+        memory = TranslationMemory(pairs)          # pairs: [(键, 英文, 译文)]
+        memory.lookup('Delete this note?', top=3)  → [(相似度, 键, 英文, 译文)]
+    """
+
+    def __init__(self, pairs):
+        self.keys = []
+        self.sources = []
+        self.translations = []
+        sizes = []
+        self.exact = {}
+        postings = defaultdict(list)
+        for key, source, translation in pairs:
+            doc = len(self.keys)
+            normalized = normalize(source)
+            grams = ngrams(normalized)
+            self.keys.append(key)
+            self.sources.append(source)
+            self.translations.append(translation)
+            sizes.append(len(grams))
+            self.exact.setdefault(normalized, doc)
+            for gram in grams:
+                postings[gram].append(doc)
+        self.postings = {gram: np.array(docs, dtype=np.int32) for gram, docs in postings.items()}
+        self.sizes = np.array(sizes, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, source, top=DEFAULT_TOP):
+        """返回最相近的 [top] 条 (相似度, 键, 英文, 译文)，相似度高的在前"""
+        normalized = normalize(source)
+        exact = self.exact.get(normalized)
+        grams = ngrams(normalized)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits or top <= 0:
+            return []
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.keys))
+        scores = shared / (len(grams) + self.sizes - shared)
+        if exact is not None:
+            scores[exact] = 1.0
+
+        top = min(top, len(self.keys))
+        best = np.argpartition(-scores, top - 1)[:top]
+        ranked = sorted((-scores[doc], doc) for doc in best.tolist() if scores[doc] > 0)
+        return [(float(-score), self.keys[doc], self.sources[doc], self.translations[doc])
+                for score, doc in ranked]
+
+
+def load_arbs(arb_dir):
+    arbs = {}
+    for name in sorted(os.listdir(arb_dir)):
+        if name.endswith('.arb'):
+            with open(os.path.join(arb_dir, name), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            messages = {k: v for k, v in data.items() if not k.startswith('@') and isinstance(v, str)}
+            arbs[data.get('@@locale') or locale_from_name(name)] = messages
+    return arbs
+
+
+def build_memory(arbs, locale, pivot=PIVOT_LOCALE):
+    pivot_messages = arbs[pivot]
+    return TranslationMemory(
+        (key, pivot_messages[key], translation)
+        for key, translation in arbs[locale].items() if key in pivot_messages)
+
+
+def _usable_neighbour(source, neighbours, min_score):
+    """
+    第一个可以直接预填的近邻（译文参数已改名）：相似度够高，参数个数相同，
+    改名后的译文只用到当前词条的参数——"Export failed: {error}" 的译文不能填给
+    没有参数的 "Export Failed"
+    """
+    wanted = arguments_in_order(source)
+    for score, match_key, match_source, translation in neighbours:
+        if score < min_score:
+            break
+        args = arguments_in_order(match_source)
+        if len(args) != len(wanted):
+            continue
+        translation = rename_arguments(translation, args, wanted)
+        if set(arguments_in_order(translation)) <= set(wanted):
+            return score, match_key, match_source, translation
+    return None
+
+
+def fill(arbs, locale, template, top=DEFAULT_TOP, min_score=DEFAULT_MIN_SCORE, pivot=PIVOT_LOCALE):
+    """为 [locale] 缺失的每个键查近邻，返回 (改动清单, 报告行, 平均查询耗时秒)"""
+    memory = build_memory(arbs, locale, pivot)
+    target = arbs[locale]
+    pivot_messages = arbs[pivot]
+    changes = {}
+    report = []
+    elapsed = 0.0
+    previous = None   # 模板顺序里上一个目标语言已有（或本批已填）的键，作为插入锚点
+    for key, template_value in arbs[template].items():
+        if key in target:
+            previous = key
+            continue
+        source = pivot_messages.get(key)
+        if source is None:
+            continue
+        start = time.perf_counter()
+        neighbours = memory.lookup(source, top)
+        elapsed += time.perf_counter() - start
+        report.append((key, source, neighbours))
+        best = _usable_neighbour(source, neighbours, min_score)
+        if best is None:
+            continue
+        score, match_key, match_source, translation = best
+        entry = {
+            template: template_value,
+            locale: translation,
+            '_source': source,
+            '_match': f'{match_key} ({score:.2f}): {match_source}',
+        }
+        if previous is not None:
+            entry['after'] = previous
+        changes[key] = entry
+        previous = key
+    return changes, report, elapsed / max(1, len(report))
+
+
+def _print_neighbours(neighbours, indent='  '):
+    if not neighbours:
+        print(f'{indent}（没有相近的已译词条）')
+    for score, key, source, translation in neighbours:
+        print(f'{indent}{score:.2f}  {key}: {source!r} → {translation!r}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='用已有译文为稀疏语言预填缺失词条')
+    parser.add_argument('locale', help='目标语言，如 de')
+    parser.add_argument('--arb-dir', default=None, help='ARB 目录（默认 lib/l10n）')
+    parser.add_argument('--pivot', default=PIVOT_LOCALE, help=f'中介语言（默认 {PIVOT_LOCALE}）')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help=f'每条列出几个近邻（默认 {DEFAULT_TOP}）')
+    parser.add_argument('--min-score', type=float, default=DEFAULT_MIN_SCORE,
+                        help=f'预填的最低相似度（默认 {DEFAULT_MIN_SCORE}）')
+    parser.add_argument('--out', default=None, help='把预填批次写到这个文件（update_l10n 的改动清单格式）')
+    parser.add_argument('--query', default=None, help='只查一条英文原文的近邻')
+    parser.add_argument('--verbose', action='store_true', help='列出每个缺失词条的近邻')
+    args = parser.parse_args()
+
+    arbs = load_arbs(args.arb_dir or default_arb_dir())
+    template = template_locale()
+    for locale in (args.locale, args.pivot, template):
+        if locale not in arbs:
+            print(f'✗ 没有 {locale} 的 ARB')
+            sys.exit(1)
+
+    if args.query:
+        start = time.perf_counter()
+        memory = build_memory(arbs, args.locale, args.pivot)
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        neighbours = memory.lookup(args.query, args.top)
+        print(f'索引 {len(memory)} 条（{built * 1000:.0f}ms），查询 {(time.perf_counter() - start) * 1e6:.0f}µs')
+        _print_neighbours(neighbours)
+        return
+
+    start = time.perf_counter()
+    changes, report, per_lookup = fill(arbs, args.locale, template, args.top, args.min_score, args.pivot)
+    total = time.perf_counter() - start
+
+    exact = sum(1 for _, _, n in report if n and n[0][0] >= 1.0)
+    print(f'{args.locale}：缺失 {len(report)} 条，原文完全相同 {exact} 条，'
+          f'可预填（相似度 ≥ {args.min_score}）{len(changes)} 条')
+    print(f'用时 {total * 1000:.0f}ms，平均每次查询 {per_lookup * 1e6:.0f}µs')
+    if args.verbose:
+        for key, source, neighbours in report:
+            mark = '✓' if key in changes else ' '
+            print(f'\n{mark} {key}: {source!r}')
+            _print_neighbours(neighbours, '    ')
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(changes, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f'✓ 预填批次已写入 {args.out}，审阅后用 update_l10n.py 应用')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,36 +1,353 @@
+#!/usr/bin/env python3
+"""
+批量向 lib/l10n/*.arb 添加 / 修改词条
+一次读入全部语言文件，在内存里应用整份改动，每个文件只写一次；
+写盘前所有文件都已生成并校验过，任何一条改动有问题都不会落下半份结果。
+
+改动清单是一个 JSON 对象，键的顺序就是插入顺序：
+
+    {
+      "copyCode": {
+        "zh": "复制代码",
+        "en": "Copy code",
+        "@": {"description": "代码块的复制按钮"},
+        "after": "copyLink"
+      },
+      "copiedCount": {"zh": "已复制 {count} 条", "en": "Copied {count}"}
+    }
+
+  - 语言代码 → 译文；模板语言（l10n.yaml 的 template-arb-file，即 zh）必须给出，
+    其他语言缺了就留给 gen-l10n 回退到模板；
+  - "@"：写进 "@key" 的元数据。译文里的 {占位符} 没在元数据里声明时自动补上
+    （普通占位符为 String，plural 为 num），所以带参数的词条不必手写 placeholders；
+  - "after"：插在某个已有词条（连同它的 "@key"）之后；不写就追加到文件末尾。
+    可以指向同一份清单里前面的新词条；
+  - "_" 开头的字段是注释，不写进 ARB。
+
+已存在且译文相同的词条跳过；译文不同视为冲突，需要 --overwrite 才会原地替换。
+
+ARB 文件的格式是 json.dumps(indent=2, ensure_ascii=False) 加结尾换行，
+写回时沿用同样的缩进与结尾；读入的文件不是这个格式时拒绝改写（--reformat 可强制）。
+
+用法：
+    python3 scripts/update_l10n.py changes.json [--dry-run] [--overwrite]
+    python3 scripts/update_l10n.py --add copyCode zh=复制代码 en="Copy code"
+    python3 scripts/update_l10n.py --remove oldKey anotherOldKey
+"""
+
+import argparse
 import json
+import os
 import re
 import sys
 
-def add_key_to_arb(filepath, key, value):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+from l10n_index import MessageSyntaxError, message_arguments
 
-    # We'll just insert it before the last closing brace
-    # and hope the JSON remains valid.
+ARB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'l10n')
+TEMPLATE_LOCALE = 'zh'
 
-    # Simple JSON parsing to ensure we can just add a key
-    data = json.loads(content)
-    if key in data:
-        print(f"Key {key} already exists in {filepath}")
-        return
+# 条目里除语言代码以外的保留字段
+META_FIELD = '@'
+AFTER_FIELD = 'after'
+
+_INDENT = re.compile(r'^\{\n( +)"', re.M)
+
+
+class ArbError(ValueError):
+    """改动清单不合法，或与现有 ARB 内容冲突。"""
+
+
+def infer_placeholders(value):
+    """从 ICU 消息里找出参数，返回 gen-l10n 的 placeholders 声明。"""
+    try:
+        arguments = message_arguments(value)
+    except MessageSyntaxError as e:
+        raise ArbError(f'消息格式错误（{e}）：{value!r}') from e
+    return {name: {'type': 'num' if kind in ('plural', 'selectordinal') else 'String'}
+            for name, kind in arguments.items()}
+
+
+class ArbFile:
+    """一个 ARB 文件的内存副本：有序的 (键, 值) 列表，外加原文的缩进与结尾。"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'r', encoding='utf-8') as f:
+            self.original = f.read()
+        self.entries = json.loads(self.original, object_pairs_hook=self._no_duplicates)
+        match = _INDENT.match(self.original)
+        self.indent = len(match.group(1)) if match else 2
+        self.trailing = self.original[len(self.original.rstrip()):]
+        self.locale = self.entries.get('@@locale') or _locale_from_name(path)
+        self.changed = []
+
+    @staticmethod
+    def _no_duplicates(pairs):
+        seen = {}
+        for key, value in pairs:
+            if key in seen:
+                # json.loads 默认「后者覆盖前者」，重复键会被悄悄吃掉一个
+                raise ArbError(f'重复的键：{key}')
+            seen[key] = value
+        return seen
+
+    def render(self):
+        return json.dumps(self.entries, indent=self.indent, ensure_ascii=False) + self.trailing
+
+    def is_canonical(self):
+        """原文能否由 render() 原样生成；不能的话写回会改动无关的行。"""
+        return self.render() == self.original
+
+    def apply(self, changes, overwrite=False):
+        """把 [changes]（键 → ArbChange）里属于本语言的部分写进内存副本。"""
+        inserts = {}   # 锚点键（None 为文件末尾）→ 要插在它后面的新键，按清单顺序
+        new_meta = {}  # 已有键第一次得到 "@key"：要紧跟在键后面写
+        for key, change in changes.items():
+            value = change.values.get(self.locale)
+            if value is None:
+                continue
+            if key in self.entries:
+                # 已有的 "@key" 为准，清单里显式给的字段覆盖它，推断出的占位符只补缺；
+                # 原来没有 "@key"、译文也没变时，不因为推断出占位符就去改文件
+                existing = self.entries.get('@' + key)
+                meta = change.metadata(value, existing)
+                if existing is None and not change.meta and self.entries[key] == value:
+                    meta = {}
+                if self.entries[key] == value and (not meta or meta == existing):
+                    continue
+                if not overwrite:
+                    raise ArbError(f'{os.path.basename(self.path)}：{key} 已存在且内容不同'
+                                   f'（现为 {self.entries[key]!r}），需要 --overwrite')
+                self.entries[key] = value
+                if existing is not None:
+                    self.entries['@' + key] = meta
+                elif meta:
+                    new_meta[key] = meta
+                self.changed.append(key)
+                continue
+            meta = change.metadata(value)
+            anchor = change.after
+            if anchor is not None and anchor not in self.entries and anchor not in changes:
+                raise ArbError(f'{os.path.basename(self.path)}：{key} 的锚点 {anchor} 不存在')
+            inserts.setdefault(anchor, []).append((key, value, meta))
+            self.changed.append(key)
+
+        if not inserts and not new_meta:
+            return
+
+        # 一次重建有序字典。已有条目一个不动；锚点紧跟着自己的 "@key" 时，
+        # 新键插在 "@key" 之后，免得把锚点和它的元数据拆开。
+        items = list(self.entries.items())
+        attach = {}
+        for i, (key, _) in enumerate(items):
+            follows_meta = i + 1 < len(items) and items[i + 1][0] == '@' + key
+            attach.setdefault(items[i + 1][0] if follows_meta else key, key)
+        rebuilt = {}
+
+        def emit_new(anchor):
+            for key, value, meta in inserts.pop(anchor, ()):
+                rebuilt[key] = value
+                if meta:
+                    rebuilt['@' + key] = meta
+                emit_new(key)
+
+        for key, value in items:
+            rebuilt[key] = value
+            if key in new_meta:
+                rebuilt['@' + key] = new_meta[key]
+            if key in attach:
+                emit_new(attach[key])
+        emit_new(None)
+        # 锚点是另一门语言才有的新键时，这里还剩下，退回追加到末尾
+        for anchor in list(inserts):
+            emit_new(anchor)
+        self.entries = rebuilt
+
+    def remove(self, keys):
+        for key in keys:
+            if key.startswith('@'):
+                continue
+            if self.entries.pop(key, None) is not None:
+                self.entries.pop('@' + key, None)
+                self.changed.append(key)
+
+
+class ArbChange:
+    def __init__(self, key, spec):
+        if not isinstance(spec, dict):
+            raise ArbError(f'{key}：条目应是对象，拿到的是 {type(spec).__name__}')
+        if key.startswith('@'):
+            raise ArbError(f'{key}：键不能以 @ 开头，元数据写在条目的 "@" 字段里')
+        self.key = key
+        self.meta = dict(spec.get(META_FIELD) or {})
+        self.after = spec.get(AFTER_FIELD)
+        # "_" 开头的字段是给审阅者看的注释（比如 translation_memory 导出的匹配来源），不写进 ARB
+        self.values = {locale: value for locale, value in spec.items()
+                       if locale not in (META_FIELD, AFTER_FIELD) and not locale.startswith('_')}
+        for locale, value in self.values.items():
+            if not isinstance(value, str):
+                raise ArbError(f'{key}.{locale}：译文应是字符串')
 
-    data[key] = value
+    def metadata(self, value, base=None):
+        """本语言要写的 "@key"：[base]（已有的 "@key"）叠加显式给出的元数据，
+        再补上译文里未声明的占位符。"""
+        meta = dict(base or {})
+        meta.update(self.meta)
+        declared = dict((base or {}).get('placeholders') or {})
+        declared.update(self.meta.get('placeholders') or {})
+        for name, decl in infer_placeholders(value).items():
+            declared.setdefault(name, decl)
+        if declared:
+            meta['placeholders'] = declared
+        return meta
 
-    # Dump it back preserving the original format as much as possible is hard with json module
-    # So we use regex to inject it
 
-    match = re.search(r'}(\s*)$', content)
-    if match:
-        insertion = f',\n  "{key}": "{value}"'
-        new_content = content[:match.start()] + insertion + content[match.start():]
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        print(f"Added {key} to {filepath}")
+def _locale_from_name(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name.split('_', 1)[1] if '_' in name else name
+
+
+def load_changes(raw):
+    """把 {键: 条目} 解析成有序的 {键: ArbChange}，并检查模板语言都给了译文。"""
+    if not isinstance(raw, dict):
+        raise ArbError('改动清单应是 JSON 对象')
+    changes = {key: ArbChange(key, spec) for key, spec in raw.items()}
+    for change in changes.values():
+        if TEMPLATE_LOCALE not in change.values:
+            raise ArbError(f'{change.key}：缺少模板语言 {TEMPLATE_LOCALE} 的译文')
+    return changes
+
+
+def apply_changeset(changes, arb_dir=ARB_DIR, overwrite=False, dry_run=False, reformat=False):
+    """对 [arb_dir] 下全部 ARB 应用改动，返回 {文件名: 改动的键}。
+
+    先把所有文件读入、改好、渲染并回读校验，全部通过后才逐个原子替换。
+    """
+    files = _load_arbs(arb_dir, reformat)
+    known = {arb.locale for arb in files}
+    for change in changes.values():
+        unknown = set(change.values) - known
+        if unknown:
+            raise ArbError(f'{change.key}：没有这些语言的 ARB：{", ".join(sorted(unknown))}')
+
+    for arb in files:
+        arb.apply(changes, overwrite)
+    return _commit(files, dry_run)
+
+
+def remove_keys(keys, arb_dir=ARB_DIR, dry_run=False, reformat=False):
+    """从 [arb_dir] 下全部 ARB 删除 [keys]（连同各自的 "@key"），返回 {文件名: 删除的键}。"""
+    files = _load_arbs(arb_dir, reformat)
+    for arb in files:
+        arb.remove(keys)
+    return _commit(files, dry_run)
+
+
+def _load_arbs(arb_dir, reformat):
+    files = [ArbFile(os.path.join(arb_dir, name))
+             for name in sorted(os.listdir(arb_dir)) if name.endswith('.arb')]
+    if not files:
+        raise ArbError(f'{arb_dir} 下没有 .arb 文件')
+    for arb in files:
+        if not reformat and not arb.is_canonical():
+            raise ArbError(f'{arb.path} 不是 indent={arb.indent} 的标准 JSON 格式，'
+                           '写回会改动无关的行（确认无妨可加 --reformat）')
+    return files
+
+
+def _commit(files, dry_run):
+    pending = []
+    for arb in files:
+        if arb.changed:
+            content = arb.render()
+            json.loads(content)   # 自己渲染的内容也回读一遍
+            pending.append((arb, content))
+
+    if not dry_run:
+        for arb, content in pending:
+            _write_atomic(arb.path, content)
+    return {os.path.basename(arb.path): arb.changed for arb, _ in pending}
+
+
+def _write_atomic(path, content):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def add_key_to_arb(filepath, key, value):
+    """旧接口：往单个 ARB 文件加一个键。新代码请用 apply_changeset 批量处理。"""
+    arb = ArbFile(filepath)
+    arb.apply({key: ArbChange(key, {arb.locale: value})})
+    if arb.changed:
+        _write_atomic(filepath, arb.render())
+        print(f'Added {key} to {filepath}')
     else:
-        print(f"Failed to find end of JSON in {filepath}")
+        print(f'Key {key} already exists in {filepath}')
+
+
+def _parse_add(items):
+    key, *pairs = items
+    spec = {}
+    for pair in pairs:
+        locale, sep, value = pair.partition('=')
+        if not sep:
+            raise ArbError(f'--add {key}：应写成 语言=译文，拿到的是 {pair!r}')
+        spec[locale] = value
+    return key, spec
+
+
+def _apply_cli(parser, args):
+    raw = {}
+    if args.changes:
+        if args.changes == '-':
+            raw.update(json.load(sys.stdin))
+        else:
+            with open(args.changes, 'r', encoding='utf-8') as f:
+                raw.update(json.load(f))
+    for items in args.add:
+        key, spec = _parse_add(items)
+        raw[key] = spec
+    if not raw:
+        parser.error('没有改动：给出清单文件、--add 或 --remove')
+    return apply_changeset(load_changes(raw), args.arb_dir, args.overwrite,
+                           args.dry_run, args.reformat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量、原子地修改 lib/l10n 下的 ARB 文件')
+    parser.add_argument('changes', nargs='?', help='改动清单 JSON 文件（- 为标准输入）')
+    parser.add_argument('--add', nargs='+', action='append', default=[], metavar='KEY 语言=译文',
+                        help='在命令行直接给出一个词条，可重复；排在清单文件之后')
+    parser.add_argument('--remove', nargs='+', default=[], metavar='KEY',
+                        help='从所有语言里删除这些键（连同 @key），不能与添加同时使用')
+    parser.add_argument('--arb-dir', default=ARB_DIR, help='ARB 目录（默认 lib/l10n）')
+    parser.add_argument('--overwrite', action='store_true', help='已存在且译文不同的键原地替换')
+    parser.add_argument('--reformat', action='store_true', help='允许改写非标准格式的 ARB')
+    parser.add_argument('--dry-run', action='store_true', help='只检查并列出改动，不写文件')
+    args = parser.parse_args()
+
+    try:
+        if args.remove:
+            if args.changes or args.add:
+                parser.error('--remove 不能与清单文件或 --add 同时使用')
+            result = remove_keys(args.remove, args.arb_dir, args.dry_run, args.reformat)
+        else:
+            result = _apply_cli(parser, args)
+    except (ArbError, OSError, json.JSONDecodeError) as e:
+        print(f'✗ {e}')
+        sys.exit(1)
+
+    if not result:
+        print('✓ 没有需要改动的词条')
+        return
+    verb = '将修改' if args.dry_run else '已修改'
+    for name, keys in result.items():
+        print(f'✓ {verb} {name}：{", ".join(keys)}')
+
 
-add_key_to_arb('lib/l10n/app_zh.arb', 'copyCode', '复制代码')
-add_key_to_arb('lib/l10n/app_en.arb', 'copyCode', 'Copy code')
-add_key_to_arb('lib/l10n/app_zh.arb', 'copiedCode', '已复制')
-add_key_to_arb('lib/l10n/app_en.arb', 'copiedCode', 'Copied')
+if __name__ == '__main__':
+    main()
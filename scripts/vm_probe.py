@@ -3,79 +3,152 @@
 Dart VM Service 性能探针 - 纯 stdlib 实现 (无第三方依赖)
 通过 WebSocket JSON-RPC 查询: VM信息 / Isolate / 内存 / CPU
 """
-import socket, struct, hashlib, base64, json, time, sys
+import socket, struct, hashlib, base64, json, time, sys, os
 
 HOST = "127.0.0.1"
 PORT = 38397
 PATH = "/lXFNoUWIB3g=/"
 
-def ws_handshake(sock):
-    key = base64.b64encode(b"dart_vm_probe_key").decode()
-    req = (
-        f"GET {PATH} HTTP/1.1\r\n"
-        f"Host: {HOST}:{PORT}\r\n"
-        f"Upgrade: websocket\r\n"
-        f"Connection: Upgrade\r\n"
-        f"Sec-WebSocket-Key: {key}\r\n"
-        f"Sec-WebSocket-Version: 13\r\n"
-        f"\r\n"
-    )
-    sock.sendall(req.encode())
-    resp = b""
-    while b"\r\n\r\n" not in resp:
-        resp += sock.recv(4096)
-    if b"101" not in resp:
-        print("WS 握手失败:", resp[:200])
-        sys.exit(1)
-    print("✅ WebSocket 握手成功")
-
-def ws_send(sock, msg: str):
-    data = msg.encode()
-    length = len(data)
-    mask = b'\x01\x02\x03\x04'
-    masked = bytes([data[i] ^ mask[i % 4] for i in range(length)])
-    if length <= 125:
-        header = bytes([0x81, 0x80 | length]) + mask
-    elif length <= 65535:
-        header = bytes([0x81, 0xFE]) + struct.pack(">H", length) + mask
-    else:
-        header = bytes([0x81, 0xFF]) + struct.pack(">Q", length) + mask
-    sock.sendall(header + masked)
-
-def ws_recv(sock) -> str:
-    def recv_exact(n):
-        buf = b""
-        while len(buf) < n:
-            chunk = sock.recv(n - len(buf))
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# 帧操作码
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+def mask_payload(data, mask: bytes) -> bytes:
+    """按 4 字节掩码循环异或：整段当成一个大整数一次异或，比逐字节快两个数量级"""
+    n = len(data)
+    if not n:
+        return b""
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, "little") ^ int.from_bytes(key, "little")).to_bytes(n, "little")
+
+class WebSocket:
+    """
+    最小的 WebSocket 客户端帧层
+    收包用 recv_into 直接写进预先分配好的 bytearray，不做拼接；
+    分片消息（opcode 0）按序重组，ping 自动回 pong，close 回 close 后抛 ConnectionError
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self._pending = b""          # 握手时多读到的帧数据
+        self._header = bytearray(14)
+        self._header_view = memoryview(self._header)
+
+    def handshake(self):
+        key = base64.b64encode(os.urandom(16)).decode()
+        req = (
+            f"GET {PATH} HTTP/1.1\r\n"
+            f"Host: {HOST}:{PORT}\r\n"
+            f"Upgrade: websocket\r\n"
+            f"Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            f"Sec-WebSocket-Version: 13\r\n"
+            f"\r\n"
+        )
+        self.sock.sendall(req.encode())
+        resp = bytearray()
+        while b"\r\n\r\n" not in resp:
+            chunk = self.sock.recv(4096)
             if not chunk:
+                raise ConnectionError("握手时连接断开")
+            resp += chunk
+        head, _, self._pending = bytes(resp).partition(b"\r\n\r\n")
+        status = head.split(b"\r\n", 1)[0]
+        accept = base64.b64encode(hashlib.sha1(key.encode() + WS_GUID).digest())
+        if b" 101" not in status or accept not in head:
+            print("WS 握手失败:", head[:200])
+            sys.exit(1)
+        print("✅ WebSocket 握手成功")
+
+    def _recv_into(self, view):
+        """把 view 填满"""
+        got = 0
+        if self._pending:
+            got = min(len(self._pending), len(view))
+            view[:got] = self._pending[:got]
+            self._pending = self._pending[got:]
+        while got < len(view):
+            n = self.sock.recv_into(view[got:])
+            if not n:
                 raise ConnectionError("连接断开")
-            buf += chunk
-        return buf
-
-    header = recv_exact(2)
-    opcode = header[0] & 0x0F
-    masked = (header[1] & 0x80) != 0
-    length = header[1] & 0x7F
-    if length == 126:
-        length = struct.unpack(">H", recv_exact(2))[0]
-    elif length == 127:
-        length = struct.unpack(">Q", recv_exact(8))[0]
-    mask_key = recv_exact(4) if masked else b""
-    payload = recv_exact(length)
-    if masked:
-        payload = bytes([payload[i] ^ mask_key[i % 4] for i in range(length)])
-    return payload.decode("utf-8", errors="replace")
-
-def rpc(sock, method, params=None, req_id=1):
+            got += n
+
+    def _recv_frame(self):
+        """读一帧，返回 (fin, opcode, payload: bytearray)"""
+        hv = self._header_view
+        self._recv_into(hv[:2])
+        b0, b1 = self._header[0], self._header[1]
+        fin, opcode = b0 & 0x80, b0 & 0x0F
+        masked = b1 & 0x80
+        length = b1 & 0x7F
+        if length == 126:
+            self._recv_into(hv[2:4])
+            length = struct.unpack_from(">H", self._header, 2)[0]
+        elif length == 127:
+            self._recv_into(hv[2:10])
+            length = struct.unpack_from(">Q", self._header, 2)[0]
+        mask_key = None
+        if masked:   # 服务端按规范不加掩码，加了也照样解开
+            self._recv_into(hv[10:14])
+            mask_key = bytes(self._header[10:14])
+        payload = bytearray(length)
+        self._recv_into(memoryview(payload))
+        if mask_key:
+            payload = bytearray(mask_payload(payload, mask_key))
+        return fin, opcode, payload
+
+    def send(self, data: bytes, opcode=OP_TEXT):
+        """客户端发出的帧必须加掩码"""
+        length = len(data)
+        mask = os.urandom(4)
+        if length <= 125:
+            header = struct.pack(">BB", 0x80 | opcode, 0x80 | length)
+        elif length <= 65535:
+            header = struct.pack(">BBH", 0x80 | opcode, 0xFE, length)
+        else:
+            header = struct.pack(">BBQ", 0x80 | opcode, 0xFF, length)
+        self.sock.sendall(header + mask + mask_payload(data, mask))
+
+    def recv(self) -> bytearray:
+        """收一条完整的数据消息（分片已重组），控制帧就地处理"""
+        message = None
+        while True:
+            fin, opcode, payload = self._recv_frame()
+            if opcode == OP_PING:
+                self.send(payload, OP_PONG)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                try:
+                    self.send(payload[:2], OP_CLOSE)
+                except OSError:
+                    pass
+                code = struct.unpack(">H", payload[:2])[0] if len(payload) >= 2 else None
+                raise ConnectionError(f"服务端关闭连接 (code={code})")
+            if opcode == OP_CONT:
+                if message is None:
+                    raise ConnectionError("收到没有开头的续帧")
+                message += payload
+            elif message is not None:
+                raise ConnectionError("上一条分片消息还没结束")
+            else:
+                message = payload
+            if fin:
+                return message
+
+def rpc(ws, method, params=None, req_id=1):
     req = json.dumps({"jsonrpc": "2.0", "method": method, "params": params or {}, "id": req_id})
-    ws_send(sock, req)
+    ws.send(req.encode())
     while True:
-        raw = ws_recv(sock)
+        raw = ws.recv()
         try:
+            # json.loads 直接吃 bytes，省一次 decode 拷贝
             resp = json.loads(raw)
-            if "id" in resp:
+            if resp.get("id") == req_id:
                 return resp.get("result", resp.get("error"))
-        except Exception:
+        except ValueError:
             pass
 
 def fmt_bytes(b):
@@ -88,10 +161,11 @@ def fmt_bytes(b):
 
 def main():
     sock = socket.create_connection((HOST, PORT), timeout=10)
-    ws_handshake(sock)
+    ws = WebSocket(sock)
+    ws.handshake()
 
     # ── 1. VM 基本信息 ──────────────────────────────────────
-    vm = rpc(sock, "getVM", req_id=1)
+    vm = rpc(ws, "getVM", req_id=1)
     print("\n" + "="*60)
     print("📱 Dart VM 信息")
     print("="*60)
@@ -108,7 +182,7 @@ def main():
     main_iso = next((i for i in isolates if "main" in i.get("name","").lower()), isolates[0] if isolates else None)
     if main_iso:
         iso_id = main_iso["id"]
-        iso = rpc(sock, "getIsolate", {"isolateId": iso_id}, req_id=2)
+        iso = rpc(ws, "getIsolate", {"isolateId": iso_id}, req_id=2)
         print(f"\n{'='*60}")
         print(f"🧵 主 Isolate: {iso.get('name','?')}")
         print(f"{'='*60}")
@@ -119,7 +193,7 @@ def main():
         print(f"  加载库数   : {len(libs)}")
 
         # ── 3. 内存快照 ─────────────────────────────────────
-        mem = rpc(sock, "getMemoryUsage", {"isolateId": iso_id}, req_id=3)
+        mem = rpc(ws, "getMemoryUsage", {"isolateId": iso_id}, req_id=3)
         if mem:
             print(f"\n{'='*60}")
             print(f"🧠 内存使用")
@@ -141,9 +215,9 @@ def main():
         print(f"\n{'='*60}")
         print(f"⚡ CPU Profiler (采集 2s 样本...)")
         print(f"{'='*60}")
-        rpc(sock, "clearCpuSamples", {"isolateId": iso_id}, req_id=4)
+        rpc(ws, "clearCpuSamples", {"isolateId": iso_id}, req_id=4)
         time.sleep(2)
-        samples = rpc(sock, "getCpuSamples", {
+        samples = rpc(ws, "getCpuSamples", {
             "isolateId": iso_id,
             "userTagFilters": [],
         }, req_id=5)
@@ -180,7 +254,7 @@ def main():
                         print(f"  {excl:>8}  {incl:>8}  {display[:60]} ({pct:.1f}%)")
 
         # ── 5. VM Flags ──────────────────────────────────────
-        flags = rpc(sock, "getFlagList", req_id=6)
+        flags = rpc(ws, "getFlagList", req_id=6)
         if flags:
             relevant = [f for f in flags.get("flags",[]) if any(k in f.get("name","").lower() for k in ["gc","heap","profile","opt","jit"])]
             if relevant:
@@ -197,7 +271,7 @@ def main():
         print(f"{'='*60}")
         total_heap = 0
         for iso_ref in isolates:
-            m = rpc(sock, "getMemoryUsage", {"isolateId": iso_ref["id"]}, req_id=99)
+            m = rpc(ws, "getMemoryUsage", {"isolateId": iso_ref["id"]}, req_id=99)
             if m:
                 used = m.get("heapUsage",{}).get("used", 0)
                 total_heap += used